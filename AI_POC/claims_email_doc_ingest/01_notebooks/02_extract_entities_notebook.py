@@ -3,6 +3,8 @@ import os
 import yaml
 import pandas as pd
 from 07_models.entity_classifier import EntityClassifier
+from 07_models.extraction_cache import ExtractionCache
+from 07_models.parallel_triage import ParallelTriageExecutor
 from 12_integration.email_parser import EmailParser
 from 12_integration.blob_connector import BlobConnector
 from 12_integration.sql_writer import SQLWriter
@@ -18,23 +20,30 @@ with open(CONFIG_PATH) as f:
 # Load emails (replace with blob ingestion in production)
 emails = pd.read_json(EMAILS_PATH)
 
-classifier = EntityClassifier(config)
+cache_config = config.get('extraction_cache', {})
+cache = ExtractionCache(
+    config,
+    max_entries=cache_config.get('max_entries', 10000),
+    disk_path=cache_config.get('disk_path'),
+    config_path=CONFIG_PATH
+)
+classifier = EntityClassifier(config, cache=cache)
 parser = EmailParser()
 
-results = []
-for idx, row in emails.iterrows():
-    entities = classifier.extract_all_entities(row['body_text'])
-    doc_type = parser.classify_attachment_type(row.get('attachment_filename', ''))
-    priority, confidence = classifier.classify_priority(row['body_text'], config)
-    claim_type, claim_conf = classifier.classify_claim_type(row['body_text'], config)
-    high_risk = classifier.is_high_risk(row['body_text'], config)
-    results.append({
-        "entities": entities,
-        "doc_type": doc_type,
-        "priority": priority,
-        "claim_type": claim_type,
-        "high_risk": high_risk
-    })
-    if high_risk:
-        print(f"ALERT: High risk claim detected: {entities.get('claim_number')}")
+# Triage only the new content of each email: quoted history, signatures and disclaimers are dropped
+html_bodies = emails['body_html'] if 'body_html' in emails.columns else [''] * len(emails)
+emails['content_text'] = [
+    parser.normalize_body(text or '', html or '')['text'] for text, html in zip(emails['body_text'], html_bodies)
+]
+# Vectorized triage sharded across driver cores (in-process, with the cache, when max_workers is 1)
+with ParallelTriageExecutor(config, classifier=classifier) as executor:
+    results = executor.triage_dataframe(emails, text_column='content_text')
+if 'attachment_filename' in emails.columns:
+    results['doc_type'] = emails['attachment_filename'].fillna('').map(parser.classify_attachment_type)
+else:
+    results['doc_type'] = [parser.classify_attachment_type('')] * len(results)
+
+for claim_number in results.loc[results['high_risk'], 'claim_number']:
+    print(f"ALERT: High risk claim detected: {claim_number}")
+print(f"Extraction cache: {cache.metrics()}")
 print("Processing complete.")
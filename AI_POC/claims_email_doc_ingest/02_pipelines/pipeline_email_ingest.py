@@ -1,6 +1,281 @@
-def run_email_ingest(config_path, sql_writer, logger):
+import json
+import time
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List, Optional
+from 00_configs.env_settings import settings
+from 04_logs.metrics import MetricsRegistry
+from 07_models.ai_entity_extractor import AIEntityExtractor
+from 07_models.entity_classifier import EntityClassifier
+from 07_models.hybrid_extractor import HybridEntityExtractor
+from 12_integration.blob_connector import BlobConnector
+from 12_integration.checkpoint_store import create_checkpoint_store
+from 12_integration.email_parser import EmailParser
+
+def build_email_bundle(
+    parsed: Dict, classifier: EntityClassifier, config: Dict, extractor: Optional[HybridEntityExtractor] = None
+) -> Dict:
+    """Run the regex extraction stage and keyword triage on a parsed email and shape it for SQLWriter
+
+    entities['ai_fields_requested'] lists the fields the AI stage should still fill;
+    the AI stage sets entities['ai_error'] when it could not fill them.
+    """
+    extractor = extractor or HybridEntityExtractor(config, classifier)
+    text = extractor.email_text(parsed)
+    entities = extractor.regex_stage(text, extractor.history_text(parsed))
+    # Entities come from the new content only, but a forward's risk usually sits in the quoted part
+    triage = classifier.classify_all(extractor.triage_text(parsed))
+    rules = config.get('triage_rules', {})
+    # Sender contact details usually live in the signature, which the view strips
+    contact_text = "\n".join(part for part in (text, parsed.get('body_view', {}).get('signature_text')) if part)
+    contacts = EmailParser.extract_all(contact_text)
+    entities.update({
+        'phone_numbers': [match['value'] for match in contacts['phone_numbers']],
+        'email_addresses': [match['value'] for match in contacts['email_addresses']]
+    })
+    claim_amount = EmailParser.parse_amount(entities.get('claim_amount')) or 0.0
+    over_limit = claim_amount >= rules.get('auto_escalate_amount', float('inf'))
+    requires_escalation = (
+        triage['high_risk']
+        or over_limit
+        or triage['priority_level'] in rules.get('require_supervisor_review', [])
+    )
+    attachments = []
+    for att in parsed.get('attachments', []):
+        attachment_type = EmailParser.classify_attachment_type(att.get('filename', ''))
+        attachments.append({
+            'filename': att.get('filename'),
+            'file_type': attachment_type['type'],
+            'file_category': attachment_type['category'],
+            'file_size': att.get('size', att.get('file_size')),
+            'blob_path': att.get('blob_path')
+        })
+    return {
+        'email': parsed,
+        'entities': entities,
+        'triage': {
+            'priority_level': triage['priority_level'],
+            'claim_type': triage['claim_type'],
+            'risk_level': 'high' if triage['high_risk'] else 'standard',
+            'requires_escalation': requires_escalation,
+            'confidence_score': triage['priority_confidence']
+        },
+        'attachments': attachments
+    }
+
+def _blob_message_id(container: str, blob: Dict) -> str:
+    """Stable stand-in Message-ID for an email that has none, derived from the blob name and etag"""
+    digest = hashlib.sha1(f"{blob['name']}:{blob.get('etag') or ''}".encode('utf-8')).hexdigest()
+    return f"<blob-{digest}@{container}>"
+
+def _high_risk_alert(bundle: Dict) -> Dict:
+    entities, triage = bundle['entities'], bundle['triage']
+    return {
+        'message_id': bundle['email'].get('message_id'),
+        'claim_number': entities.get('claim_number'),
+        'policy_number': entities.get('policy_number'),
+        'insured_name': entities.get('insured_name'),
+        'claim_amount': entities.get('claim_amount'),
+        'priority_level': triage['priority_level'],
+        'risk_level': triage['risk_level']
+    }
+
+class EmailIngestPipeline:
+    """Streams emails from blob storage through parsing, triage and batched SQL writes
+
+    Blob listing is consumed lazily; downloads and parsing run on a bounded
+    thread pool, and at most max_in_flight blobs are outstanding at once, so a
+    slow database write holds back further listing and downloading.
+
+    With a checkpoint store, blobs already committed with the same etag are
+    skipped without downloading, emails whose message_id was persisted before
+    are dropped, and each batch is checkpointed right after its SQL commit so
+    a crashed run resumes from the last committed batch.
+
+    With an AI extractor, required fields the regex stage missed or scored
+    below the hybrid confidence threshold are filled by the model for the
+    whole batch concurrently just before it is written. All batches share one
+    event loop and one extractor session, closed when run() ends; a batch
+    whose AI stage fails is still written with its regex results.
+
+    Every stage (blob_download, parse, regex, ai, sql_write, checkpoint)
+    reports its latency and item count into self.metrics, together with the
+    in-flight queue depth.
+
+    With an alert dispatcher, every high-risk email is queued for a Teams
+    alert once its batch is committed; delivery happens off the pipeline
+    threads.
+    """
+    def __init__(self, config: Dict, sql_writer, logger, blob_connector=None, checkpoint_store=None,
+                 ai_extractor=None, metrics: Optional[MetricsRegistry] = None, alert_dispatcher=None):
+        self.config = config
+        self.alert_dispatcher = alert_dispatcher
+        self.metrics = metrics or MetricsRegistry()
+        self.sql_writer = sql_writer
+        self.logger = logger
+        self.blob_connector = blob_connector or BlobConnector(settings.AZURE_STORAGE_CONNECTION_STRING, logger)
+        self.classifier = EntityClassifier(config)
+        self.extractor = HybridEntityExtractor(config, self.classifier, ai_extractor, logger)
+        ingestion = config.get('ingestion', {})
+        self.container = config['blob_storage']['container_name']
+        self.prefix = ingestion.get('prefix', '')
+        self.max_workers = ingestion.get('max_workers', 16)
+        self.max_in_flight = max(ingestion.get('max_in_flight', 4 * self.max_workers), self.max_workers)
+        self.batch_size = ingestion.get('batch_size', 100)
+        self.page_size = ingestion.get('list_page_size', 500)
+        self.tables = config.get('database', {}).get('tables')
+        self.checkpoint_store = checkpoint_store or create_checkpoint_store(config, sql_writer, logger)
+        self._pending_blobs: List[Dict] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    def _download_and_parse(self, blob: Dict) -> Dict:
+        with self.metrics.timer('blob_download', items=1):
+            email_data = self.blob_connector.read_email_blob(self.container, blob['name'])
+        with self.metrics.timer('parse', items=1):
+            parsed = EmailParser.parse_email_structure(email_data)
+        parsed['blob_path'] = f"{self.container}/{blob['name']}"
+        return parsed
+    def _flush(self, batch: List[Dict], stats: Dict):
+        if not batch and not self._pending_blobs:
+            return
+        try:
+            if batch and self.extractor.ai_extractor is not None:
+                self._complete_with_ai(batch, stats)
+            if batch:
+                with self.metrics.timer('sql_write', items=len(batch)):
+                    self.sql_writer.persist_email_bundles(batch, self.tables)
+                stats['emails_ingested'] += len(batch)
+                stats['batches_written'] += 1
+                if self.alert_dispatcher is not None:
+                    for bundle in batch:
+                        if bundle['triage']['risk_level'] == 'high':
+                            self.alert_dispatcher.submit(_high_risk_alert(bundle))
+            if self.checkpoint_store:
+                with self.metrics.timer('checkpoint', items=len(self._pending_blobs)):
+                    self.checkpoint_store.commit_batch(
+                        self._pending_blobs, [bundle['email']['message_id'] for bundle in batch]
+                    )
+        except Exception as e:
+            stats['emails_failed'] += len(batch)
+            self.logger.error(f"Failed to persist batch of {len(batch)} emails: {str(e)}")
+        batch.clear()
+        self._pending_blobs = []
+    def _complete_with_ai(self, batch: List[Dict], stats: Dict):
+        pending = [bundle for bundle in batch if bundle['entities'].get('ai_fields_requested')]
+        if not pending:
+            return
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        try:
+            with self.metrics.timer('ai', items=len(pending)):
+                # Results are updated in place, so the bundles pick up the AI values
+                self._loop.run_until_complete(self.extractor.complete_batch(
+                    [bundle['email'] for bundle in pending], [bundle['entities'] for bundle in pending]
+                ))
+        except Exception as e:
+            stats['emails_ai_failed'] += len(pending)
+            self.logger.error(f"AI stage failed for {len(pending)} emails, keeping regex results: {str(e)}")
+            return
+        failed = sum(1 for bundle in pending if bundle['entities'].get('ai_error'))
+        if failed:
+            self.logger.warning(f"AI stage failed for {failed} of {len(pending)} emails, keeping regex results")
+        stats['emails_ai_failed'] += failed
+        stats['emails_ai_completed'] += len(pending) - failed
+    def _close_ai(self):
+        if self._loop is None:
+            return
+        try:
+            self._loop.run_until_complete(self.extractor.ai_extractor.close())
+        except Exception as e:
+            self.logger.warning(f"Failed to close AI extractor session: {str(e)}")
+        finally:
+            self._loop.close()
+            self._loop = None
+    def _collect(self, future, blob: Dict, batch: List[Dict], seen: set, stats: Dict):
+        try:
+            parsed = future.result()
+        except Exception as e:
+            stats['emails_failed'] += 1
+            self.logger.error(f"Failed to ingest blob {blob['name']}: {str(e)}")
+            return
+        message_id = parsed.get('message_id')
+        if not message_id:
+            # Without an id the email could not be persisted or deduplicated; the blob version stands in
+            message_id = parsed['message_id'] = _blob_message_id(self.container, blob)
+            stats['message_ids_derived'] += 1
+            self.logger.warning(f"Blob {blob['name']} has no Message-ID; stored as {message_id}")
+        # Checkpointed together with the next batch, including duplicates, so they are not re-read
+        self._pending_blobs.append({**blob, 'message_id': message_id})
+        duplicate = self.checkpoint_store is not None and self.checkpoint_store.has_message(message_id)
+        if message_id in seen or duplicate:
+            stats['emails_skipped'] += 1
+            return
+        seen.add(message_id)
+        with self.metrics.timer('regex', items=1):
+            batch.append(build_email_bundle(parsed, self.classifier, self.config, self.extractor))
+        if len(batch) >= self.batch_size:
+            self._flush(batch, stats)
+    def run(self) -> Dict:
+        stats = {
+            'emails_listed': 0,
+            'emails_ingested': 0,
+            'emails_unchanged': 0,
+            'emails_skipped': 0,
+            'emails_failed': 0,
+            'message_ids_derived': 0,
+            'emails_ai_completed': 0,
+            'emails_ai_failed': 0,
+            'batches_written': 0
+        }
+        started = time.perf_counter()
+        batch: List[Dict] = []
+        seen: set = set()
+        in_flight = {}
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="email_ingest") as executor:
+                for blob in self.blob_connector.iter_email_blobs(self.container, self.prefix, self.page_size):
+                    stats['emails_listed'] += 1
+                    if self.checkpoint_store and self.checkpoint_store.is_processed(blob):
+                        stats['emails_unchanged'] += 1
+                        continue
+                    in_flight[executor.submit(self._download_and_parse, blob)] = blob
+                    self.metrics.set_gauge('queue_depth', len(in_flight), stage='download')
+                    if len(in_flight) >= self.max_in_flight:
+                        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            self._collect(future, in_flight.pop(future), batch, seen, stats)
+                while in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._collect(future, in_flight.pop(future), batch, seen, stats)
+            self._flush(batch, stats)
+        finally:
+            self._close_ai()
+        elapsed = time.perf_counter() - started
+        if self.checkpoint_store:
+            stats['high_water_mark'] = self.checkpoint_store.high_water_mark
+        stats['elapsed_seconds'] = round(elapsed, 3)
+        stats['emails_per_second'] = round(stats['emails_ingested'] / elapsed, 2) if elapsed > 0 else 0.0
+        if stats['emails_failed'] == 0:
+            stats['status'] = "OK"
+        else:
+            stats['status'] = "PARTIAL" if stats['emails_ingested'] else "FAILED"
+        self.logger.info(
+            f"Ingested {stats['emails_ingested']}/{stats['emails_listed']} emails "
+            f"({stats['emails_unchanged']} unchanged since last checkpoint) "
+            f"at {stats['emails_per_second']} emails/sec"
+        )
+        stats['stages'] = self.metrics.stage_summary()
+        return stats
+
+def run_email_ingest(config_path, sql_writer, logger, blob_connector=None, metrics=None, alert_dispatcher=None):
     logger.info("Running email ingestion pipeline...")
-    # Placeholder: implement blob/email ingestion logic here
-    # Use BlobConnector, EmailParser, SQLWriter
-    # Return summary dict
-    return {"emails_ingested": 0, "status": "OK"}
+    with open(config_path, 'r') as f:
+        config = json.load(f)
+    ai_extractor = None
+    if config.get('ingestion', {}).get('ai_fallback') and settings.ANTHROPIC_API_KEY:
+        ai_extractor = AIEntityExtractor(settings.ANTHROPIC_API_KEY, config, logger)
+    return EmailIngestPipeline(
+        config, sql_writer, logger, blob_connector, ai_extractor=ai_extractor, metrics=metrics,
+        alert_dispatcher=alert_dispatcher
+    ).run()
@@ -1,19 +1,66 @@
+import json
 from 02_pipelines.pipeline_email_ingest import run_email_ingest
 from 02_pipelines.pipeline_doc_analysis import run_doc_analysis
 from 12_integration.sql_writer import SQLWriter
 from 00_configs.env_settings import settings
 from 04_logs.log_utils import LogUtils
+from 04_logs.metrics import MetricsRegistry
+from 10_monitoring.alert_dispatcher import AlertDispatcher
+from 10_monitoring.teams_webhook_notifier import TeamsNotifier
 
 class MasterOrchestrator:
     """Orchestrates the full claims email pipeline"""
     def __init__(self, config_path: str):
-        self.logger = LogUtils.setup_logger("master_orchestrator", log_dir="../04_logs")
-        self.sql_writer = SQLWriter(settings.db_connection_string, self.logger)
+        with open(config_path, 'r') as f:
+            config = json.load(f)
+        self.logger = LogUtils.setup_logger(
+            "master_orchestrator", settings.LOG_LEVEL, log_dir="../04_logs", **config.get('logging', {})
+        )
+        self.sql_writer = SQLWriter(
+            settings.db_connection_string, self.logger,
+            pool_options=config.get('database', {}).get('pool')
+        )
         self.config_path = config_path
+        self.metrics_config = config.get('metrics', {})
+        self.config = config
+        self.notifier = TeamsNotifier(settings.TEAMS_WEBHOOK_URL, self.logger)
     def run(self):
         self.logger.info("Starting master pipeline orchestration")
-        ingest_results = run_email_ingest(self.config_path, self.sql_writer, self.logger)
-        doc_results = run_doc_analysis(self.config_path, self.sql_writer, self.logger)
+        # One registry per run: every stage of every pipeline reports into it
+        metrics = MetricsRegistry(self.metrics_config.get('namespace', 'claims_pipeline'))
+        LogUtils.log_pipeline_start(self.logger, "master_pipeline", {"config_path": self.config_path})
+        dispatcher = None
+        if self.config.get('alerts', {}).get('enabled') and settings.TEAMS_WEBHOOK_URL:
+            dispatcher = AlertDispatcher(self.notifier, self.config, metrics, self.logger)
+        try:
+            with metrics.timer('email_ingest'):
+                ingest_results = run_email_ingest(
+                    self.config_path, self.sql_writer, self.logger, metrics=metrics, alert_dispatcher=dispatcher
+                )
+        finally:
+            if dispatcher is not None:
+                close_timeout = self.config['alerts'].get('close_timeout_seconds', 60)
+                if not dispatcher.close(close_timeout):
+                    self.logger.error(
+                        f"Alert dispatcher still busy after {close_timeout}s; queued alerts may not be delivered: "
+                        f"{json.dumps(dispatcher.stats)}"
+                    )
+        with metrics.timer('doc_analysis'):
+            doc_results = run_doc_analysis(self.config_path, self.sql_writer, self.logger)
         # Add additional steps as needed
-        status = "SUCCESS" if ingest_results and doc_results else "FAILED"
-        return {"status": status, "ingest": ingest_results, "doc_analysis": doc_results}
+        failed = any(not results or results.get("status") == "FAILED" for results in (ingest_results, doc_results))
+        status = "FAILED" if failed else "SUCCESS"
+        results = {"status": status, "ingest": ingest_results, "doc_analysis": doc_results}
+        summary = {
+            "status": status,
+            "emails_ingested": ingest_results.get("emails_ingested", 0) if ingest_results else 0,
+            "docs_analyzed": doc_results.get("docs_analyzed", 0) if doc_results else 0,
+            "elapsed_seconds": round(metrics.elapsed_seconds(), 3)
+        }
+        LogUtils.log_pipeline_end(self.logger, "master_pipeline", summary, metrics)
+        if self.metrics_config.get('prometheus_path'):
+            metrics.write_prometheus(self.metrics_config['prometheus_path'])
+        if self.metrics_config.get('notify_on_completion', True):
+            self.notifier.send_pipeline_completion("Claims Master Pipeline", summary, metrics)
+        results["metrics"] = metrics.snapshot()
+        return results
@@ -0,0 +1,118 @@
+import json
+from typing import Dict, Iterator, List, Optional
+import pandas as pd
+from pyspark.sql import DataFrame, SparkSession
+from pyspark.sql import functions as F
+from pyspark.sql.functions import pandas_udf
+from pyspark.sql.types import ArrayType, BooleanType, DoubleType, StringType, StructField, StructType
+from 07_models.entity_classifier import EntityClassifier
+from 07_models.hybrid_extractor import HybridEntityExtractor
+
+TRIAGE_FIELDS = ['priority_level', 'priority_confidence', 'claim_type', 'claim_type_confidence', 'high_risk']
+# One classifier per executor Python worker and broadcast config, reused across batches and tasks
+_EXECUTOR_CLASSIFIERS: Dict[int, EntityClassifier] = {}
+
+def triage_schema(config: Dict) -> StructType:
+    """Struct returned by the triage UDF: one string array per entity plus the triage fields"""
+    entities = config.get('entity_extraction', {}).get('entities', {})
+    fields = [StructField(name, ArrayType(StringType())) for name in entities]
+    fields += [
+        StructField('priority_level', StringType()),
+        StructField('priority_confidence', DoubleType()),
+        StructField('claim_type', StringType()),
+        StructField('claim_type_confidence', DoubleType()),
+        StructField('high_risk', BooleanType())
+    ]
+    return StructType(fields)
+
+def _executor_classifier(config_broadcast) -> EntityClassifier:
+    classifier = _EXECUTOR_CLASSIFIERS.get(config_broadcast.id)
+    if classifier is None:
+        classifier = EntityClassifier(config_broadcast.value)
+        _EXECUTOR_CLASSIFIERS[config_broadcast.id] = classifier
+    return classifier
+
+def build_triage_udf(spark: SparkSession, config: Dict, normalize: bool = True):
+    """Vectorized Arrow UDF mapping a body column to the triage struct
+
+    The config is broadcast once; each executor worker compiles its
+    EntityClassifier on first use and runs classify_batch on every Arrow
+    batch. With normalize, each body is split into its new-content view and
+    quoted history and triaged like build_email_bundle does in the ingest
+    pipeline (see HybridEntityExtractor.triage_bodies).
+    """
+    config_broadcast = spark.sparkContext.broadcast(config)
+    schema = triage_schema(config)
+    columns = [field.name for field in schema.fields]
+    @pandas_udf(schema)
+    def triage(batches: Iterator[pd.Series]) -> Iterator[pd.DataFrame]:
+        classifier = _executor_classifier(config_broadcast)
+        extractor = HybridEntityExtractor(config_broadcast.value, classifier)
+        for bodies in batches:
+            bodies = bodies.fillna('').astype(str)
+            if normalize:
+                result = extractor.triage_bodies(bodies)
+            else:
+                result = classifier.classify_batch(pd.DataFrame({'body_text': bodies}))
+            yield result[columns].reset_index(drop=True)
+    return triage
+
+def triage_dataframe(spark: SparkSession, emails: DataFrame, config: Dict,
+                     text_column: str = 'body_text', normalize: bool = True) -> DataFrame:
+    """Append the triage columns to a Spark DataFrame of emails
+
+    Input columns named like a triage column (e.g. an upstream claim_number)
+    are replaced by the triage output so every column name stays unique.
+    """
+    triage = build_triage_udf(spark, config, normalize)
+    triage_columns = set(triage_schema(config).fieldNames())
+    kept = [emails[name] for name in emails.columns if name not in triage_columns]
+    return (
+        emails
+        .withColumn('_triage', triage(F.col(text_column)))
+        .select(*kept, '_triage.*')
+    )
+
+def run_spark_triage(spark: SparkSession, config: Dict, input_path: Optional[str] = None,
+                     output_path: Optional[str] = None, logger=None) -> Dict:
+    """Re-triage an email dataset end to end, writing partitioned Parquet
+
+    Settings come from config['spark_triage']; explicit paths override them.
+    """
+    settings = config.get('spark_triage', {})
+    input_path = input_path or settings['input_path']
+    output_path = output_path or settings['output_path']
+    partition_by: List[str] = settings.get('partition_by', [])
+    spark.conf.set("spark.sql.execution.arrow.maxRecordsPerBatch", str(settings.get('arrow_batch_size', 10000)))
+    emails = spark.read.format(settings.get('input_format', 'json')).load(input_path)
+    if settings.get('num_partitions'):
+        emails = emails.repartition(settings['num_partitions'])
+    triaged = triage_dataframe(spark, emails, config, settings.get('text_column', 'body_text'),
+                               settings.get('normalize', True))
+    # Cached so the write and the summary counts share one triage pass
+    triaged = triaged.cache()
+    try:
+        writer = triaged.write.mode(settings.get('write_mode', 'overwrite'))
+        if partition_by:
+            writer = writer.partitionBy(*partition_by)
+        writer.parquet(output_path)
+        counts = {row['priority_level']: row['count'] for row in triaged.groupBy('priority_level').count().collect()}
+        high_risk = triaged.filter(F.col('high_risk')).count()
+    finally:
+        triaged.unpersist()
+    summary = {
+        'emails_triaged': sum(counts.values()),
+        'high_risk': high_risk,
+        'by_priority': counts,
+        'output_path': output_path,
+        'status': 'OK'
+    }
+    if logger:
+        logger.info(f"Spark triage complete: {summary['emails_triaged']} emails written to {output_path}")
+    return summary
+
+def run_spark_triage_from_config(config_path: str, spark: Optional[SparkSession] = None, logger=None) -> Dict:
+    with open(config_path, 'r') as f:
+        config = json.load(f)
+    spark = spark or SparkSession.builder.appName("claims_spark_triage").getOrCreate()
+    return run_spark_triage(spark, config, logger=logger)
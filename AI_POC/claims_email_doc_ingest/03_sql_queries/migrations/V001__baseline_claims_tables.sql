@@ -0,0 +1,78 @@
+-- Core claims tables as written by SQLWriter; existing databases keep their tables
+IF OBJECT_ID('tbl_claims_emails') IS NULL
+CREATE TABLE tbl_claims_emails (
+    id INT IDENTITY(1,1) PRIMARY KEY,
+    message_id NVARCHAR(500),
+    subject NVARCHAR(1000),
+    sender NVARCHAR(500),
+    recipients NVARCHAR(MAX),  -- JSON array
+    email_date NVARCHAR(100),
+    body_text NVARCHAR(MAX),
+    body_html NVARCHAR(MAX),
+    has_attachments BIT DEFAULT 0,
+    attachment_count INT DEFAULT 0,
+    blob_path NVARCHAR(1024),
+    created_at DATETIME DEFAULT GETDATE()
+);
+
+IF OBJECT_ID('tbl_extracted_entities') IS NULL
+CREATE TABLE tbl_extracted_entities (
+    id INT IDENTITY(1,1) PRIMARY KEY,
+    email_id INT NOT NULL,
+    claim_number NVARCHAR(100),
+    policy_number NVARCHAR(100),
+    insured_name NVARCHAR(255),
+    date_of_loss NVARCHAR(50),
+    claim_amount NVARCHAR(50),
+    phone_numbers NVARCHAR(MAX),  -- JSON array
+    email_addresses NVARCHAR(MAX),  -- JSON array
+    incident_description NVARCHAR(MAX),
+    confidence_score DECIMAL(5,4),
+    extraction_method NVARCHAR(50),
+    created_at DATETIME DEFAULT GETDATE(),
+    FOREIGN KEY (email_id) REFERENCES tbl_claims_emails(id)
+);
+
+IF OBJECT_ID('tbl_attachments') IS NULL
+CREATE TABLE tbl_attachments (
+    id INT IDENTITY(1,1) PRIMARY KEY,
+    email_id INT NOT NULL,
+    filename NVARCHAR(500),
+    file_type NVARCHAR(50),
+    file_category NVARCHAR(50),
+    file_size BIGINT,
+    blob_path NVARCHAR(1024),
+    is_invoice BIT DEFAULT 0,
+    is_medical_record BIT DEFAULT 0,
+    document_type NVARCHAR(100),
+    classification_confidence DECIMAL(5,4),
+    created_at DATETIME DEFAULT GETDATE(),
+    FOREIGN KEY (email_id) REFERENCES tbl_claims_emails(id)
+);
+
+IF OBJECT_ID('tbl_triage_results') IS NULL
+CREATE TABLE tbl_triage_results (
+    id INT IDENTITY(1,1) PRIMARY KEY,
+    email_id INT NOT NULL,
+    priority_level NVARCHAR(20),
+    claim_type NVARCHAR(50),
+    risk_level NVARCHAR(20),
+    requires_escalation BIT NOT NULL DEFAULT 0,
+    assigned_to NVARCHAR(255),
+    triage_notes NVARCHAR(MAX),
+    confidence_score DECIMAL(5,4),
+    reviewed_at DATETIME NULL,
+    created_at DATETIME DEFAULT GETDATE(),
+    FOREIGN KEY (email_id) REFERENCES tbl_claims_emails(id)
+);
+
+IF OBJECT_ID('tbl_processing_log') IS NULL
+CREATE TABLE tbl_processing_log (
+    id INT IDENTITY(1,1) PRIMARY KEY,
+    pipeline_name NVARCHAR(255),
+    step_name NVARCHAR(255),
+    status NVARCHAR(50),
+    error_message NVARCHAR(4000),
+    records_processed INT,
+    created_at DATETIME DEFAULT GETDATE()
+);
@@ -1,3 +1,4 @@
+IF OBJECT_ID('tbl_invoices') IS NULL
 CREATE TABLE tbl_invoices (
     id INT IDENTITY(1,1) PRIMARY KEY,
     attachment_id INT,
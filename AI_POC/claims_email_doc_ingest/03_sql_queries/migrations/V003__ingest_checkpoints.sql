@@ -0,0 +1,10 @@
+IF OBJECT_ID('tbl_ingest_checkpoints') IS NULL
+CREATE TABLE tbl_ingest_checkpoints (
+    blob_name NVARCHAR(1024) NOT NULL PRIMARY KEY,
+    etag NVARCHAR(100),
+    last_modified DATETIMEOFFSET,
+    message_id NVARCHAR(500),
+    committed_at DATETIME DEFAULT GETDATE(),
+    INDEX idx_checkpoint_message_id (message_id),
+    INDEX idx_checkpoint_last_modified (last_modified)
+);
@@ -0,0 +1,60 @@
+-- Monthly partitions on created_at for the two append-only history tables.
+-- Boundaries run from the oldest row's month to three months ahead;
+-- SchemaMigrator.extend_monthly_partitions adds future months after that.
+DECLARE @month DATE = (
+    SELECT DATEFROMPARTS(YEAR(MIN(oldest)), MONTH(MIN(oldest)), 1)
+    FROM (
+        SELECT MIN(created_at) AS oldest FROM tbl_claims_emails
+        UNION ALL
+        SELECT MIN(created_at) FROM tbl_processing_log
+    ) history
+);
+DECLARE @last DATE = DATEADD(month, 3, DATEFROMPARTS(YEAR(GETDATE()), MONTH(GETDATE()), 1));
+DECLARE @boundaries NVARCHAR(MAX) = N'';
+SET @month = ISNULL(@month, DATEFROMPARTS(YEAR(GETDATE()), MONTH(GETDATE()), 1));
+WHILE @month <= @last
+BEGIN
+    SET @boundaries += CASE WHEN @boundaries = N'' THEN N'' ELSE N', ' END + N'''' + CONVERT(NCHAR(10), @month, 23) + N'''';
+    SET @month = DATEADD(month, 1, @month);
+END
+EXEC (N'CREATE PARTITION FUNCTION pf_monthly_created_at (DATETIME) AS RANGE RIGHT FOR VALUES (' + @boundaries + N')');
+GO
+
+CREATE PARTITION SCHEME ps_monthly_created_at AS PARTITION pf_monthly_created_at ALL TO ([PRIMARY]);
+GO
+
+-- Move each table's clustered index onto the scheme. The id primary key becomes
+-- nonclustered (and non-aligned) so existing foreign keys keep referencing it;
+-- those foreign keys are dropped and recreated around the swap.
+DECLARE @tables TABLE (name SYSNAME);
+DECLARE @fks TABLE (name SYSNAME, parent_table SYSNAME, parent_column SYSNAME, referenced_column SYSNAME);
+DECLARE @table SYSNAME, @pk SYSNAME, @sql NVARCHAR(MAX);
+INSERT INTO @tables VALUES (N'tbl_claims_emails'), (N'tbl_processing_log');
+WHILE EXISTS (SELECT 1 FROM @tables)
+BEGIN
+    SELECT TOP (1) @table = name FROM @tables;
+    SET @pk = NULL;
+    SET @sql = N'';
+    DELETE FROM @fks;
+    INSERT INTO @fks
+    SELECT fk.name, OBJECT_NAME(fk.parent_object_id), pc.name, rc.name
+    FROM sys.foreign_keys fk
+    INNER JOIN sys.foreign_key_columns fkc ON fkc.constraint_object_id = fk.object_id
+    INNER JOIN sys.columns pc ON pc.object_id = fkc.parent_object_id AND pc.column_id = fkc.parent_column_id
+    INNER JOIN sys.columns rc ON rc.object_id = fkc.referenced_object_id AND rc.column_id = fkc.referenced_column_id
+    WHERE fk.referenced_object_id = OBJECT_ID(@table);
+    SELECT @sql += N'ALTER TABLE ' + QUOTENAME(parent_table) + N' DROP CONSTRAINT ' + QUOTENAME(name) + N'; ' FROM @fks;
+    SELECT @pk = name FROM sys.key_constraints WHERE parent_object_id = OBJECT_ID(@table) AND type = 'PK';
+    IF @pk IS NOT NULL
+        SET @sql += N'ALTER TABLE ' + QUOTENAME(@table) + N' DROP CONSTRAINT ' + QUOTENAME(@pk) + N'; ';
+    SET @sql += N'ALTER TABLE ' + QUOTENAME(@table) + N' ADD CONSTRAINT ' + QUOTENAME(N'pk_' + @table)
+        + N' PRIMARY KEY NONCLUSTERED (id) ON [PRIMARY]; '
+        + N'CREATE CLUSTERED INDEX ' + QUOTENAME(N'cix_' + @table + N'_created_at') + N' ON ' + QUOTENAME(@table)
+        + N' (created_at, id) ON ps_monthly_created_at (created_at); ';
+    SELECT @sql += N'ALTER TABLE ' + QUOTENAME(parent_table) + N' ADD CONSTRAINT ' + QUOTENAME(name)
+        + N' FOREIGN KEY (' + QUOTENAME(parent_column) + N') REFERENCES ' + QUOTENAME(@table)
+        + N' (' + QUOTENAME(referenced_column) + N'); '
+    FROM @fks;
+    EXEC sp_executesql @sql;
+    DELETE FROM @tables WHERE name = @table;
+END
@@ -0,0 +1,27 @@
+-- Indexes matched to the hot query shapes; 14_benchmarks/query_plan_check.py mirrors them on SQLite
+
+-- Child-table joins on email_id (query_highrisk_emails.sql, health monitor, rollup rebuild)
+CREATE INDEX idx_entities_email_id
+    ON tbl_extracted_entities (email_id)
+    INCLUDE (claim_number, policy_number, insured_name, claim_amount);
+
+CREATE INDEX idx_triage_email_id ON tbl_triage_results (email_id);
+
+CREATE INDEX idx_attachments_email_id ON tbl_attachments (email_id);
+
+-- Open escalations only: requires_escalation = 1 AND reviewed_at IS NULL
+CREATE INDEX idx_triage_escalation_unreviewed
+    ON tbl_triage_results (created_at)
+    INCLUDE (email_id, priority_level, claim_type, risk_level, assigned_to, triage_notes)
+    WHERE requires_escalation = 1 AND reviewed_at IS NULL;
+
+-- Date-range reads of triage history (SQLWriter.rebuild_triage_rollup)
+CREATE INDEX idx_triage_created_at
+    ON tbl_triage_results (created_at)
+    INCLUDE (email_id, claim_type, risk_level, requires_escalation);
+
+-- Failed steps only; aligned with the monthly partitions of tbl_processing_log
+CREATE INDEX idx_processing_log_failed
+    ON tbl_processing_log (created_at)
+    INCLUDE (pipeline_name, step_name, error_message)
+    WHERE status = 'failed';
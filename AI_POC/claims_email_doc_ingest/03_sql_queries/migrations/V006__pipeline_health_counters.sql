@@ -0,0 +1,41 @@
+-- Health counters maintained by SQLWriter as it writes, read by PipelineHealthMonitor
+IF OBJECT_ID('tbl_pipeline_stage_watermarks') IS NULL
+CREATE TABLE tbl_pipeline_stage_watermarks (
+    stage NVARCHAR(50) NOT NULL PRIMARY KEY,
+    processed_count BIGINT NOT NULL DEFAULT 0,
+    last_email_id BIGINT NOT NULL DEFAULT 0,
+    updated_at DATETIME DEFAULT GETDATE()
+);
+
+-- Emails waiting on a stage, bucketed by the hour they arrived; drained buckets are deleted
+IF OBJECT_ID('tbl_pipeline_pending_counters') IS NULL
+CREATE TABLE tbl_pipeline_pending_counters (
+    stage NVARCHAR(50) NOT NULL,
+    bucket_hour DATETIME NOT NULL,
+    pending_count INT NOT NULL DEFAULT 0,
+    updated_at DATETIME DEFAULT GETDATE(),
+    PRIMARY KEY (stage, bucket_hour)
+);
+
+-- Seed from existing history
+DELETE FROM tbl_pipeline_stage_watermarks;
+INSERT INTO tbl_pipeline_stage_watermarks (stage, processed_count, last_email_id, updated_at)
+SELECT 'emails', COUNT_BIG(*), ISNULL(MAX(id), 0), GETDATE() FROM tbl_claims_emails
+UNION ALL
+SELECT 'entities', COUNT_BIG(*), ISNULL(MAX(email_id), 0), GETDATE() FROM tbl_extracted_entities
+UNION ALL
+SELECT 'triage', COUNT_BIG(*), ISNULL(MAX(email_id), 0), GETDATE() FROM tbl_triage_results;
+
+DELETE FROM tbl_pipeline_pending_counters;
+INSERT INTO tbl_pipeline_pending_counters (stage, bucket_hour, pending_count, updated_at)
+SELECT pending.stage, pending.bucket_hour, COUNT(*), GETDATE()
+FROM (
+    SELECT
+        CASE WHEN NOT EXISTS (SELECT 1 FROM tbl_extracted_entities ent WHERE ent.email_id = e.id)
+             THEN 'entities' ELSE 'triage' END AS stage,
+        DATEADD(hour, DATEDIFF(hour, 0, e.created_at), 0) AS bucket_hour
+    FROM tbl_claims_emails e
+    WHERE NOT EXISTS (SELECT 1 FROM tbl_extracted_entities ent WHERE ent.email_id = e.id)
+        OR NOT EXISTS (SELECT 1 FROM tbl_triage_results t WHERE t.email_id = e.id)
+) pending
+GROUP BY pending.stage, pending.bucket_hour;
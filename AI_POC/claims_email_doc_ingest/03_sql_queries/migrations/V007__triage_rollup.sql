@@ -0,0 +1,52 @@
+-- Numeric claim amount next to the extracted string, written by SQLWriter
+IF COL_LENGTH('tbl_extracted_entities', 'claim_amount_value') IS NULL
+ALTER TABLE tbl_extracted_entities ADD claim_amount_value DECIMAL(18, 2) NULL;
+GO
+
+UPDATE tbl_extracted_entities
+SET claim_amount_value = TRY_CAST(REPLACE(REPLACE(REPLACE(claim_amount, '$', ''), ',', ''), ' ', '') AS DECIMAL(18, 2))
+WHERE claim_amount IS NOT NULL AND claim_amount_value IS NULL;
+
+-- Cover the amount in the rollup rebuild's per-email lookup
+CREATE INDEX idx_entities_email_id
+    ON tbl_extracted_entities (email_id)
+    INCLUDE (claim_number, policy_number, insured_name, claim_amount, claim_amount_value)
+    WITH (DROP_EXISTING = ON);
+GO
+
+-- Daily triage rollup maintained by SQLWriter at write time; dashboards read this table
+IF OBJECT_ID('tbl_triage_daily_rollup') IS NULL
+CREATE TABLE tbl_triage_daily_rollup (
+    rollup_date DATE NOT NULL,
+    claim_type NVARCHAR(50) NOT NULL,
+    risk_level NVARCHAR(50) NOT NULL,
+    requires_escalation BIT NOT NULL,
+    email_count BIGINT NOT NULL DEFAULT 0,
+    amount_count BIGINT NOT NULL DEFAULT 0,
+    amount_sum DECIMAL(18, 2) NOT NULL DEFAULT 0,
+    updated_at DATETIME DEFAULT GETDATE(),
+    PRIMARY KEY (rollup_date, claim_type, risk_level, requires_escalation)
+);
+GO
+
+-- Seed from existing history; later ranges are rebuilt with SQLWriter.rebuild_triage_rollup
+IF NOT EXISTS (SELECT 1 FROM tbl_triage_daily_rollup)
+INSERT INTO tbl_triage_daily_rollup (
+    rollup_date, claim_type, risk_level, requires_escalation,
+    email_count, amount_count, amount_sum, updated_at
+)
+SELECT
+    CAST(t.created_at AS DATE),
+    ISNULL(t.claim_type, 'unknown'),
+    ISNULL(t.risk_level, 'unknown'),
+    t.requires_escalation,
+    COUNT(*),
+    COUNT(ent.claim_amount_value),
+    ISNULL(SUM(ent.claim_amount_value), 0),
+    GETDATE()
+FROM tbl_triage_results t
+OUTER APPLY (
+    SELECT TOP (1) claim_amount_value FROM tbl_extracted_entities WHERE email_id = t.email_id
+) ent
+GROUP BY CAST(t.created_at AS DATE), ISNULL(t.claim_type, 'unknown'),
+    ISNULL(t.risk_level, 'unknown'), t.requires_escalation;
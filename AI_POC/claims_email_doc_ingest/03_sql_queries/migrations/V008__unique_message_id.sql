@@ -0,0 +1,18 @@
+-- One row per message_id. SQLWriter looks up already stored message_ids before
+-- inserting, so a re-sent batch inserts nothing twice; this index catches
+-- concurrent writers. Legacy rows without a message_id are left out of the
+-- index (IGNORE_DUP_KEY is not allowed on a filtered index). Unique on
+-- message_id alone, so the index cannot be partition-aligned and lives on PRIMARY.
+IF EXISTS (
+    SELECT message_id FROM tbl_claims_emails
+    WHERE message_id IS NOT NULL
+    GROUP BY message_id HAVING COUNT(*) > 1
+)
+BEGIN
+    THROW 50001, 'tbl_claims_emails has duplicate message_id values; resolve them before applying V008', 1;
+END
+
+CREATE UNIQUE NONCLUSTERED INDEX ux_claims_emails_message_id
+    ON tbl_claims_emails (message_id)
+    WHERE message_id IS NOT NULL
+    ON [PRIMARY];
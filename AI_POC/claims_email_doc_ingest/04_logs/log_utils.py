@@ -1,10 +1,21 @@
+import copy
 import logging
+import logging.handlers
 import sys
+import time
+import queue
+import atexit
+import threading
 from pathlib import Path
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timezone
+from typing import Dict, Optional
 import json
 
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+# Background listeners and their queue handlers by logger name, stopped (and flushed) on re-setup and at exit
+_LISTENERS: Dict[str, tuple] = {}
+
 class CustomFormatter(logging.Formatter):
     """Custom formatter with colors for console output"""
     
@@ -23,10 +34,131 @@ class CustomFormatter(logging.Formatter):
         logging.CRITICAL: bold_red + "%(asctime)s - %(name)s - %(levelname)s - %(message)s" + reset
     }
     
+    def __init__(self):
+        super().__init__()
+        # One formatter per level, built once instead of per record
+        self._formatters = {level: logging.Formatter(fmt, datefmt=DATE_FORMAT) for level, fmt in self.FORMATS.items()}
+        self._default = logging.Formatter(LOG_FORMAT, datefmt=DATE_FORMAT)
+    
+    def format(self, record):
+        return self._formatters.get(record.levelno, self._default).format(record)
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record for log shippers"""
+    
     def format(self, record):
-        log_fmt = self.FORMATS.get(record.levelno)
-        formatter = logging.Formatter(log_fmt, datefmt='%Y-%m-%d %H:%M:%S')
-        return formatter.format(record)
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "line": record.lineno,
+            "thread": record.threadName
+        }
+        if getattr(record, "sampled_out", 0):
+            entry["sampled_out"] = record.sampled_out
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class InfoSamplingFilter(logging.Filter):
+    """Rate-limit INFO-and-below records per call site; warnings and errors always pass
+
+    Each call site (logger, file, line) may emit burst records per
+    window_seconds; beyond that only every sample_rate-th record passes,
+    carrying the number suppressed since the last one in record.sampled_out.
+    """
+    
+    def __init__(self, burst: int = 100, sample_rate: int = 100, window_seconds: float = 60.0):
+        super().__init__()
+        self.burst = burst
+        self.sample_rate = max(1, sample_rate)
+        self.window_seconds = window_seconds
+        self._sites: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+    
+    def filter(self, record):
+        if record.levelno > logging.INFO:
+            return True
+        key = (record.name, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None or now - site[0] >= self.window_seconds:
+                # [window start, records seen in window, suppressed since last emitted]
+                site = self._sites[key] = [now, 0, 0]
+            site[1] += 1
+            if site[1] <= self.burst or (site[1] - self.burst) % self.sample_rate == 0:
+                record.sampled_out = site[2]
+                site[2] = 0
+                return True
+            site[2] += 1
+            return False
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks the caller on INFO and below
+
+    When the queue is full, records below WARNING are dropped and counted in
+    dropped (and as log_records_dropped in metrics, when given). Warnings
+    and errors are never dropped: they are written synchronously through
+    fallback_handlers instead. Tracebacks are queued as exc_text, so the
+    listener's formatters still see them apart from the message.
+    """
+    def __init__(self, log_queue, fallback_handlers=(), metrics=None):
+        super().__init__(log_queue)
+        self.fallback_handlers = list(fallback_handlers)
+        self.metrics = metrics
+        self.dropped = 0
+    def prepare(self, record):
+        # The base prepare() folds the traceback into msg and clears exc_info
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno >= logging.WARNING:
+                for handler in self.fallback_handlers:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+                return
+            # Called under the handler lock, so the count needs no extra locking
+            self.dropped += 1
+            if self.metrics is not None:
+                self.metrics.increment('log_records_dropped', logger=record.name)
+
+def _stop_listener(name: str):
+    entry = _LISTENERS.pop(name, None)
+    if entry is None:
+        return
+    listener, queue_handler = entry
+    listener.stop()
+    if queue_handler.dropped:
+        # Written straight to the handlers: the queue is no longer drained
+        record = logging.LogRecord(
+            name, logging.WARNING, __file__, 0,
+            "%d log records below WARNING were dropped because the log queue was full",
+            (queue_handler.dropped,), None
+        )
+        for handler in listener.handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+        queue_handler.dropped = 0
+
+def _stop_all_listeners():
+    for name in list(_LISTENERS):
+        _stop_listener(name)
+
+atexit.register(_stop_all_listeners)
 
 class LogUtils:
     """Centralized logging utilities"""
@@ -35,39 +167,86 @@ class LogUtils:
     def setup_logger(
         name: str,
         log_level: str = "INFO",
-        log_dir: Optional[str] = None
+        log_dir: Optional[str] = None,
+        async_mode: bool = True,
+        json_lines: bool = False,
+        rotation: str = "size",
+        max_bytes: int = 50 * 1024 * 1024,
+        backup_count: int = 10,
+        sample_info: bool = True,
+        info_burst: int = 100,
+        info_sample_rate: int = 100,
+        queue_size: int = 10000,
+        metrics=None
     ) -> logging.Logger:
-        """Setup logger with file and console handlers"""
+        """Setup logger with console and rotating file handlers
+
+        In async_mode records are put on a bounded queue and written by a
+        background QueueListener thread; when the queue is full INFO and
+        below are dropped rather than blocking the caller, while warnings and
+        errors are written synchronously. The dropped count is logged at
+        shutdown and, with a MetricsRegistry, counted as log_records_dropped.
+        Files rotate by size (rotation="size") or at midnight
+        (rotation="time"). json_lines writes the file as JSON lines, and
+        sample_info rate-limits chatty INFO call sites with InfoSamplingFilter.
+        """
         
         logger = logging.getLogger(name)
         logger.setLevel(getattr(logging, log_level.upper()))
         
-        # Remove existing handlers
+        # Remove existing handlers, flushing any previous background writer
+        _stop_listener(name)
         logger.handlers.clear()
         
+        handlers = []
+        
         # Console handler
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(logging.DEBUG)
         console_handler.setFormatter(CustomFormatter())
-        logger.addHandler(console_handler)
+        handlers.append(console_handler)
         
         # File handler
         if log_dir:
             log_path = Path(log_dir)
             log_path.mkdir(parents=True, exist_ok=True)
             
-            log_file = log_path / f"{name}_{datetime.now().strftime('%Y%m%d')}.log"
-            file_handler = logging.FileHandler(log_file)
+            log_file = log_path / f"{name}.{'jsonl' if json_lines else 'log'}"
+            if rotation == "time":
+                file_handler = logging.handlers.TimedRotatingFileHandler(
+                    log_file, when="midnight", backupCount=backup_count, encoding="utf-8"
+                )
+            else:
+                file_handler = logging.handlers.RotatingFileHandler(
+                    log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+                )
             file_handler.setLevel(logging.DEBUG)
-            file_formatter = logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-                datefmt='%Y-%m-%d %H:%M:%S'
-            )
-            file_handler.setFormatter(file_formatter)
-            logger.addHandler(file_handler)
+            file_handler.setFormatter(JsonLinesFormatter() if json_lines else logging.Formatter(LOG_FORMAT, datefmt=DATE_FORMAT))
+            handlers.append(file_handler)
+        
+        if async_mode:
+            queue_handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size), handlers, metrics)
+            listener = logging.handlers.QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+            listener.start()
+            _LISTENERS[name] = (listener, queue_handler)
+            handlers = [queue_handler]
+        
+        for handler in handlers:
+            if sample_info:
+                # Filtered before formatting or enqueueing, so sampled-out records cost almost nothing
+                handler.addFilter(InfoSamplingFilter(info_burst, info_sample_rate))
+            logger.addHandler(handler)
         
         return logger
     
+    @staticmethod
+    def shutdown(name: Optional[str] = None):
+        """Stop background listeners (all, or one logger's) after writing out everything queued"""
+        if name is None:
+            _stop_all_listeners()
+        else:
+            _stop_listener(name)
+    
     @staticmethod
     def log_pipeline_start(logger: logging.Logger, pipeline_name: str, params: dict):
         """Log pipeline start with parameters"""
@@ -77,11 +256,14 @@ class LogUtils:
         logger.info(f"{'='*80}")
     
     @staticmethod
-    def log_pipeline_end(logger: logging.Logger, pipeline_name: str, stats: dict):
-        """Log pipeline end with statistics"""
+    def log_pipeline_end(logger: logging.Logger, pipeline_name: str, stats: dict, metrics=None):
+        """Log pipeline end with statistics and, when given, a MetricsRegistry snapshot as one JSON record"""
+        record = {"event": "pipeline_end", "pipeline": pipeline_name, "stats": stats}
+        if metrics is not None:
+            record["metrics"] = metrics.snapshot()
         logger.info(f"{'='*80}")
         logger.info(f"Pipeline completed: {pipeline_name}")
-        logger.info(f"Statistics: {json.dumps(stats, indent=2)}")
+        logger.info(json.dumps(record, default=str))
         logger.info(f"{'='*80}")
     
     @staticmethod
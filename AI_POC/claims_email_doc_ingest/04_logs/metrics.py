@@ -0,0 +1,169 @@
+import re
+import time
+import random
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+QUANTILES = (0.5, 0.95, 0.99)
+_INVALID_NAME_CHARS = re.compile(r'[^a-zA-Z0-9_]')
+
+def _label_key(labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: Optional[Dict[str, str]] = None) -> str:
+    pairs = list(labels) + sorted((extra or {}).items())
+    if not pairs:
+        return ""
+    escaped = [(key, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for key, value in pairs]
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+class Histogram:
+    """Count/sum/min/max plus a bounded uniform reservoir for quantiles"""
+    def __init__(self, max_samples: int = 4096):
+        self.max_samples = max_samples
+        self.samples: List[float] = []
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if len(self.samples) < self.max_samples:
+            self.samples.append(value)
+        else:
+            # Reservoir sampling keeps every observation equally likely to be retained
+            slot = random.randrange(self.count)
+            if slot < self.max_samples:
+                self.samples[slot] = value
+    def quantile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        position = q * (len(ordered) - 1)
+        lower = int(position)
+        upper = min(lower + 1, len(ordered) - 1)
+        return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+class MetricsRegistry:
+    """Thread-safe counters, gauges and latency histograms shared by the pipeline stages
+
+    Stages report durations with timer()/observe() and processed items with
+    add_items(); stage_summary() turns that into p50/p95/p99 latency and
+    items/sec over the registry's lifetime. snapshot() is JSON-ready and
+    to_prometheus() renders the text exposition format.
+    """
+    def __init__(self, namespace: str = "claims_pipeline", max_samples: int = 4096):
+        self.namespace = _INVALID_NAME_CHARS.sub('_', namespace)
+        self.max_samples = max_samples
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[tuple, float]] = {}
+        self._gauges: Dict[str, Dict[tuple, float]] = {}
+        self._gauge_peaks: Dict[str, Dict[tuple, float]] = {}
+        self._histograms: Dict[str, Dict[tuple, Histogram]] = {}
+    def increment(self, name: str, value: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+    def set_gauge(self, name: str, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+            peaks = self._gauge_peaks.setdefault(name, {})
+            peaks[key] = max(peaks.get(key, value), value)
+    def observe(self, name: str, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram(self.max_samples)
+            series[key].observe(value)
+    @contextmanager
+    def timer(self, stage: str, items: int = 0):
+        """Time a block as one observation of stage_duration_seconds{stage=...}"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("stage_duration_seconds", time.perf_counter() - started, stage=stage)
+            if items:
+                self.add_items(stage, items)
+    def add_items(self, stage: str, count: int = 1):
+        self.increment("stage_items", count, stage=stage)
+    def elapsed_seconds(self) -> float:
+        return time.perf_counter() - self.started
+    def stage_summary(self) -> Dict[str, Dict]:
+        elapsed = self.elapsed_seconds()
+        with self._lock:
+            durations = dict(self._histograms.get("stage_duration_seconds", {}))
+            items = dict(self._counters.get("stage_items", {}))
+            summary = {}
+            for key in set(durations) | set(items):
+                stage = dict(key).get('stage', '')
+                histogram = durations.get(key)
+                stage_items = items.get(key, 0)
+                entry = {'items': stage_items, 'items_per_second': round(stage_items / elapsed, 2) if elapsed > 0 else 0.0}
+                if histogram is not None:
+                    entry.update({
+                        'count': histogram.count,
+                        'total_seconds': round(histogram.sum, 6),
+                        'p50_ms': round(histogram.quantile(0.5) * 1000, 3),
+                        'p95_ms': round(histogram.quantile(0.95) * 1000, 3),
+                        'p99_ms': round(histogram.quantile(0.99) * 1000, 3),
+                        'max_ms': round((histogram.max or 0.0) * 1000, 3)
+                    })
+                summary[stage] = entry
+        return dict(sorted(summary.items()))
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counters = {
+                name: {_format_labels(key) or 'total': value for key, value in series.items()}
+                for name, series in self._counters.items()
+            }
+            gauges = {
+                name: {
+                    _format_labels(key) or 'value': {'value': value, 'peak': self._gauge_peaks[name][key]}
+                    for key, value in series.items()
+                }
+                for name, series in self._gauges.items()
+            }
+        return {
+            'elapsed_seconds': round(self.elapsed_seconds(), 3),
+            'stages': self.stage_summary(),
+            'counters': counters,
+            'gauges': gauges
+        }
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition: counters, gauges, and histograms as summaries"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                metric = f"{self.namespace}_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                lines.extend(f"{metric}{_format_labels(key)} {value}" for key, value in sorted(series.items()))
+            for name, series in sorted(self._gauges.items()):
+                metric = f"{self.namespace}_{name}"
+                lines.append(f"# TYPE {metric} gauge")
+                lines.extend(f"{metric}{_format_labels(key)} {value}" for key, value in sorted(series.items()))
+            for name, series in sorted(self._histograms.items()):
+                metric = f"{self.namespace}_{name}"
+                lines.append(f"# TYPE {metric} summary")
+                for key, histogram in sorted(series.items()):
+                    for q in QUANTILES:
+                        lines.append(f"{metric}{_format_labels(key, {'quantile': str(q)})} {histogram.quantile(q)}")
+                    lines.append(f"{metric}_sum{_format_labels(key)} {histogram.sum}")
+                    lines.append(f"{metric}_count{_format_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+    def write_prometheus(self, path: str):
+        """Write the exposition atomically, e.g. for the node_exporter textfile collector"""
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temp = target.with_suffix(target.suffix + ".tmp")
+        temp.write_text(self.to_prometheus())
+        temp.replace(target)
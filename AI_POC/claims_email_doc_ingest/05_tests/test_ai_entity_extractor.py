@@ -0,0 +1,232 @@
+import json
+import time
+import asyncio
+import unittest
+import pandas as pd
+from email.utils import formatdate
+from aiohttp import web
+from 07_models.ai_entity_extractor import AIEntityExtractor, AIRequestError, TokenBucket
+from 07_models.extraction_cache import ExtractionCache
+from 07_models.hybrid_extractor import HybridEntityExtractor
+from 12_integration.http_utils import retry_after_seconds
+
+class MockModelServer:
+    """Local stand-in for the model API that can fail the first N requests"""
+    def __init__(self, fail_first: int = 0, fail_status: int = 429, delay: float = 0.0, drop_indices=()):
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.delay = delay
+        # Batch entries left out of the answer, as a model sometimes does
+        self.drop_indices = set(drop_indices)
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+    async def handle(self, request):
+        payload = await request.json()
+        self.requests.append(payload)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if len(self.requests) <= self.fail_first:
+                return web.json_response({"error": "busy"}, status=self.fail_status, headers={"retry-after": "0"})
+            prompt = payload["messages"][0]["content"]
+            count = prompt.count("### Email ")
+            if count:
+                answer = [
+                    {"index": i, "claim_number": f"CLM{i:06d}", "policy_number": None}
+                    for i in range(count) if i not in self.drop_indices
+                ]
+            else:
+                answer = {"claim_number": "ABC123456", "policy_number": "POL12345678"}
+            return web.json_response({
+                "content": [{"type": "text", "text": json.dumps(answer)}],
+                "usage": {"input_tokens": 100, "output_tokens": 20}
+            })
+        finally:
+            self.active -= 1
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/v1/messages", self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/v1/messages"
+    async def stop(self):
+        await self.runner.cleanup()
+
+class TestAIEntityExtractor(unittest.IsolatedAsyncioTestCase):
+    def make_config(self, endpoint: str, **ai_overrides) -> dict:
+        ai_config = {
+            "endpoint": endpoint,
+            "model": "test-model",
+            "max_tokens": 100,
+            "max_concurrency": 2,
+            "requests_per_minute": 6000,
+            "tokens_per_minute": 1000000,
+            "max_retries": 3,
+            "backoff_base_seconds": 0.01,
+            "backoff_max_seconds": 0.05
+        }
+        ai_config.update(ai_overrides)
+        return {
+            "ai_config": ai_config,
+            "entity_extraction": {"entities": {
+                "claim_number": {"ai_extract": True},
+                "policy_number": {"ai_extract": True},
+                "insured_name": {"ai_extract": False}
+            }}
+        }
+    async def run_with_server(self, server, coro_factory, cache=None, **ai_overrides):
+        endpoint = await server.start()
+        try:
+            async with AIEntityExtractor("test-key", self.make_config(endpoint, **ai_overrides), cache=cache) as extractor:
+                return extractor, await coro_factory(extractor)
+        finally:
+            await server.stop()
+    async def test_retries_rate_limited_requests(self):
+        server = MockModelServer(fail_first=2)
+        extractor, result = await self.run_with_server(
+            server, lambda ex: ex.extract_entities_from_email({"subject": "Claim", "body_text": "CLAIM #ABC123456"})
+        )
+        self.assertEqual(result, {"claim_number": "ABC123456", "policy_number": "POL12345678"})
+        self.assertEqual(extractor.stats['retries'], 2)
+        self.assertEqual(len(server.requests), 3)
+    async def test_gives_up_after_max_retries(self):
+        server = MockModelServer(fail_first=10, fail_status=503)
+        with self.assertRaises(AIRequestError) as raised:
+            await self.run_with_server(server, lambda ex: ex.extract_entities_from_email({"body_text": "x"}))
+        self.assertEqual(raised.exception.status, 503)
+        self.assertEqual(len(server.requests), 4)
+    async def test_concurrency_is_bounded(self):
+        server = MockModelServer(delay=0.05)
+        emails = [{"body_text": "x" * 7000} for _ in range(6)]
+        _, results = await self.run_with_server(server, lambda ex: ex.extract_entities_batch(emails))
+        self.assertEqual(len(results), 6)
+        self.assertLessEqual(server.max_active, 2)
+    async def test_short_emails_share_a_request(self):
+        server = MockModelServer()
+        emails = [{"subject": f"Email {i}", "body_text": "short"} for i in range(3)]
+        _, results = await self.run_with_server(server, lambda ex: ex.extract_entities_batch(emails))
+        self.assertEqual(len(server.requests), 1)
+        self.assertEqual([r["claim_number"] for r in results], ["CLM000000", "CLM000001", "CLM000002"])
+    async def test_missing_batch_entries_fall_back_to_single_requests(self):
+        server = MockModelServer(drop_indices={1})
+        emails = [{"subject": f"Email {i}", "body_text": "short"} for i in range(3)]
+        cache = ExtractionCache({})
+        extractor, results = await self.run_with_server(server, lambda ex: ex.extract_entities_batch(emails), cache=cache)
+        self.assertEqual(len(server.requests), 2)
+        self.assertEqual([r["claim_number"] for r in results], ["CLM000000", "ABC123456", "CLM000002"])
+        self.assertEqual(extractor.stats['batch_fallbacks'], 1)
+        key = cache.key("Email 1\nshort", 'ai')
+        self.assertEqual(cache.get(key), {"claim_number": "ABC123456", "policy_number": "POL12345678"})
+    async def test_unusable_batch_response_is_not_cached(self):
+        server = MockModelServer(drop_indices={0, 1})
+        emails = [{"subject": f"Email {i}", "body_text": "short"} for i in range(2)]
+        cache = ExtractionCache({})
+        async def extract(ex):
+            # The single-email fallback fails too
+            async def failing(*args, **kwargs):
+                raise AIRequestError("Model API returned 400", 400)
+            ex._extract = failing
+            return await ex.extract_entities_batch(emails)
+        with self.assertRaises(AIRequestError):
+            await self.run_with_server(server, extract, cache=cache)
+        self.assertIsNone(cache.get(cache.key("Email 0\nshort", 'ai')))
+    async def test_http_date_retry_after(self):
+        server = MockModelServer(fail_first=1)
+        original = server.handle
+        async def handle(request):
+            response = await original(request)
+            if response.status == 429:
+                response.headers["retry-after"] = formatdate(time.time() - 5, usegmt=True)
+            return response
+        server.handle = handle
+        extractor, result = await self.run_with_server(
+            server, lambda ex: ex.extract_entities_from_email({"body_text": "CLAIM #ABC123456"})
+        )
+        self.assertEqual(result["claim_number"], "ABC123456")
+        self.assertEqual(extractor.stats['retries'], 1)
+
+class TestHybridEntityExtractor(unittest.IsolatedAsyncioTestCase):
+    def make_config(self, endpoint: str) -> dict:
+        return {
+            "ai_config": {"endpoint": endpoint, "model": "test-model", "max_tokens": 100, "max_retries": 0},
+            "entity_extraction": {"entities": {
+                "claim_number": {"patterns": ["CLAIM[\\s#:-]*([A-Z0-9]{6,12})"], "required": True, "ai_extract": True},
+                "policy_number": {"patterns": ["POLICY[\\s#:-]*([A-Z0-9]{8,15})"], "required": True, "ai_extract": True},
+                "insured_name": {"patterns": [], "required": True, "ai_extract": False}
+            }}
+        }
+    async def extract(self, server, emails):
+        endpoint = await server.start()
+        try:
+            config = self.make_config(endpoint)
+            async with AIEntityExtractor("test-key", config) as ai_extractor:
+                return await HybridEntityExtractor(config, ai_extractor=ai_extractor).extract_batch(emails)
+        finally:
+            await server.stop()
+    async def test_confident_regex_skips_the_model(self):
+        server = MockModelServer()
+        [result] = await self.extract(server, [{"body_text": "CLAIM #ABC123456 POLICY POL12345678"}])
+        self.assertEqual(server.requests, [])
+        self.assertEqual(result["extraction_method"], "regex")
+        self.assertEqual(result["policy_number"], "POL12345678")
+    async def test_only_missing_required_fields_are_requested(self):
+        server = MockModelServer()
+        [result] = await self.extract(server, [{"body_text": "CLAIM #ABC123456 with no policy line"}])
+        prompt = server.requests[0]["messages"][0]["content"]
+        self.assertIn("policy_number", prompt)
+        self.assertNotIn("claim_number", prompt.split(".")[0])
+        self.assertNotIn("insured_name", prompt)
+        self.assertEqual(result["extraction_method"], "hybrid")
+        self.assertEqual(result["field_methods"], {"claim_number": "regex", "policy_number": "ai", "insured_name": "none"})
+        self.assertEqual(result["policy_number"], "POL12345678")
+    def test_competing_matches_lower_confidence(self):
+        config = self.make_config("http://unused")
+        result = HybridEntityExtractor(config).regex_stage("CLAIM ABC123456 CLAIM XYZ987654 POLICY POL12345678")
+        self.assertEqual(result["field_confidence"]["claim_number"], 0.5)
+        self.assertEqual(result["ai_fields_requested"], ["claim_number"])
+    def test_triage_bodies_matches_email_bundle_inputs(self):
+        config = self.make_config("http://unused")
+        config["triage_rules"] = {"high_risk_indicators": ["fatality"]}
+        extractor = HybridEntityExtractor(config)
+        bodies = pd.Series([
+            "Please see below.\n\nOn Mon, Mar 11, 2024 at 9:00 AM Bob <bob@example.com> wrote:\n"
+            "> CLAIM #ZZZ999999 fatality at the scene\n> POLICY POL12345678",
+            "CLAIM #ABC123456\n\nOn Mon, Mar 11, 2024 at 9:00 AM Bob <bob@example.com> wrote:\n> CLAIM #ZZZ999999",
+            None
+        ], index=[5, 6, 7])
+        result = extractor.triage_bodies(bodies)
+        self.assertEqual(list(result.index), [5, 6, 7])
+        # Risk in the quoted history counts; entities fall back to it only when the new content has none
+        self.assertEqual(list(result["high_risk"]), [True, False, False])
+        self.assertEqual(list(result["claim_number"]), [["ZZZ999999"], ["ABC123456"], []])
+        self.assertEqual(list(result["policy_number"]), [["POL12345678"], [], []])
+
+class TestTokenBucket(unittest.IsolatedAsyncioTestCase):
+    async def test_waits_when_empty(self):
+        bucket = TokenBucket(capacity_per_minute=600)
+        await bucket.acquire(600)
+        waited = await bucket.acquire(5)
+        self.assertGreater(waited, 0.3)
+    async def test_reset_keeps_tokens(self):
+        bucket = TokenBucket(capacity_per_minute=600)
+        await bucket.acquire(600)
+        lock = bucket._lock
+        bucket.reset()
+        self.assertIsNot(bucket._lock, lock)
+        self.assertLess(bucket.tokens, 1)
+
+class TestRetryAfter(unittest.TestCase):
+    def test_seconds_and_http_dates(self):
+        self.assertEqual(retry_after_seconds("3"), 3.0)
+        self.assertIsNone(retry_after_seconds(None))
+        self.assertIsNone(retry_after_seconds("soon"))
+        self.assertAlmostEqual(retry_after_seconds(formatdate(time.time() + 30, usegmt=True)), 30, delta=2)
+        self.assertEqual(retry_after_seconds(formatdate(time.time() - 30, usegmt=True)), 0.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import json
+import time
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from 10_monitoring.alert_dispatcher import AlertDispatcher
+from 10_monitoring.teams_webhook_notifier import TeamsNotifier
+
+class WebhookStandIn(BaseHTTPRequestHandler):
+    """Local Teams webhook: replies with the next scripted status, then 200"""
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        server = self.server
+        with server.lock:
+            server.cards.append(json.loads(body))
+            status = server.script.pop(0) if server.script else 200
+        self.send_response(status)
+        if status == 429:
+            self.send_header('Retry-After', '0')
+        self.send_header('Content-Length', '1')
+        self.end_headers()
+        self.wfile.write(b"1")
+    def log_message(self, format, *args):
+        pass
+
+class TestAlertDispatcher(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), WebhookStandIn)
+        self.server.lock = threading.Lock()
+        self.server.cards = []
+        self.server.script = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.notifier = TeamsNotifier(f"http://127.0.0.1:{self.server.server_address[1]}/webhook", timeout=2)
+        self.config = {'alerts': {
+            'window_seconds': 0.3, 'min_interval_seconds': 0, 'backoff_base_seconds': 0.01, 'max_retries': 2
+        }}
+    def tearDown(self):
+        self.notifier.close()
+        self.server.shutdown()
+        self.server.server_close()
+    def alert(self, claim_number):
+        return {'claim_number': claim_number, 'priority_level': 'critical', 'risk_level': 'high'}
+    def test_window_coalesces_into_one_deduplicated_digest(self):
+        self.server.script = [429]
+        dispatcher = AlertDispatcher(self.notifier, self.config)
+        results = [dispatcher.submit(self.alert(claim)) for claim in ("CLM1", "CLM2", "CLM1", "CLM3")]
+        self.assertEqual(results, [True, True, False, True])
+        self.assertTrue(dispatcher.flush(timeout=5))
+        dispatcher.close()
+        # First post throttled, retried once; both posts carry the same three-claim digest
+        self.assertEqual(len(self.server.cards), 2)
+        facts = self.server.cards[-1]['sections'][0]['facts']
+        self.assertEqual([fact['name'] for fact in facts], ["CLM1", "CLM2", "CLM3"])
+        self.assertEqual(dispatcher.stats['alerts_delivered'], 3)
+        self.assertEqual(dispatcher.stats['alerts_deduplicated'], 1)
+        self.assertEqual(dispatcher.stats['alert_throttled'], 1)
+        self.assertEqual(dispatcher.stats['alert_retries'], 1)
+        self.assertIn('alert_delivery_seconds', dispatcher.metrics.to_prometheus())
+    def test_client_error_is_not_retried(self):
+        self.server.script = [400]
+        dispatcher = AlertDispatcher(self.notifier, self.config)
+        dispatcher.submit(self.alert("CLM9"))
+        self.assertTrue(dispatcher.flush(timeout=5))
+        dispatcher.close()
+        self.assertEqual(len(self.server.cards), 1)
+        self.assertEqual(self.server.cards[0]['summary'], "High-Risk Claim Detected")
+        self.assertEqual(dispatcher.stats['alerts_failed'], 1)
+        self.assertEqual(dispatcher.stats['alert_retries'], 0)
+    def test_full_queue_drops_instead_of_blocking(self):
+        config = {'alerts': {**self.config['alerts'], 'queue_size': 1, 'window_seconds': 5}}
+        dispatcher = AlertDispatcher(self.notifier, config)
+        accepted = [dispatcher.submit(self.alert(f"CLM{i}")) for i in range(50)]
+        self.assertGreater(accepted.count(False), 0)
+        self.assertEqual(dispatcher.stats['alerts_dropped'], accepted.count(False))
+        self.assertTrue(dispatcher.close(timeout=10))
+    def test_dropped_and_failed_claims_can_be_resubmitted(self):
+        self.server.script = [400]
+        config = {'alerts': {**self.config['alerts'], 'queue_size': 1, 'window_seconds': 30}}
+        dispatcher = AlertDispatcher(self.notifier, config)
+        self.assertTrue(dispatcher.submit(self.alert("CLM1")))
+        # Once the worker holds CLM1 for the window, CLM2 fills the queue and CLM3 is dropped
+        deadline = time.monotonic() + 5
+        while not dispatcher._queue.empty() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(dispatcher.submit(self.alert("CLM2")))
+        self.assertFalse(dispatcher.submit(self.alert("CLM3")))
+        self.assertEqual(dispatcher.stats['alerts_dropped'], 1)
+        # The webhook rejects the CLM1/CLM2 card
+        self.assertTrue(dispatcher.flush(timeout=10))
+        self.assertEqual(dispatcher.stats['alerts_failed'], 2)
+        # Neither the dropped claim nor the failed ones count as alerted
+        self.assertTrue(dispatcher.submit(self.alert("CLM3")))
+        self.assertTrue(dispatcher.flush(timeout=10))
+        self.assertTrue(dispatcher.submit(self.alert("CLM1")))
+        self.assertFalse(dispatcher.submit(self.alert("CLM3")))
+        self.assertEqual(dispatcher.stats['alerts_deduplicated'], 1)
+        self.assertTrue(dispatcher.close(timeout=10))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+from 14_benchmarks.corpus_generator import SyntheticCorpus
+from 14_benchmarks.run_benchmarks import compare_results, run_all
+
+class TestSyntheticCorpus(unittest.TestCase):
+    def test_same_seed_same_corpus(self):
+        first = list(SyntheticCorpus(seed=7, max_bytes=8192).iter_emails(20))
+        second = list(SyntheticCorpus(seed=7, max_bytes=8192).iter_emails(20))
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, list(SyntheticCorpus(seed=8, max_bytes=8192).iter_emails(20)))
+    def test_bodies_cover_size_range_and_formats(self):
+        emails = list(SyntheticCorpus(seed=1, min_bytes=1024, max_bytes=64 * 1024).iter_emails(60))
+        sizes = [len(email['body_text'] or email['body_html']) for email in emails]
+        self.assertGreaterEqual(min(sizes), 600)
+        self.assertLessEqual(max(sizes), 96 * 1024)
+        self.assertTrue(any(email['body_html'] for email in emails))
+        self.assertTrue(any("wrote:" in email['body_text'] for email in emails))
+        self.assertEqual(len({email['message_id'] for email in emails}), 60)
+
+class TestBenchmarkHarness(unittest.TestCase):
+    def test_run_all_and_compare(self):
+        results = run_all(emails=5, max_bytes=4096, repeats=1, seed=3)
+        self.assertIn('pipeline.email_ingest', results['benchmarks'])
+        self.assertGreater(results['benchmarks']['classifier.classify_all']['ops_per_sec'], 0)
+        baseline = {'benchmarks': {name: {'ops_per_sec': result['ops_per_sec'] * 2}
+                                   for name, result in results['benchmarks'].items()}}
+        comparison = compare_results(results, baseline, tolerance=0.2)
+        self.assertTrue(all(entry['regressed'] for entry in comparison))
+        self.assertFalse(any(entry['regressed'] for entry in compare_results(results, results, tolerance=0.2)))
+
+if __name__ == "__main__":
+    unittest.main()
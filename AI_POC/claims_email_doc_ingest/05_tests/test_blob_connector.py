@@ -0,0 +1,88 @@
+import io
+import mmap
+import time
+import threading
+import unittest
+from types import SimpleNamespace
+from azure.core.exceptions import ResourceModifiedError
+from 12_integration.blob_connector import BlobConnector
+
+class FakeBlobClient:
+    """In-memory blob that records ranged downloads and honours etag conditions"""
+    def __init__(self, data: bytes, delays=None):
+        self.data = data
+        self.etag = '"0x1"'
+        self.delays = delays or {}
+        self.ranges = []
+        self.lock = threading.Lock()
+    def get_blob_properties(self):
+        return SimpleNamespace(size=len(self.data), etag=self.etag)
+    def download_blob(self, offset=None, length=None, etag=None, match_condition=None):
+        with self.lock:
+            self.ranges.append((offset, length))
+        time.sleep(self.delays.get(offset, 0))
+        if etag is not None and etag != self.etag:
+            raise ResourceModifiedError("The condition specified using HTTP conditional header(s) is not met.")
+        return SimpleNamespace(readall=lambda: self.data[offset:offset + length])
+    def overwrite(self, data: bytes):
+        self.data = data
+        self.etag = f'"0x{len(self.ranges) + 2}"'
+
+class FakeServiceClient:
+    def __init__(self, blob_client):
+        self.blob_client = blob_client
+    def get_blob_client(self, container, blob):
+        return self.blob_client
+
+class TestBlobRangedReads(unittest.TestCase):
+    def connector(self, data: bytes, delays=None):
+        self.blob = FakeBlobClient(data, delays)
+        return BlobConnector("", blob_service_client=FakeServiceClient(self.blob))
+    def test_chunks_cover_boundaries_and_last_partial_chunk(self):
+        data = (bytes(range(256)) * 40)[:10000]
+        chunks = list(self.connector(data).iter_attachment_chunks("c", "a.pdf", chunk_size=4096))
+        self.assertEqual([len(chunk) for chunk in chunks], [4096, 4096, 1808])
+        self.assertEqual(b"".join(chunks), data)
+        self.assertEqual(self.blob.ranges, [(0, 4096), (4096, 4096), (8192, 1808)])
+        # An exact multiple of chunk_size has no trailing empty range
+        self.assertEqual(len(list(self.connector(data[:8192]).iter_attachment_chunks("c", "a.pdf", 4096))), 2)
+        self.assertEqual(list(self.connector(b"").iter_attachment_chunks("c", "a.pdf", 4096)), [])
+    def test_concurrent_chunks_keep_blob_order(self):
+        data = bytes(range(256)) * 64
+        # Earlier ranges finish last
+        delays = {offset: 0.05 - offset / 400000 for offset in range(0, len(data), 1024)}
+        connector = self.connector(data, delays)
+        chunks = list(connector.iter_attachment_chunks("c", "a.pdf", chunk_size=1024, max_concurrency=4))
+        self.assertEqual(b"".join(chunks), data)
+        self.assertEqual(len(self.blob.ranges), 16)
+    def test_spool_threshold(self):
+        data = b"x" * 10000
+        with self.connector(data).spool_attachment("c", "a.pdf", chunk_size=4096, memory_threshold=10000) as view:
+            self.assertIsInstance(view, bytes)
+            self.assertEqual(view, data)
+        with self.connector(data).spool_attachment("c", "a.pdf", chunk_size=4096, memory_threshold=4096) as view:
+            self.assertIsInstance(view, mmap.mmap)
+            self.assertEqual(view[:], data)
+        with self.connector(b"").spool_attachment("c", "a.pdf", memory_threshold=0) as view:
+            self.assertEqual(view, b"")
+    def test_overwritten_blob_fails_instead_of_splicing(self):
+        connector = self.connector(b"a" * 8192)
+        chunks = connector.iter_attachment_chunks("c", "a.pdf", chunk_size=4096)
+        self.assertEqual(next(chunks), b"a" * 4096)
+        self.blob.overwrite(b"b" * 8192)
+        with self.assertRaises(ResourceModifiedError):
+            next(chunks)
+    def test_range_reader_seeks_and_pins_version(self):
+        data = bytes(range(256)) * 40
+        reader = self.connector(data).open_attachment("c", "a.pdf", chunk_size=4096)
+        reader.seek(4090)
+        self.assertEqual(reader.read(12), data[4090:4102])
+        self.assertEqual(reader.seek(-10, io.SEEK_END), len(data) - 10)
+        self.assertEqual(reader.read(), data[-10:])
+        self.blob.overwrite(b"\0" * len(data))
+        reader.seek(0)
+        with self.assertRaises(ResourceModifiedError):
+            reader.read(1)
+
+if __name__ == "__main__":
+    unittest.main()
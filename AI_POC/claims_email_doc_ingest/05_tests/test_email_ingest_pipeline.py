@@ -0,0 +1,181 @@
+import json
+import asyncio
+import logging
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from 02_pipelines.pipeline_email_ingest import EmailIngestPipeline, build_email_bundle
+from 07_models.entity_classifier import EntityClassifier
+from 12_integration.local_blob_connector import LocalBlobConnector
+from 12_integration.checkpoint_store import FileCheckpointStore
+from 12_integration.email_parser import EmailParser
+
+CONFIG_PATH = Path(__file__).resolve().parents[1] / "00_configs" / "config_poc.json"
+
+class RecordingSQLWriter:
+    """Collects persisted bundles instead of writing to SQL Server"""
+    def __init__(self, fail_batches: int = 0):
+        self.batches = []
+        self.fail_batches = fail_batches
+    def persist_email_bundles(self, bundles, tables=None):
+        if self.fail_batches:
+            self.fail_batches -= 1
+            raise RuntimeError("database unavailable")
+        self.batches.append(list(bundles))
+        return list(range(len(bundles)))
+
+class RecordingAIExtractor:
+    """Answers AI field requests and records the event loops it was called on"""
+    def __init__(self, fail_calls=()):
+        self.calls = 0
+        self.loops = set()
+        self.closed = 0
+        self.fail_calls = set(fail_calls)
+    async def extract_fields(self, email_content, fields):
+        self.calls += 1
+        self.loops.add(asyncio.get_running_loop())
+        if self.calls in self.fail_calls:
+            # A malformed response that escapes the per-field error handling
+            return None
+        return {field: "AI-VALUE" for field in fields}
+    async def close(self):
+        self.closed += 1
+
+class TestEmailIngestPipeline(unittest.TestCase):
+    def setUp(self):
+        with open(CONFIG_PATH) as f:
+            self.config = json.load(f)
+        self.config['ingestion'] = {"max_workers": 2, "max_in_flight": 3, "batch_size": 4}
+        self.root = tempfile.mkdtemp()
+        container = Path(self.root) / self.config['blob_storage']['container_name']
+        container.mkdir()
+        for i in range(10):
+            email = {
+                "message_id": f"<msg-{i}@example.com>",
+                "subject": f"CLAIM #CLM{i:06d} vehicle collision",
+                "body_text": "Insured was injured, hospital visit. Total $1,500.00",
+                "attachments": [{"filename": "photo.jpg", "size": 1024}]
+            }
+            (container / f"email_{i:02d}.json").write_text(json.dumps(email))
+        (container / "email_dup.json").write_text(json.dumps({"message_id": "<msg-0@example.com>"}))
+        (container / "email_bad.json").write_text("{not json")
+        self.connector = LocalBlobConnector(self.root)
+        self.logger = logging.getLogger("test_email_ingest")
+    def tearDown(self):
+        shutil.rmtree(self.root)
+    def test_ingest_local_container(self):
+        writer = RecordingSQLWriter()
+        stats = EmailIngestPipeline(self.config, writer, self.logger, self.connector).run()
+        self.assertEqual(stats['emails_listed'], 12)
+        self.assertEqual(stats['emails_ingested'], 10)
+        self.assertEqual(stats['emails_skipped'], 1)
+        self.assertEqual(stats['emails_failed'], 1)
+        self.assertEqual(stats['status'], "PARTIAL")
+        self.assertEqual([len(batch) for batch in writer.batches], [4, 4, 2])
+        self.assertGreater(stats['emails_per_second'], 0)
+        self.assertEqual(stats['stages']['sql_write']['items'], 10)
+        self.assertEqual(stats['stages']['blob_download']['count'], 12)
+    def test_failed_batch_is_counted(self):
+        writer = RecordingSQLWriter(fail_batches=1)
+        stats = EmailIngestPipeline(self.config, writer, self.logger, self.connector).run()
+        self.assertEqual(stats['emails_ingested'], 6)
+        self.assertEqual(stats['emails_failed'], 5)
+    def test_checkpoint_skips_committed_blobs(self):
+        checkpoint_path = Path(self.root) / "checkpoint.jsonl"
+        writer = RecordingSQLWriter(fail_batches=1)
+        first = EmailIngestPipeline(
+            self.config, writer, self.logger, self.connector, FileCheckpointStore(checkpoint_path)
+        ).run()
+        self.assertEqual(first['emails_ingested'], 6)
+        # A new run resumes: only the failed batch and the unparseable blob are read again
+        writer = RecordingSQLWriter()
+        second = EmailIngestPipeline(
+            self.config, writer, self.logger, self.connector, FileCheckpointStore(checkpoint_path)
+        ).run()
+        self.assertEqual(second['emails_unchanged'], 12 - 5)
+        self.assertEqual(second['emails_ingested'], 4)
+        self.assertEqual(second['emails_failed'], 1)
+        third = EmailIngestPipeline(
+            self.config, RecordingSQLWriter(), self.logger, self.connector, FileCheckpointStore(checkpoint_path)
+        ).run()
+        self.assertEqual(third['emails_unchanged'], 11)
+        self.assertEqual(third['emails_ingested'], 0)
+    def test_email_without_message_id_is_persisted(self):
+        container = Path(self.root) / self.config['blob_storage']['container_name']
+        (container / "email_no_id.json").write_text(json.dumps({"subject": "CLAIM #CLM999999 no id"}))
+        checkpoint_path = Path(self.root) / "checkpoint.jsonl"
+        writer = RecordingSQLWriter()
+        stats = EmailIngestPipeline(
+            self.config, writer, self.logger, self.connector, FileCheckpointStore(checkpoint_path)
+        ).run()
+        self.assertEqual(stats['emails_ingested'], 11)
+        self.assertEqual(stats['message_ids_derived'], 1)
+        message_ids = [bundle['email']['message_id'] for batch in writer.batches for bundle in batch]
+        derived = [message_id for message_id in message_ids if message_id.startswith("<blob-")]
+        self.assertEqual(len(derived), 1)
+        self.assertTrue(FileCheckpointStore(checkpoint_path).has_message(derived[0]))
+    def test_ai_stage_shares_one_loop_and_survives_failures(self):
+        ai_extractor = RecordingAIExtractor(fail_calls={1})
+        writer = RecordingSQLWriter()
+        stats = EmailIngestPipeline(self.config, writer, self.logger, self.connector, ai_extractor=ai_extractor).run()
+        self.assertEqual(ai_extractor.closed, 1)
+        self.assertEqual(len(ai_extractor.loops), 1)
+        self.assertTrue(next(iter(ai_extractor.loops)).is_closed())
+        # The email whose AI call failed is written with its regex results and counted on its own
+        self.assertEqual(stats['emails_ingested'], 10)
+        self.assertEqual(stats['emails_ai_failed'], 1)
+        self.assertEqual(stats['emails_ai_completed'], 9)
+        failed = [bundle for batch in writer.batches for bundle in batch if bundle['entities'].get('ai_error')]
+        self.assertEqual(len(failed), 1)
+        self.assertNotIn('ai', failed[0]['entities']['field_methods'].values())
+    def test_checkpoint_survives_torn_line(self):
+        checkpoint_path = Path(self.root) / "checkpoint.jsonl"
+        store = FileCheckpointStore(checkpoint_path)
+        store.commit_batch([{"name": "a.json", "etag": "1"}], ["<a@example.com>"])
+        with open(checkpoint_path, "a") as f:
+            f.write('{"blobs": [{"name": "b.js')
+        reopened = FileCheckpointStore(checkpoint_path)
+        self.assertTrue(reopened.is_processed({"name": "a.json", "etag": "1"}))
+        self.assertFalse(reopened.is_processed({"name": "a.json", "etag": "2"}))
+        self.assertTrue(reopened.has_message("<a@example.com>"))
+        # The torn tail is cut off, so the next commit is readable after a reload
+        reopened.commit_batch([{"name": "c.json", "etag": "3"}], ["<c@example.com>"])
+        reloaded = FileCheckpointStore(checkpoint_path)
+        self.assertTrue(reloaded.is_processed({"name": "c.json", "etag": "3"}))
+        self.assertTrue(reloaded.has_message("<c@example.com>"))
+        self.assertFalse(reloaded.is_processed({"name": "b.json", "etag": None}))
+        self.assertEqual(len(checkpoint_path.read_text().splitlines()), 2)
+        reopened.compact()
+        self.assertEqual(len(checkpoint_path.read_text().splitlines()), 1)
+    def test_build_email_bundle(self):
+        parsed = {
+            "message_id": "<m@example.com>",
+            "subject": "Litigation notice CLAIM #ABC123456",
+            "body_text": "Our attorney will contact you. Claim amount $250,000.00",
+            "attachments": [{"filename": "report.pdf"}]
+        }
+        bundle = build_email_bundle(parsed, EntityClassifier(self.config), self.config)
+        self.assertEqual(bundle['entities']['claim_number'], 'ABC123456')
+        self.assertEqual(bundle['entities']['extraction_method'], 'regex')
+        self.assertTrue(bundle['triage']['requires_escalation'])
+        self.assertEqual(bundle['triage']['risk_level'], 'high')
+        self.assertEqual(bundle['attachments'][0]['file_category'], 'pdf_document')
+    def test_forwarded_high_risk_content_is_triaged(self):
+        parsed = EmailParser.parse_email_structure({
+            "message_id": "<fwd@example.com>",
+            "subject": "Fwd: new matter",
+            "body_text": (
+                "FYI\n\n---------- Forwarded message ---------\n"
+                "From: Counsel <counsel@lawfirm.com>\n"
+                "Our attorney has filed a lawsuit over the fatality in the vehicle collision on Route 9."
+            )
+        })
+        self.assertEqual(parsed['body_view']['text'], "FYI")
+        bundle = build_email_bundle(parsed, EntityClassifier(self.config), self.config)
+        self.assertEqual(bundle['triage']['priority_level'], 'critical')
+        self.assertEqual(bundle['triage']['risk_level'], 'high')
+        self.assertTrue(bundle['triage']['requires_escalation'])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -20,6 +20,25 @@ class TestEmailParser(unittest.TestCase):
         self.assertEqual(len(amounts), 2)
         self.assertIn("$15,000.50", amounts)
         self.assertIn("$500", amounts)
+    def test_parse_amount(self):
+        self.assertEqual(self.parser.parse_amount("$15,000.50"), 15000.5)
+        self.assertEqual(self.parser.parse_amount("USD 200"), 200.0)
+        self.assertEqual(self.parser.parse_amount(99.999), 100.0)
+        self.assertIsNone(self.parser.parse_amount("pending"))
+        self.assertIsNone(self.parser.parse_amount(None))
+    def test_extract_all_single_pass(self):
+        text = (
+            "Call 555-123-4567 or (555) 123-4567 by March 14, 2024. "
+            "Send $1,200.00 to Claims@Insurer.com and claims@insurer.com, then call +1 555.987.6543."
+        )
+        found = self.parser.extract_all(text)
+        self.assertEqual([m['value'] for m in found['phone_numbers']], ["555-123-4567", "+1 555.987.6543"])
+        self.assertEqual([m['value'] for m in found['email_addresses']], ["Claims@Insurer.com"])
+        self.assertEqual([m['value'] for m in found['dates']], ["March 14, 2024"])
+        amount = found['amounts'][0]
+        self.assertEqual(text[amount['start']:amount['end']], "$1,200.00")
+        kinds = [kind for kind, _, _, _ in self.parser.iter_all(text)]
+        self.assertEqual(kinds, ["phone_numbers", "dates", "amounts", "email_addresses", "phone_numbers"])
     def test_classify_attachment_pdf(self):
         result = self.parser.classify_attachment_type("invoice.pdf")
         self.assertEqual(result['type'], 'document')
@@ -28,6 +47,47 @@ class TestEmailParser(unittest.TestCase):
         result = self.parser.classify_attachment_type("accident_photo.jpg")
         self.assertEqual(result['type'], 'image')
         self.assertEqual(result['category'], 'photo')
+    def test_sniff_attachment_type(self):
+        self.assertEqual(self.parser.sniff_attachment_type(b"%PDF-1.7\n", "scan.bin")['category'], 'pdf_document')
+        self.assertEqual(self.parser.sniff_attachment_type(b"\x00\x00\x00\x18ftypqt  ")['type'], 'video')
+        self.assertEqual(self.parser.sniff_attachment_type(b"\x89PNG\r\n\x1a\n")['type'], 'image')
+        self.assertEqual(self.parser.sniff_attachment_type(b"plain text", "notes.csv")['category'], 'csv')
+    def test_normalize_body_keeps_only_new_content(self):
+        body = (
+            "Hi team,\n\nPlease open   CLAIM #ABC123456 for the attached loss.\n\n"
+            "Thanks,\nJane Doe\nAdjuster | 555-123-4567\n\n"
+            "CONFIDENTIALITY NOTICE: This email is intended only for the named recipient.\n\n"
+            "On Mon, Mar 11, 2024 at 9:00 AM Bob <bob@example.com> wrote:\n> CLAIM #ZZZ999999\n"
+        )
+        view = self.parser.normalize_body(body)
+        self.assertEqual(view['text'], "Hi team,\n\nPlease open CLAIM #ABC123456 for the attached loss.")
+        self.assertIn("555-123-4567", view['signature_text'])
+        self.assertTrue(view['disclaimer_text'].startswith("CONFIDENTIALITY NOTICE"))
+        self.assertIn("ZZZ999999", view['quoted_text'])
+        start = view['text'].index("ABC123456")
+        self.assertEqual(body[self.parser.map_offset(view, start):][:9], "ABC123456")
+    def test_mid_body_sign_off_is_not_a_signature(self):
+        body = "Hi team,\nThanks\nCLAIM #ABC123456 water damage to the house\nPOLICY POL12345678"
+        view = self.parser.normalize_body(body)
+        self.assertEqual(view['text'], body)
+        self.assertEqual(view['signature_text'], "")
+        # A later sign-off with only contact details after it still ends the message
+        view = self.parser.normalize_body(body + "\n\nThanks,\nJane Doe\n555-123-4567")
+        self.assertEqual(view['text'], body)
+        self.assertTrue(view['signature_text'].startswith("Thanks,"))
+    def test_normalize_body_converts_html(self):
+        html = (
+            "<html><head><style>p {}</style></head><body><p>Policy POL12345678 &amp; photos</p>"
+            "<div class='gmail_quote'>On Monday Bob wrote:<blockquote>old thread</blockquote></div></body></html>"
+        )
+        view = self.parser.normalize_body("", html)
+        self.assertEqual(view['source'], 'body_html')
+        self.assertEqual(view['text'], "Policy POL12345678 & photos")
+        self.assertIn("old thread", view['quoted_text'])
+    def test_parse_email_structure_builds_view(self):
+        parsed = self.parser.parse_email_structure({"body_text": "From: a@b.com\nSent: today\nold"})
+        self.assertEqual(parsed['body_view']['text'], "")
+        self.assertEqual(self.parser.content_text({"body_text": "raw"}), "raw")
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,5 +1,22 @@
+import os
+import re
+import json
+import time
+import shutil
+import tempfile
 import unittest
-from 07_models.entity_classifier import EntityClassifier
+from pathlib import Path
+import pandas as pd
+from 07_models.entity_classifier import CompiledEntityExtractor, EntityClassifier
+from 07_models.extraction_cache import ExtractionCache
+from 07_models.parallel_triage import ParallelTriageExecutor
+from 14_benchmarks.corpus_generator import SyntheticCorpus
+
+CONFIG_PATH = Path(__file__).resolve().parents[1] / "00_configs" / "config_poc.json"
+
+def load_poc_config():
+    with open(CONFIG_PATH) as f:
+        return json.load(f)
 
 class TestEntityClassifier(unittest.TestCase):
     def setUp(self):
@@ -35,6 +52,52 @@ class TestEntityClassifier(unittest.TestCase):
         results = self.classifier.extract_with_patterns(text, 'claim_number')
         self.assertEqual(len(results), 1)
         self.assertEqual(results[0], 'ABC123456')
+    def test_extract_all_entities_single_pass(self):
+        text = "CLAIM #ABC123456 under POLICY: POL12345678 and CLAIM XYZ987654"
+        entities = self.classifier.extract_all_entities(text)
+        self.assertEqual(set(entities.keys()), {'claim_number', 'policy_number'})
+        self.assertEqual(entities['claim_number'], ['ABC123456', 'XYZ987654'])
+        self.assertEqual(entities['policy_number'], ['POL12345678'])
+        for entity, values in entities.items():
+            self.assertEqual(values, self.classifier.extract_with_patterns(text, entity))
+    def test_overlapping_patterns_keep_every_match(self):
+        classifier = EntityClassifier(load_poc_config())
+        entities = classifier.extract_all_entities("CLAIM #POL12345678 and CLAIM: CLM1234567, POLICY POL123456789")
+        self.assertEqual(entities['claim_number'], ['POL12345678', 'CLM1234567', '1234567'])
+        self.assertEqual(entities['policy_number'], ['POL123456789', '12345678', '123456789'])
+    def test_matches_findall_on_corpus(self):
+        config = load_poc_config()
+        classifier = EntityClassifier(config)
+        corpus = SyntheticCorpus(seed=11, max_bytes=16 * 1024).iter_emails(40)
+        bodies = [email['body_text'] or email['body_html'] for email in corpus]
+        bodies += ["CLAIM #POL12345678", "CLAIM: CLM1234567", "POLICY POL123456789 for $1,200.50"]
+        # The shipped patterns are all merged into the single-pass scanner
+        self.assertIsNotNone(classifier.extraction_engine.scanner)
+        batch = classifier.classify_batch(pd.DataFrame({"body_text": bodies}))
+        for row, body in enumerate(bodies):
+            extracted = classifier.extract_all_entities(body)
+            for entity, entity_config in config['entity_extraction']['entities'].items():
+                expected = [value for pattern in entity_config['patterns'] for value in re.findall(pattern, body)]
+                self.assertEqual(extracted[entity], expected)
+                self.assertEqual(batch.iloc[row][entity], expected)
+    def test_scanner_mirrors_findall_shapes(self):
+        patterns = {
+            "plain": {"patterns": [r"\d{3}", r"\d{2}"]},
+            "grouped": {"patterns": [r"(\w)-(\d)?", r"#(\d+)"]},
+            "sometimes_empty": {"patterns": [r"(?<=x)\d*"]}
+        }
+        engine = CompiledEntityExtractor(patterns)
+        self.assertIsNotNone(engine.scanner)
+        for text in ("12345 a-1 b- #77 x9 x", "", "x" * 5, "#1#2 9-9 12"):
+            expected = {
+                entity: [value for pattern in config["patterns"] for value in re.findall(pattern, text)]
+                for entity, config in patterns.items()
+            }
+            self.assertEqual(engine.extract(text), expected)
+        # Named groups cannot be merged; such configs are scanned pattern by pattern
+        fallback = CompiledEntityExtractor({"named": {"patterns": [r"(?P<n>\d+)"]}})
+        self.assertIsNone(fallback.scanner)
+        self.assertEqual(fallback.extract("1 22"), {"named": ["1", "22"]})
     def test_classify_priority(self):
         config = {"classification": {"priority_levels": {
             "urgent": ["urgent", "emergency"],
@@ -52,6 +115,154 @@ class TestEntityClassifier(unittest.TestCase):
         text = "Vehicle collision on Highway 101"
         claim_type, confidence = self.classifier.classify_claim_type(text, config)
         self.assertEqual(claim_type, 'auto')
+    def test_keyword_matcher_reports_nested_hits(self):
+        config = {
+            "classification": {"priority_levels": {
+                "critical": ["severe injury"],
+                "high": ["injury"]
+            }},
+            "triage_rules": {"high_risk_indicators": ["death", "wrongful death"]}
+        }
+        classifier = EntityClassifier(config)
+        hits = classifier.keyword_matcher.scan("Severe injury and WRONGFUL DEATH; injury")
+        self.assertEqual(hits['priority']['critical']['count'], 1)
+        self.assertEqual(hits['priority']['high']['count'], 2)
+        self.assertEqual(hits['priority']['high']['offsets'], [7, 34])
+        self.assertEqual(hits['high_risk']['high_risk']['keywords'], {'wrongful death': 1, 'death': 1})
+    def test_classify_all(self):
+        text = "Emergency: car accident, vehicle towed. Home untouched."
+        result = self.classifier.classify_all(text)
+        self.assertEqual(result['priority_level'], 'urgent')
+        self.assertEqual(result['claim_type'], 'auto')
+        self.assertAlmostEqual(result['claim_type_confidence'], 0.75)
+        self.assertFalse(result['high_risk'])
+    def test_classify_batch_matches_per_row(self):
+        bodies = [
+            "Emergency: CLAIM #ABC123456 car accident, POLICY 12345678AB",
+            "Inquiry about house fire damage",
+            "",
+            None
+        ]
+        df = pd.DataFrame({"body_text": bodies}, index=[10, 11, 12, 13])
+        batch = self.classifier.classify_batch(df)
+        self.assertEqual(list(batch.index), [10, 11, 12, 13])
+        self.assert_batch_matches_rows(self.classifier, df, bodies)
+        # Keywords of one label sharing a start position count once each
+        shared_start = EntityClassifier({"classification": {"claim_types": {
+            "a": ["work", "workplace"], "b": ["injury", "hurt"]
+        }}})
+        bodies = ["workplace injury hurt"]
+        df = pd.DataFrame({"body_text": bodies})
+        self.assertEqual(shared_start.classify_all(bodies[0])['claim_type'], 'a')
+        self.assert_batch_matches_rows(shared_start, df, bodies)
+    def assert_batch_matches_rows(self, classifier, df, bodies):
+        batch = classifier.classify_batch(df)
+        for idx, text in zip(df.index, bodies):
+            expected = classifier.classify_all(text or "")
+            entities = classifier.extract_all_entities(text or "")
+            row = batch.loc[idx]
+            self.assertEqual(row['priority_level'], expected['priority_level'])
+            self.assertAlmostEqual(row['priority_confidence'], expected['priority_confidence'])
+            self.assertEqual(row['claim_type'], expected['claim_type'])
+            self.assertAlmostEqual(row['claim_type_confidence'], expected['claim_type_confidence'])
+            self.assertEqual(bool(row['high_risk']), expected['high_risk'])
+            for entity, values in entities.items():
+                self.assertEqual(row[entity], values)
+
+class TestParallelTriageExecutor(unittest.TestCase):
+    def setUp(self):
+        self.config = {
+            "entity_extraction": {"entities": {"claim_number": {"patterns": ["CLAIM[\\s#:-]*([A-Z0-9]{6,12})"]}}},
+            "classification": {
+                "priority_levels": {"high": ["injury"], "low": ["inquiry"]},
+                "claim_types": {"auto": ["car"], "property": ["fire"]}
+            },
+            "parallel_triage": {"max_workers": 2, "chunk_size": 3}
+        }
+        bodies = [f"CLAIM #ABC{i:06d} car injury" if i % 2 else "fire inquiry" for i in range(10)]
+        self.df = pd.DataFrame({"body_text": bodies}, index=range(100, 110))
+    def test_matches_classify_batch(self):
+        expected = EntityClassifier(self.config).classify_batch(self.df)
+        with ParallelTriageExecutor(self.config) as executor:
+            result = executor.triage_dataframe(self.df)
+        pd.testing.assert_frame_equal(result[expected.columns], expected, check_dtype=False)
+    def test_unordered_chunks_cover_every_row(self):
+        with ParallelTriageExecutor(self.config) as executor:
+            chunks = list(executor.iter_chunks(self.df['body_text'], ordered=False))
+        self.assertEqual(sorted(start for start, _ in chunks), [0, 3, 6, 9])
+        self.assertEqual(sum(len(rows) for _, rows in chunks), 10)
+
+class TestExtractionCache(unittest.TestCase):
+    def setUp(self):
+        self.config = {
+            "entity_extraction": {"entities": {
+                "claim_number": {"patterns": ["CLAIM[\\s#:-]*([A-Z0-9]{6,12})"]}
+            }},
+            "classification": {"priority_levels": {"high": ["injury"]}}
+        }
+    def test_duplicate_bodies_hit_cache(self):
+        cache = ExtractionCache(self.config, max_entries=10)
+        classifier = EntityClassifier(self.config, cache=cache)
+        first = classifier.extract_all_entities("Re: CLAIM #ABC123456\n\ninjury reported")
+        second = classifier.extract_all_entities("Re: CLAIM #ABC123456\n\ninjury reported")
+        self.assertEqual(first, second)
+        metrics = cache.metrics()
+        self.assertEqual(metrics['hits'], 1)
+        self.assertEqual(metrics['misses'], 1)
+    def test_whitespace_variants_are_cached_separately(self):
+        config = {"entity_extraction": {"entities": {"name": {"patterns": ["([A-Z][a-z]+ [A-Z][a-z]+)"]}}}}
+        classifier = EntityClassifier(config, cache=ExtractionCache(config))
+        self.assertEqual(classifier.extract_all_entities("Jane\nDoe"), {"name": []})
+        self.assertEqual(classifier.extract_all_entities("Jane Doe"), {"name": ["Jane Doe"]})
+        batch = classifier.classify_batch(pd.DataFrame({"body_text": ["Jane\nDoe", "Jane Doe", "Jane Doe"]}))
+        self.assertEqual(list(batch["name"]), [[], ["Jane Doe"], ["Jane Doe"]])
+    def test_lru_eviction(self):
+        cache = ExtractionCache(self.config, max_entries=2)
+        for body in ("a", "b", "c"):
+            cache.put(cache.key(body), {"body": body})
+        self.assertIsNone(cache.get(cache.key("a")))
+        self.assertEqual(cache.get(cache.key("c")), {"body": "c"})
+        self.assertEqual(cache.metrics()['evictions'], 1)
+    def test_config_change_invalidates(self):
+        cache = ExtractionCache(self.config)
+        key = cache.key("CLAIM #ABC123456")
+        cache.put(key, {"claim_number": ["ABC123456"]})
+        changed = {**self.config, "entity_extraction": {"entities": {}}}
+        self.assertTrue(cache.refresh_config(changed))
+        self.assertNotEqual(cache.key("CLAIM #ABC123456"), key)
+        self.assertEqual(cache.metrics()['entries'], 0)
+    def test_config_file_change_reloads_classifier(self):
+        workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workdir)
+        config_path = Path(workdir) / "config.json"
+        config_path.write_text(json.dumps(self.config))
+        cache = ExtractionCache(
+            self.config, disk_path=str(Path(workdir) / "cache.db"), config_path=str(config_path), config_check_interval=0
+        )
+        self.addCleanup(cache.close)
+        classifier = EntityClassifier(self.config, cache=cache)
+        text = "CLAIM #ABC123456 REF: XYZ98765432"
+        self.assertEqual(classifier.extract_all_entities(text)['claim_number'], ['ABC123456'])
+        changed = json.loads(json.dumps(self.config))
+        changed['entity_extraction']['entities']['claim_number']['patterns'].append("REF[\\s#:-]*([A-Z0-9]{6,12})")
+        config_path.write_text(json.dumps(changed))
+        os.utime(config_path, (time.time() + 10, time.time() + 10))
+        self.assertEqual(classifier.extract_all_entities(text)['claim_number'], ['ABC123456', 'XYZ98765432'])
+        self.assertEqual(cache.metrics()['invalidations'], 1)
+        # A result computed under the old config is not stored under the new version
+        key, version = cache.versioned_key("CLAIM #DEF123456")
+        cache.refresh_config(self.config)
+        cache.put(key, {'claim_number': ['stale']}, version)
+        self.assertIsNone(cache.get(key))
+    def test_classify_batch_uses_cache(self):
+        cache = ExtractionCache(self.config)
+        classifier = EntityClassifier(self.config, cache=cache)
+        df = pd.DataFrame({"body_text": ["CLAIM #ABC123456 injury", "nothing here"]})
+        first = classifier.classify_batch(df)
+        second = classifier.classify_batch(df)
+        self.assertEqual(cache.metrics()['hits'], 2)
+        self.assertEqual(list(first['priority_level']), list(second['priority_level']))
+        self.assertEqual(second.iloc[0]['claim_number'], ['ABC123456'])
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+from contextlib import contextmanager
+from datetime import datetime
+from 10_monitoring.health_metrics import HealthMetricsStore
+from 10_monitoring.monitor_pipeline_health import PipelineHealthMonitor
+from 12_integration.sql_writer import _record_stage_progress
+
+class BatchCursor:
+    """Cursor stand-in that serves one result set per nextset() and records executes"""
+    def __init__(self, result_sets=None):
+        self.result_sets = result_sets or []
+        self.executed = []
+        self._current = 0
+    def execute(self, query, params=None):
+        self.executed.append((query, list(params or [])))
+        self._current = 0
+    def fetchall(self):
+        return self.result_sets[self._current]
+    def nextset(self):
+        self._current += 1
+        return self._current < len(self.result_sets)
+
+class FakeSQLWriter:
+    def __init__(self, result_sets):
+        self.result_sets = result_sets
+        self.checkouts = 0
+        self.last_cursor = None
+    @contextmanager
+    def cursor(self):
+        self.checkouts += 1
+        self.last_cursor = BatchCursor(self.result_sets)
+        yield None, self.last_cursor
+
+HEALTH_RESULT_SETS = [
+    [("email_ingest", "sql_write", "timeout", datetime(2024, 6, 1, 9), 2)],
+    [("entities", 12, 15, datetime(2024, 6, 1, 3)), ("triage", 0, 4, datetime(2024, 6, 1, 9))],
+    [("emails", 1000, 1000, datetime(2024, 6, 1, 10)), ("triage", 981, 996, datetime(2024, 6, 1, 10))],
+    [(7, "Claim CLM000007", "CLM000007", "critical", datetime(2024, 6, 1, 2))],
+    [(9,)]
+]
+
+class TestHealthMetricsStore(unittest.TestCase):
+    def setUp(self):
+        self.writer = FakeSQLWriter(HEALTH_RESULT_SETS)
+        self.store = HealthMetricsStore(self.writer, {'monitoring': {'health': {'cache_ttl_seconds': 60}}})
+    def test_single_round_trip_report(self):
+        report = self.store.report()
+        self.assertEqual(self.writer.checkouts, 1)
+        self.assertEqual(len(self.writer.last_cursor.executed), 1)
+        self.assertEqual(report['unprocessed'], {'no_entities': 12, 'no_triage': 0})
+        self.assertEqual(report['backlog']['triage']['pending'], 4)
+        self.assertEqual(report['failures'][0]['count'], 2)
+        self.assertEqual(report['high_risk_pending'][0]['claim_number'], "CLM000007")
+        self.assertEqual(report['high_risk_pending_count'], 9)
+        self.assertEqual(report['watermarks']['triage']['last_email_id'], 996)
+    def test_report_is_cached_until_ttl(self):
+        first = self.store.report()
+        self.assertIs(self.store.report(), first)
+        self.assertEqual(self.writer.checkouts, 1)
+        self.store.report(force_refresh=True)
+        self.assertEqual(self.writer.checkouts, 2)
+        self.store.ttl_seconds = 0
+        self.store.report()
+        self.assertEqual(self.writer.checkouts, 3)
+
+class TestPipelineHealthMonitorChecks(unittest.TestCase):
+    def setUp(self):
+        self.writer = FakeSQLWriter(HEALTH_RESULT_SETS)
+        # Only the health store is needed; skip the logger, SQL pool and notifier set up in __init__
+        self.monitor = PipelineHealthMonitor.__new__(PipelineHealthMonitor)
+        self.monitor.health_metrics = HealthMetricsStore(
+            self.writer, {'monitoring': {'health': {'cache_ttl_seconds': 60}}}
+        )
+    def test_checks_share_the_cached_report(self):
+        self.assertEqual(self.monitor.check_unprocessed_emails(), {'no_entities': 12, 'no_triage': 0})
+        self.assertEqual(self.monitor.check_high_risk_unreviewed()[0]['email_id'], 7)
+        self.assertEqual(self.monitor.check_pipeline_failures()[0]['step'], "sql_write")
+        self.assertEqual(self.monitor.check_pipeline_failures(hours=1), [])
+        self.assertEqual(self.writer.checkouts, 1)
+        with self.assertRaises(ValueError):
+            self.monitor.check_pipeline_failures(hours=48)
+
+class TestStageProgress(unittest.TestCase):
+    TABLES = {
+        'emails': "tbl_claims_emails",
+        'stage_watermarks': "tbl_pipeline_stage_watermarks",
+        'pending_counters': "tbl_pipeline_pending_counters"
+    }
+    def test_noop_without_counter_tables(self):
+        cursor = BatchCursor()
+        _record_stage_progress(cursor, {'emails': "tbl_claims_emails"}, {'emails': [1, 2]}, [('entities', 1, 1)])
+        self.assertEqual(cursor.executed, [])
+    def test_watermarks_and_pending_in_one_pass(self):
+        cursor = BatchCursor()
+        _record_stage_progress(
+            cursor, self.TABLES,
+            {'emails': [5, 9, 7], 'entities': [5, 7], 'triage': []},
+            [('entities', 9, 1), ('triage', 7, 1)]
+        )
+        watermark_query, watermark_params = cursor.executed[0]
+        self.assertIn("MERGE tbl_pipeline_stage_watermarks", watermark_query)
+        self.assertEqual(watermark_params, ['emails', 3, 9, 'entities', 2, 7])
+        self.assertIn("MERGE tbl_pipeline_pending_counters", cursor.executed[1][0])
+        self.assertEqual(cursor.executed[1][1], ['entities', 9, 1, 'triage', 7, 1])
+        self.assertIn("DELETE FROM tbl_pipeline_pending_counters", cursor.executed[2][0])
+    def test_pending_rows_are_chunked(self):
+        cursor = BatchCursor()
+        pending = [('entities', email_id, 1) for email_id in range(1500)]
+        _record_stage_progress(cursor, self.TABLES, {}, pending)
+        merges = [params for query, params in cursor.executed if "MERGE" in query]
+        self.assertEqual([len(params) // 3 for params in merges], [699, 699, 102])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import time
+import threading
+import unittest
+from datetime import datetime
+from 11_jobs.job_runner import CronExpression, JobRunner
+
+class TestCronExpression(unittest.TestCase):
+    def test_steps_lists_and_ranges(self):
+        cron = CronExpression("*/15 8-10,18 * * *")
+        self.assertEqual(cron.minutes, {0, 15, 30, 45})
+        self.assertEqual(cron.hours, {8, 9, 10, 18})
+        self.assertTrue(cron.matches(datetime(2024, 6, 3, 18, 45)))
+        self.assertFalse(cron.matches(datetime(2024, 6, 3, 11, 0)))
+    def test_next_after(self):
+        cron = CronExpression("0 */4 * * *")
+        self.assertEqual(cron.next_after(datetime(2024, 6, 3, 8, 0)), datetime(2024, 6, 3, 12, 0))
+        self.assertEqual(cron.next_after(datetime(2024, 12, 31, 23, 59, 30)), datetime(2025, 1, 1, 0, 0))
+        # 2024-06-03 is a Monday; weekday 0 and 7 are both Sunday
+        self.assertEqual(CronExpression("30 6 * * 7").next_after(datetime(2024, 6, 3)), datetime(2024, 6, 9, 6, 30))
+        self.assertEqual(CronExpression("@monthly").next_after(datetime(2024, 6, 3)), datetime(2024, 7, 1))
+    def test_restricted_day_fields_match_either(self):
+        cron = CronExpression("0 0 1 * 1")
+        self.assertTrue(cron.matches(datetime(2024, 6, 1)))
+        self.assertTrue(cron.matches(datetime(2024, 6, 3)))
+        self.assertFalse(cron.matches(datetime(2024, 6, 4)))
+    def test_invalid_expressions(self):
+        for expression in ("0 * * *", "60 * * * *", "0 0 31 2 *", "*/0 * * * *"):
+            with self.assertRaises(ValueError):
+                CronExpression(expression).next_after(datetime(2024, 6, 3))
+
+class TestJobRunner(unittest.TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+        self.finished = threading.Event()
+        self.calls = []
+        definitions = [
+            {'name': "pipeline", 'schedule': ["0 */4 * * *", "0 8,13,18 * * *"], 'min_interval_minutes': 90},
+            {'name': "health", 'schedule': "0 * * * *"}
+        ]
+        self.runner = JobRunner(definitions, {'pipeline': self.slow_job, 'health': self.failing_job})
+        self.runner.start(datetime(2024, 6, 3, 7, 30))
+    def tearDown(self):
+        self.release.set()
+        self.runner.stop()
+    def slow_job(self):
+        self.calls.append("pipeline")
+        self.release.wait(5)
+        self.finished.set()
+    def failing_job(self):
+        raise RuntimeError("database unavailable")
+    def wait_idle(self, *names):
+        deadline = time.monotonic() + 5
+        while any(self.runner.is_running(name) for name in names or self.runner.jobs) and time.monotonic() < deadline:
+            time.sleep(0.01)
+    def test_overlapping_trigger_is_skipped(self):
+        self.assertEqual(self.runner.tick(datetime(2024, 6, 3, 8, 0, 5)), ["pipeline", "health"])
+        self.assertTrue(self.runner.is_running("pipeline"))
+        # Still running at the 12:00 trigger: skipped, not queued behind the first run
+        self.wait_idle("health")
+        self.assertEqual(self.runner.tick(datetime(2024, 6, 3, 12, 0, 5)), ["health"])
+        self.release.set()
+        self.assertTrue(self.finished.wait(5))
+        self.runner.stop()
+        self.assertEqual(self.calls, ["pipeline"])
+        self.assertEqual(self.runner.stats['runs_skipped'], 1)
+        self.assertEqual(self.runner.history("pipeline")[0]['status'], "success")
+        health = self.runner.history("health")
+        self.assertEqual([run['status'] for run in health], ["failed", "failed"])
+        self.assertEqual(health[0]['error'], "database unavailable")
+        self.assertIn('job_duration_seconds', self.runner.metrics.to_prometheus())
+    def test_missed_triggers_coalesce_and_min_interval_applies(self):
+        self.release.set()
+        # Stalled from 07:30 to 12:10: 08:00 and 12:00 pipeline triggers, five health triggers
+        self.assertEqual(self.runner.tick(datetime(2024, 6, 3, 12, 10)), ["pipeline", "health"])
+        self.assertEqual(self.runner.stats['triggers_coalesced'], 1 + 4)
+        self.wait_idle()
+        # 13:00 comes 50 minutes after the last start, inside min_interval_minutes
+        self.assertEqual(self.runner.tick(datetime(2024, 6, 3, 13, 0)), ["health"])
+        self.wait_idle()
+        self.assertEqual(self.runner.tick(datetime(2024, 6, 3, 16, 0)), ["pipeline", "health"])
+        self.runner.stop()
+        self.assertEqual(self.calls, ["pipeline", "pipeline"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import json
+import queue
+import logging
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from 04_logs.log_utils import CustomFormatter, DroppingQueueHandler, InfoSamplingFilter, LogUtils
+from 04_logs.metrics import MetricsRegistry
+
+class TestLogUtils(unittest.TestCase):
+    def setUp(self):
+        self.log_dir = tempfile.mkdtemp()
+    def tearDown(self):
+        LogUtils.shutdown()
+        shutil.rmtree(self.log_dir)
+    def test_async_json_lines_file(self):
+        logger = LogUtils.setup_logger("test_async_json", log_dir=self.log_dir, json_lines=True, sample_info=False)
+        logger.info("Inserted email ID: %s", 42)
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("write failed")
+        LogUtils.shutdown("test_async_json")
+        lines = (Path(self.log_dir) / "test_async_json.jsonl").read_text().splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual(records[0]["message"], "Inserted email ID: 42")
+        self.assertEqual(records[1]["level"], "ERROR")
+        self.assertEqual(records[1]["message"], "write failed")
+        self.assertIn("ValueError: boom", records[1]["exception"])
+    def test_info_sampling_keeps_warnings(self):
+        sampler = InfoSamplingFilter(burst=3, sample_rate=10)
+        def record(level):
+            return logging.LogRecord("svc", level, "writer.py", 10, "row", None, None)
+        passed = [sampler.filter(record(logging.INFO)) for _ in range(33)]
+        self.assertEqual(sum(passed), 6)
+        self.assertTrue(sampler.filter(record(logging.WARNING)))
+    def test_formatter_is_cached(self):
+        formatter = CustomFormatter()
+        cached = dict(formatter._formatters)
+        info = logging.LogRecord("svc", logging.INFO, "x.py", 1, "hello", None, None)
+        error = logging.LogRecord("svc", logging.ERROR, "x.py", 2, "failed", None, None)
+        self.assertIn("hello", formatter.format(info))
+        self.assertIn("failed", formatter.format(error))
+        for level, instance in cached.items():
+            self.assertIs(formatter._formatters[level], instance)
+    def test_full_queue_drops_only_info(self):
+        written = []
+        fallback = logging.Handler()
+        fallback.emit = written.append
+        metrics = MetricsRegistry()
+        handler = DroppingQueueHandler(queue.Queue(maxsize=1), [fallback], metrics)
+        logger = logging.getLogger("test_full_queue")
+        logger.setLevel(logging.DEBUG)
+        logger.propagate = False
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+        logger.warning("queued")
+        logger.info("dropped")
+        logger.error("written directly")
+        self.assertEqual(handler.queue.get_nowait().getMessage(), "queued")
+        self.assertEqual(handler.dropped, 1)
+        self.assertEqual([record.getMessage() for record in written], ["written directly"])
+        self.assertEqual(metrics.snapshot()['counters']['log_records_dropped'], {'{logger="test_full_queue"}': 1})
+    def test_dropped_count_logged_at_shutdown(self):
+        logger = LogUtils.setup_logger("test_dropped", log_dir=self.log_dir, sample_info=False)
+        logger.handlers[0].dropped = 3
+        LogUtils.shutdown("test_dropped")
+        text = (Path(self.log_dir) / "test_dropped.log").read_text()
+        self.assertIn("3 log records below WARNING were dropped", text)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import json
+import logging
+import unittest
+from 04_logs.log_utils import LogUtils
+from 04_logs.metrics import Histogram, MetricsRegistry
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_histogram_quantiles(self):
+        histogram = Histogram()
+        for value in range(1, 101):
+            histogram.observe(float(value))
+        self.assertAlmostEqual(histogram.quantile(0.5), 50.5)
+        self.assertAlmostEqual(histogram.quantile(0.99), 99.01)
+        self.assertEqual(histogram.count, 100)
+    def test_reservoir_is_bounded(self):
+        histogram = Histogram(max_samples=10)
+        for value in range(1000):
+            histogram.observe(float(value))
+        self.assertEqual(len(histogram.samples), 10)
+        self.assertEqual(histogram.max, 999.0)
+    def test_stage_summary_and_prometheus(self):
+        metrics = MetricsRegistry("claims test")
+        for _ in range(3):
+            with metrics.timer("regex", items=2):
+                pass
+        metrics.set_gauge("queue_depth", 5, stage="download")
+        metrics.set_gauge("queue_depth", 2, stage="download")
+        summary = metrics.stage_summary()["regex"]
+        self.assertEqual(summary["count"], 3)
+        self.assertEqual(summary["items"], 6)
+        self.assertIn("p99_ms", summary)
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot["gauges"]["queue_depth"]['{stage="download"}'], {"value": 2, "peak": 5})
+        text = metrics.to_prometheus()
+        self.assertIn("# TYPE claims_test_stage_items_total counter", text)
+        self.assertIn('claims_test_stage_items_total{stage="regex"} 6', text)
+        self.assertIn('claims_test_stage_duration_seconds{stage="regex",quantile="0.95"}', text)
+        self.assertIn('claims_test_stage_duration_seconds_count{stage="regex"} 3', text)
+    def test_log_pipeline_end_emits_json(self):
+        metrics = MetricsRegistry()
+        with metrics.timer("sql_write", items=4):
+            pass
+        logger = logging.getLogger("test_metrics")
+        with self.assertLogs(logger, level="INFO") as captured:
+            LogUtils.log_pipeline_end(logger, "ingest", {"status": "OK"}, metrics)
+        record = json.loads(captured.records[2].getMessage())
+        self.assertEqual(record["pipeline"], "ingest")
+        self.assertEqual(record["metrics"]["stages"]["sql_write"]["items"], 4)
+
+if __name__ == "__main__":
+    unittest.main()
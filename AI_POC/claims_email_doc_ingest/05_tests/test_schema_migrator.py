@@ -0,0 +1,86 @@
+import shutil
+import tempfile
+import unittest
+from contextlib import contextmanager
+from pathlib import Path
+from 12_integration.schema_migrator import MIGRATIONS_DIR, SchemaMigrator, load_migrations, split_batches
+from 14_benchmarks.query_plan_check import build_local_database, check_index_parity, check_query_plans
+
+class HistoryCursor:
+    """Cursor stand-in that keeps the migration history in memory"""
+    def __init__(self, history):
+        self.history = history
+        self.executed = []
+        self._rows = []
+    def execute(self, query, params=None):
+        self.executed.append(query)
+        if query.startswith("SELECT version, checksum"):
+            self._rows = list(self.history.items())
+        elif query.startswith("INSERT INTO tbl_schema_migrations"):
+            self.history[params[0]] = params[2]
+    def fetchall(self):
+        return self._rows
+
+class FakeSQLWriter:
+    def __init__(self):
+        self.history = {}
+        self.cursors = []
+    @contextmanager
+    def cursor(self):
+        cursor = HistoryCursor(self.history)
+        self.cursors.append(cursor)
+        yield FakeConnection(), cursor
+
+class FakeConnection:
+    def commit(self):
+        pass
+
+class TestSchemaMigrator(unittest.TestCase):
+    def setUp(self):
+        self.migrations_dir = tempfile.mkdtemp()
+        Path(self.migrations_dir, "V001__tables.sql").write_text("CREATE TABLE a (id INT);\nGO\nCREATE TABLE b (id INT);\n")
+        Path(self.migrations_dir, "V002__indexes.sql").write_text("CREATE INDEX idx_a ON a (id);\n")
+    def tearDown(self):
+        shutil.rmtree(self.migrations_dir)
+    def test_split_batches_on_go_lines(self):
+        self.assertEqual(split_batches("SELECT 1;\ngo\n\nSELECT 2; -- GOOD\n"), ["SELECT 1;", "SELECT 2; -- GOOD"])
+    def test_repo_migrations_are_ordered_and_unique(self):
+        versions = [migration['version'] for migration in load_migrations()]
+        self.assertEqual(versions, list(range(1, len(versions) + 1)))
+        self.assertTrue(all(migration['batches'] for migration in load_migrations(str(MIGRATIONS_DIR))))
+    def test_migrate_applies_pending_once(self):
+        writer = FakeSQLWriter()
+        migrator = SchemaMigrator(writer, self.migrations_dir)
+        self.assertEqual(migrator.migrate(target_version=1), [1])
+        self.assertIn("CREATE TABLE b (id INT);", writer.cursors[-1].executed)
+        self.assertEqual(migrator.migrate(), [2])
+        self.assertEqual(migrator.migrate(), [])
+    def test_edited_migration_is_reported(self):
+        migrator = SchemaMigrator(FakeSQLWriter(), self.migrations_dir)
+        migrator.migrate()
+        Path(self.migrations_dir, "V001__tables.sql").write_text("CREATE TABLE a (id BIGINT);\n")
+        with self.assertRaises(ValueError):
+            migrator.pending()
+
+class TestQueryPlans(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.conn = build_local_database(rows=5000)
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.close()
+    def test_hot_queries_use_their_indexes(self):
+        results = check_query_plans(self.conn)
+        self.assertEqual([r['query'] for r in results if r['regressed']], [])
+    def test_dropped_index_is_a_regression(self):
+        conn = build_local_database(rows=500)
+        conn.execute("DROP INDEX idx_processing_log_failed")
+        failures = {r['query']: r for r in check_query_plans(conn)}['pipeline_failures']
+        self.assertTrue(failures['regressed'])
+        self.assertEqual(failures['full_scans'], ['tbl_processing_log'])
+        conn.close()
+    def test_local_indexes_exist_in_migrations(self):
+        self.assertEqual(check_index_parity(), [])
+
+if __name__ == '__main__':
+    unittest.main()
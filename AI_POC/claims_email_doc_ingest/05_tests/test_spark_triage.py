@@ -0,0 +1,77 @@
+import unittest
+import importlib.util
+
+PYSPARK_AVAILABLE = importlib.util.find_spec("pyspark") is not None
+
+CONFIG = {
+    "entity_extraction": {"entities": {"claim_number": {"patterns": ["CLAIM[\\s#:-]*([A-Z0-9]{6,12})"]}}},
+    "classification": {
+        "priority_levels": {"high": ["injury"], "low": ["inquiry"]},
+        "claim_types": {"auto": ["car"], "property": ["fire"]}
+    },
+    "triage_rules": {"high_risk_indicators": ["fatality"]}
+}
+
+@unittest.skipUnless(PYSPARK_AVAILABLE, "pyspark is not installed")
+class TestSparkTriage(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        from pyspark.sql import SparkSession
+        cls.spark = (
+            SparkSession.builder.master("local[2]")
+            .appName("test_spark_triage")
+            .config("spark.sql.shuffle.partitions", "2")
+            .getOrCreate()
+        )
+    @classmethod
+    def tearDownClass(cls):
+        cls.spark.stop()
+    def test_matches_driver_classify_batch(self):
+        import pandas as pd
+        from 02_pipelines.pipeline_spark_triage import triage_dataframe
+        from 07_models.entity_classifier import EntityClassifier
+        bodies = ["CLAIM #ABC123456 car injury", "fire inquiry", "fatality in car", None]
+        emails = self.spark.createDataFrame(
+            pd.DataFrame({"message_id": ["a", "b", "c", "d"], "body_text": bodies})
+        ).repartition(2)
+        rows = {row["message_id"]: row for row in triage_dataframe(self.spark, emails, CONFIG, normalize=False).collect()}
+        expected = EntityClassifier(CONFIG).classify_batch(pd.DataFrame({"body_text": bodies}))
+        for message_id, (_, row) in zip("abcd", expected.iterrows()):
+            self.assertEqual(rows[message_id]["priority_level"], row["priority_level"])
+            self.assertEqual(rows[message_id]["claim_type"], row["claim_type"])
+            self.assertEqual(rows[message_id]["high_risk"], bool(row["high_risk"]))
+            self.assertEqual(list(rows[message_id]["claim_number"]), list(row["claim_number"]))
+    def test_normalized_triage_reads_quoted_history(self):
+        import pandas as pd
+        from 02_pipelines.pipeline_spark_triage import triage_dataframe
+        body = (
+            "Please see below.\n\nOn Mon, Mar 11, 2024 at 9:00 AM Bob <bob@example.com> wrote:\n"
+            "> CLAIM #ZZZ999999 fatality in car"
+        )
+        emails = self.spark.createDataFrame(pd.DataFrame({
+            "message_id": ["a"], "body_text": [body], "claim_number": ["UPSTREAM"]
+        }))
+        triaged = triage_dataframe(self.spark, emails, CONFIG)
+        self.assertEqual(len(triaged.columns), len(set(triaged.columns)))
+        [row] = triaged.collect()
+        self.assertTrue(row["high_risk"])
+        self.assertEqual(row["claim_type"], "auto")
+        self.assertEqual(list(row["claim_number"]), ["ZZZ999999"])
+    def test_run_writes_partitioned_parquet(self):
+        import os
+        import json
+        import tempfile
+        from 02_pipelines.pipeline_spark_triage import run_spark_triage
+        with tempfile.TemporaryDirectory() as tmp:
+            input_path = os.path.join(tmp, "emails.json")
+            with open(input_path, "w") as f:
+                for i, body in enumerate(["car injury", "fire inquiry", "car inquiry"]):
+                    f.write(json.dumps({"message_id": str(i), "body_text": body}) + "\n")
+            config = {**CONFIG, "spark_triage": {"partition_by": ["priority_level"], "num_partitions": 2}}
+            summary = run_spark_triage(self.spark, config, input_path, os.path.join(tmp, "out"))
+            self.assertEqual(summary["emails_triaged"], 3)
+            self.assertEqual(summary["by_priority"], {"high": 1, "low": 2})
+            self.assertTrue(os.path.isdir(os.path.join(tmp, "out", "priority_level=high")))
+
+if __name__ == "__main__":
+    unittest.main()
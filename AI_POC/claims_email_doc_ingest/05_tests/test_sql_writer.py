@@ -0,0 +1,235 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+import pandas as pd
+from 12_integration.sql_writer import SQLWriter, _record_triage_rollup
+from 12_integration.connection_pool import ConnectionPool, PoolTimeoutError
+from 14_benchmarks.sqlite_tsql import BUNDLE_SCHEMA, TSQLiteConnection
+
+class TestSQLWriterBulkInsert(unittest.TestCase):
+    def setUp(self):
+        handle, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            "CREATE TABLE tbl_extracted_entities ("
+            "email_id INTEGER NOT NULL, claim_number TEXT, claim_amount REAL)"
+        )
+        conn.commit()
+        conn.close()
+        self.writer = SQLWriter(self.db_path, connection_factory=sqlite3.connect)
+    def tearDown(self):
+        self.writer.close()
+        os.remove(self.db_path)
+    def fetch_rows(self):
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute(
+            "SELECT email_id, claim_number, claim_amount FROM tbl_extracted_entities ORDER BY email_id"
+        ).fetchall()
+        conn.close()
+        return rows
+    def test_bulk_insert_chunks(self):
+        df = pd.DataFrame({
+            "id": [1, 2, 3, 4, 5],
+            "claim_number": ["ABC123456", None, "XYZ987654", "CLM000001", "CLM000002"],
+            "claim_amount": [1500.5, 200.0, None, 10.0, 99.99]
+        })
+        counts = self.writer.bulk_insert_dataframe(
+            df, "tbl_extracted_entities", chunk_size=2, column_map={"id": "email_id"}
+        )
+        self.assertEqual(counts, [2, 2, 1])
+        rows = self.fetch_rows()
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[1], (2, None, 200.0))
+        self.assertEqual(rows[2], (3, "XYZ987654", None))
+    def test_failed_chunk_keeps_committed_chunks(self):
+        df = pd.DataFrame({
+            "email_id": [1, 2, None],
+            "claim_number": ["A", "B", "C"]
+        })
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.writer.bulk_insert_dataframe(df, "tbl_extracted_entities", chunk_size=2)
+        self.assertEqual([row[0] for row in self.fetch_rows()], [1, 2])
+    def test_writes_reuse_pooled_connection(self):
+        df = pd.DataFrame({"email_id": [1], "claim_number": ["A"]})
+        for _ in range(3):
+            self.writer.bulk_insert_dataframe(df, "tbl_extracted_entities")
+        metrics = self.writer.pool_metrics()
+        self.assertEqual(metrics['created'], 1)
+        self.assertEqual(metrics['checkouts'], 3)
+        self.assertEqual(metrics['in_use'], 0)
+
+def bundle(index, entities=True, triage=True, attachments=0):
+    return {
+        'email': {'message_id': f"<msg-{index}@claims.example>", 'subject': f"Claim {index}", 'from': "broker@example.com"},
+        'entities': {'claim_number': f"CLM{index:08d}", 'claim_amount': "$1,500.00", 'extraction_method': 'regex'}
+        if entities else None,
+        'triage': {'priority_level': 'high', 'claim_type': 'auto', 'risk_level': 'standard'} if triage else None,
+        'attachments': [{'filename': f"doc{index}_{n}.pdf"} for n in range(attachments)]
+    }
+
+class TestPersistEmailBundles(unittest.TestCase):
+    def setUp(self):
+        handle, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript(BUNDLE_SCHEMA)
+        conn.close()
+        self.writer = SQLWriter(self.db_path, connection_factory=TSQLiteConnection)
+    def tearDown(self):
+        self.writer.close()
+        os.remove(self.db_path)
+    def query(self, sql):
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute(sql).fetchall()
+        conn.close()
+        return rows
+    def test_multi_chunk_batch_maps_ids_back_by_message_id(self):
+        # 450 emails need three INSERT statements at 209 rows each
+        bundles = [bundle(i, attachments=i % 3) for i in range(450)]
+        email_ids = self.writer.persist_email_bundles(bundles)
+        self.assertEqual(len(set(email_ids)), 450)
+        stored = dict(self.query("SELECT id, message_id FROM tbl_claims_emails"))
+        self.assertEqual([stored[email_id] for email_id in email_ids], [b['email']['message_id'] for b in bundles])
+        claims = dict(self.query("SELECT email_id, claim_number FROM tbl_extracted_entities"))
+        self.assertEqual(claims[email_ids[321]], "CLM00000321")
+        self.assertEqual(self.query("SELECT COUNT(*) FROM tbl_triage_results"), [(450,)])
+        self.assertEqual(self.query("SELECT COUNT(*) FROM tbl_attachments"), [(sum(i % 3 for i in range(450)),)])
+        # claim_amount_value comes with the V007 rollup migration, so it is left alone without 'triage_rollup'
+        self.assertEqual(self.query("SELECT DISTINCT claim_amount_value FROM tbl_extracted_entities"), [(None,)])
+    def test_amount_value_written_only_with_triage_rollup(self):
+        entities = bundle(0)['entities']
+        self.writer.insert_entities(1, entities)
+        self.writer.insert_entities(2, entities, tables={'triage_rollup': "tbl_triage_daily_rollup"})
+        self.assertEqual(
+            self.query("SELECT email_id, claim_amount, claim_amount_value FROM tbl_extracted_entities ORDER BY email_id"),
+            [(1, "$1,500.00", None), (2, "$1,500.00", 1500.0)]
+        )
+    def test_missing_or_duplicate_message_id_is_rejected(self):
+        missing = bundle(1)
+        missing['email']['message_id'] = None
+        for bundles in ([bundle(0), missing], [bundle(2), bundle(2)]):
+            with self.assertRaises(ValueError):
+                self.writer.persist_email_bundles(bundles)
+        self.assertEqual(self.query("SELECT COUNT(*) FROM tbl_claims_emails"), [(0,)])
+    def test_bundles_without_entities_or_triage(self):
+        email_ids = self.writer.persist_email_bundles([
+            bundle(0, entities=False, triage=False), bundle(1, triage=False), bundle(2, entities=False), bundle(3)
+        ])
+        entity_ids = {row[0] for row in self.query("SELECT email_id FROM tbl_extracted_entities")}
+        triage_ids = {row[0] for row in self.query("SELECT email_id FROM tbl_triage_results")}
+        self.assertEqual(entity_ids, {email_ids[1], email_ids[3]})
+        self.assertEqual(triage_ids, {email_ids[2], email_ids[3]})
+    def test_retried_batch_reuses_stored_emails(self):
+        first = self.writer.persist_email_bundles([bundle(0, attachments=1), bundle(1)])
+        second = self.writer.persist_email_bundles([bundle(1), bundle(2), bundle(0, attachments=1)])
+        self.assertEqual([second[0], second[2]], [first[1], first[0]])
+        self.assertEqual(self.query("SELECT COUNT(*) FROM tbl_claims_emails"), [(3,)])
+        self.assertEqual(self.query("SELECT COUNT(*) FROM tbl_extracted_entities"), [(3,)])
+        self.assertEqual(self.query("SELECT COUNT(*) FROM tbl_attachments"), [(1,)])
+    def test_insert_email_returns_stored_id_for_duplicate(self):
+        [stored] = self.writer.persist_email_bundles([bundle(0)])
+        self.assertEqual(self.writer.insert_email(bundle(0)['email']), stored)
+        self.assertEqual(self.query("SELECT COUNT(*) FROM tbl_claims_emails"), [(1,)])
+        # Legacy emails without a message_id are outside the unique index
+        first = self.writer.insert_email({'subject': "no id"})
+        second = self.writer.insert_email({'subject': "no id either"})
+        self.assertNotEqual(first, second)
+        self.assertEqual(self.query("SELECT COUNT(*) FROM tbl_claims_emails WHERE message_id IS NULL"), [(2,)])
+
+class RecordingCursor:
+    def __init__(self):
+        self.executed = []
+    def execute(self, query, params=None):
+        self.executed.append((query, list(params or [])))
+
+class TestTriageRollup(unittest.TestCase):
+    def test_rows_merge_once_per_group(self):
+        cursor = RecordingCursor()
+        rows = [
+            (("auto", "standard", False), 1500.0),
+            (("auto", "standard", False), None),
+            (("auto", "high", True), 250000.0),
+            (("auto", "standard", False), 500.0)
+        ]
+        _record_triage_rollup(cursor, {'triage_rollup': "tbl_triage_daily_rollup"}, rows)
+        self.assertEqual(len(cursor.executed), 1)
+        query, params = cursor.executed[0]
+        self.assertIn("MERGE tbl_triage_daily_rollup", query)
+        self.assertEqual(params, [
+            "auto", "standard", False, 3, 2, 2000.0,
+            "auto", "high", True, 1, 1, 250000.0
+        ])
+    def test_noop_without_rollup_table(self):
+        cursor = RecordingCursor()
+        _record_triage_rollup(cursor, {}, [(("auto", "standard", False), 10.0)])
+        self.assertEqual(cursor.executed, [])
+
+class TestConnectionPool(unittest.TestCase):
+    def connect(self):
+        return sqlite3.connect(":memory:", check_same_thread=False)
+    def test_pool_is_bounded(self):
+        pool = ConnectionPool(self.connect, max_size=1, timeout=0.05)
+        pooled = pool.acquire()
+        with self.assertRaises(PoolTimeoutError):
+            pool.acquire()
+        pool.release(pooled)
+        self.assertIs(pool.acquire(), pooled)
+        self.assertEqual(pool.metrics()['timeouts'], 1)
+    def test_waiter_gets_released_connection(self):
+        pool = ConnectionPool(self.connect, max_size=1, timeout=5)
+        pooled = pool.acquire()
+        acquired = []
+        waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+        waiter.start()
+        pool.release(pooled)
+        waiter.join(5)
+        self.assertEqual(acquired, [pooled])
+    def test_unhealthy_connection_is_replaced(self):
+        pool = ConnectionPool(self.connect, max_size=2, health_check_interval=0)
+        with pool.connection() as conn:
+            pass
+        conn.close()
+        with pool.connection() as replacement:
+            self.assertIsNot(replacement, conn)
+        metrics = pool.metrics()
+        self.assertEqual(metrics['health_check_failures'], 1)
+        self.assertEqual(metrics['created'], 2)
+    def test_lifetime_recycling(self):
+        pool = ConnectionPool(self.connect, max_size=2, max_lifetime_seconds=0)
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            self.assertIsNot(first, second)
+        self.assertEqual(pool.metrics()['size'], 0)
+    def test_uncommitted_work_is_rolled_back_on_release(self):
+        pool = ConnectionPool(self.connect, max_size=1)
+        with pool.connection() as conn:
+            conn.execute("CREATE TABLE t (x INTEGER)")
+            conn.commit()
+            conn.execute("INSERT INTO t VALUES (1)")
+        with pool.connection() as again:
+            self.assertIs(again, conn)
+            self.assertFalse(again.in_transaction)
+            self.assertEqual(again.execute("SELECT COUNT(*) FROM t").fetchone()[0], 0)
+    def test_base_exception_returns_slot(self):
+        pool = ConnectionPool(self.connect, max_size=1, timeout=0.05)
+        with self.assertRaises(KeyboardInterrupt):
+            with pool.connection():
+                raise KeyboardInterrupt
+        self.assertEqual(pool.metrics()['in_use'], 0)
+        with pool.connection():
+            pass
+    def test_failed_rollback_discards_connection(self):
+        pool = ConnectionPool(self.connect, max_size=1)
+        with pool.connection() as conn:
+            conn.close()
+        metrics = pool.metrics()
+        self.assertEqual((metrics['size'], metrics['idle'], metrics['in_use']), (0, 0, 0))
+        with pool.connection() as replacement:
+            self.assertIsNot(replacement, conn)
+
+if __name__ == "__main__":
+    unittest.main()
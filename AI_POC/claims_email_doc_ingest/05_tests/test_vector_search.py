@@ -0,0 +1,83 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+import numpy as np
+from 08_rag_kb.vector_search import KnowledgeBase, VectorIndex, sync_embedding_cache, write_embedding_cache
+from 12_integration.sql_writer import SQLWriter
+
+class TestVectorSearch(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        rng = np.random.default_rng(0)
+        # 20 well-separated clusters of 50 passages each
+        centers = rng.normal(size=(20, 32))
+        self.vectors = np.repeat(centers, 50, axis=0) + rng.normal(scale=0.05, size=(1000, 32))
+        rows = [(i + 1, f"passage {i}", self.vectors[i].astype('<f4').tobytes()) for i in range(1000)]
+        write_embedding_cache(rows, self.cache_dir)
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+    def test_exact_search_ranks_passages(self):
+        index = VectorIndex.from_cache(self.cache_dir, block_size=128)
+        self.assertIsInstance(index.matrix, np.memmap)
+        results = index.search(self.vectors[[3, 700]], k=5)
+        self.assertEqual([hits[0]['id'] for hits in results], [4, 701])
+        self.assertAlmostEqual(results[0][0]['score'], 1.0, places=4)
+        scores = [hit['score'] for hit in results[1]]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertEqual([hit['rank'] for hit in results[1]], [1, 2, 3, 4, 5])
+    def test_ivf_matches_exact_top_hit(self):
+        index = VectorIndex.from_cache(self.cache_dir)
+        index.build_ivf(nlist=20, cache_dir=self.cache_dir)
+        reloaded = VectorIndex.from_cache(self.cache_dir)
+        self.assertIsNotNone(reloaded.ivf)
+        queries = self.vectors[::97]
+        exact = [hits[0]['id'] for hits in reloaded.search(queries, k=1)]
+        approximate = [hits[0]['id'] for hits in reloaded.search(queries, k=1, nprobe=2)]
+        self.assertEqual(exact, approximate)
+    def make_writer(self, count: int = 100):
+        handle, db_path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE kb_embeddings (id INTEGER PRIMARY KEY, text TEXT, embedding BLOB)")
+        conn.executemany(
+            "INSERT INTO kb_embeddings (id, text, embedding) VALUES (?, ?, ?)",
+            [(i + 1, f"passage {i}", self.vectors[i].astype('<f4').tobytes()) for i in range(count)]
+        )
+        conn.commit()
+        conn.close()
+        self.addCleanup(os.remove, db_path)
+        writer = SQLWriter(db_path, connection_factory=sqlite3.connect)
+        self.addCleanup(writer.close)
+        return writer
+    def test_sync_from_sql_and_query(self):
+        writer = self.make_writer()
+        meta = sync_embedding_cache(writer, self.cache_dir, fetch_size=30)
+        self.assertEqual(meta, {'count': 100, 'dim': 32})
+        kb = KnowledgeBase({"rag_kb": {"cache_dir": self.cache_dir, "top_k": 3}}, lambda texts: self.vectors[[10] * len(texts)])
+        hits = kb.query("water damage to ceiling")
+        self.assertEqual(len(hits), 3)
+        self.assertEqual(hits[0]['text'], "passage 10")
+    def test_failed_refresh_keeps_previous_cache(self):
+        def rows():
+            yield 1, "new passage", self.vectors[0].astype('<f4').tobytes()
+            raise ConnectionError("connection reset")
+        with self.assertRaises(ConnectionError):
+            write_embedding_cache(rows(), self.cache_dir)
+        self.assertEqual(sorted(os.listdir(self.cache_dir)), ["embeddings.f32", "ids.npy", "meta.json", "texts.json"])
+        index = VectorIndex.from_cache(self.cache_dir)
+        self.assertEqual(index.matrix.shape, (1000, 32))
+        self.assertEqual(index.texts[0], "passage 0")
+    def test_missing_cache_is_built_on_start(self):
+        cache_dir = os.path.join(self.cache_dir, "missing")
+        config = {"rag_kb": {"cache_dir": cache_dir, "refresh_on_start": False}}
+        embed = lambda texts: self.vectors[[10] * len(texts)]
+        with self.assertRaises(FileNotFoundError):
+            KnowledgeBase(config, embed)
+        kb = KnowledgeBase(config, embed, sql_writer=self.make_writer())
+        self.assertEqual(kb.index.matrix.shape, (100, 32))
+        self.assertEqual(kb.query("water damage")[0]['text'], "passage 10")
+
+if __name__ == "__main__":
+    unittest.main()
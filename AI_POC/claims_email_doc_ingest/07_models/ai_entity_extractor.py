@@ -1,13 +1,298 @@
+import re
+import json
+import time
+import random
+import asyncio
 from typing import Dict, List, Optional
+import aiohttp
+from 12_integration.email_parser import EmailParser
+from 12_integration.http_utils import retry_after_seconds
+
+_JSON_BLOCK = re.compile(r'(\{.*\}|\[.*\])', re.DOTALL)
+# Rough prompt-size estimate used for token budgeting before the API reports usage
+CHARS_PER_TOKEN = 4
+
+class AIRequestError(Exception):
+    """Raised when the model API keeps failing after all retries"""
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+class _RetryableResponse(Exception):
+    def __init__(self, status: int, retry_after: Optional[float]):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+class TokenBucket:
+    """Async token bucket refilled continuously at capacity_per_minute"""
+    def __init__(self, capacity_per_minute: float):
+        self.capacity = float(capacity_per_minute)
+        self.tokens = self.capacity
+        self.rate = self.capacity / 60.0
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    async def acquire(self, amount: float = 1.0) -> float:
+        """Wait until amount tokens are available and take them; returns the seconds waited"""
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = (amount - self.tokens) / self.rate
+                waited += delay
+                await asyncio.sleep(delay)
+    def reset(self):
+        """Drop the lock bound to the current event loop; the remaining tokens are kept"""
+        self._lock = asyncio.Lock()
+    def refund(self, amount: float):
+        if amount > 0:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + amount)
 
 class AIEntityExtractor:
-    """Extract entities using Claude AI or GenAI"""
-    def __init__(self, api_key: str, config: Dict, logger=None):
+    """Extract entities using Claude AI or GenAI
+
+    Requests share one pooled aiohttp session, at most max_concurrency are in
+    flight, and request/token budgets are enforced by token buckets sized from
+    ai_config (requests_per_minute, tokens_per_minute; each request reserves
+    its estimated prompt tokens plus max_tokens and is reconciled against the
+    reported usage). 429 and 5xx responses are retried with exponential
+    backoff and full jitter, honouring Retry-After.
+    """
+    def __init__(self, api_key: str, config: Dict, logger=None, cache=None, session: Optional[aiohttp.ClientSession] = None):
         self.api_key = api_key
         self.config = config
         self.logger = logger
+        # Optional ExtractionCache: identical bodies are only sent to the model once
+        self.cache = cache
+        ai_config = config.get('ai_config', {})
+        self.endpoint = ai_config.get('endpoint')
+        self.model = ai_config.get('model')
+        self.max_tokens = ai_config.get('max_tokens', 4000)
+        self.temperature = ai_config.get('temperature', 0.0)
+        self.max_concurrency = ai_config.get('max_concurrency', 8)
+        self.max_retries = ai_config.get('max_retries', 5)
+        self.backoff_base = ai_config.get('backoff_base_seconds', 1.0)
+        self.backoff_max = ai_config.get('backoff_max_seconds', 60.0)
+        self.request_timeout = ai_config.get('request_timeout_seconds', 120)
+        self.batch_max_chars = ai_config.get('batch_max_chars', 6000)
+        self.batch_max_emails = ai_config.get('batch_max_emails', 5)
+        self.request_bucket = TokenBucket(ai_config.get('requests_per_minute', 50))
+        self.token_bucket = TokenBucket(ai_config.get('tokens_per_minute', 80000))
+        self._session = session
+        self._owns_session = session is None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.stats = {
+            'requests': 0, 'retries': 0, 'failures': 0, 'batch_fallbacks': 0, 'input_tokens': 0, 'output_tokens': 0
+        }
+    async def __aenter__(self):
+        return self
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+    async def close(self):
+        if self._session is not None and self._owns_session:
+            await self._session.close()
+        self._session = None
+        # The semaphore and bucket locks bind to the running loop; a later asyncio.run gets fresh ones
+        self._semaphore = None
+        self.request_bucket.reset()
+        self.token_bucket.reset()
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+                headers={
+                    'x-api-key': self.api_key,
+                    'anthropic-version': '2023-06-01',
+                    'content-type': 'application/json'
+                }
+            )
+            self._owns_session = True
+        return self._session
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+    def entity_fields(self) -> List[str]:
+        entities = self.config.get('entity_extraction', {}).get('entities', {})
+        return [name for name, entity_config in entities.items() if entity_config.get('ai_extract', True)]
+    @staticmethod
+    def _email_text(email_content: Dict) -> str:
+        return f"Subject: {email_content.get('subject', '')}\n\n{EmailParser.content_text(email_content)}"
+    def build_prompt(self, emails: List[Dict], fields: List[str]) -> str:
+        field_list = ", ".join(fields)
+        if len(emails) == 1:
+            return (
+                "Extract the following fields from this insurance claims email: "
+                f"{field_list}. Reply with a single JSON object using exactly those keys "
+                "and null for anything not present.\n\n"
+                f"{self._email_text(emails[0])}"
+            )
+        sections = "\n\n".join(
+            f"### Email {index}\n{self._email_text(email)}" for index, email in enumerate(emails)
+        )
+        return (
+            "Extract the following fields from each insurance claims email below: "
+            f"{field_list}. Reply with a JSON array containing one object per email, "
+            "each with an \"index\" key matching the email number plus exactly those "
+            "field keys, using null for anything not present.\n\n"
+            f"{sections}"
+        )
+    @staticmethod
+    def _parse_json(body: Dict):
+        text = "".join(block.get('text', '') for block in body.get('content', []) if block.get('type') == 'text')
+        match = _JSON_BLOCK.search(text)
+        if not match:
+            raise ValueError("Model response did not contain JSON")
+        return json.loads(match.group(1))
+    def _backoff_delay(self, attempt: int, retry_after: Optional[float]) -> float:
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        return max(delay, retry_after or 0.0)
+    async def _post(self, prompt: str) -> Dict:
+        payload = {
+            'model': self.model,
+            'max_tokens': self.max_tokens,
+            'temperature': self.temperature,
+            'messages': [{'role': 'user', 'content': prompt}]
+        }
+        reserved = len(prompt) / CHARS_PER_TOKEN + self.max_tokens
+        session = self._get_session()
+        for attempt in range(self.max_retries + 1):
+            await self.request_bucket.acquire(1)
+            await self.token_bucket.acquire(reserved)
+            try:
+                async with self._get_semaphore():
+                    self.stats['requests'] += 1
+                    async with session.post(self.endpoint, json=payload) as response:
+                        if response.status == 429 or response.status >= 500:
+                            raise _RetryableResponse(
+                                response.status, retry_after_seconds(response.headers.get('retry-after'))
+                            )
+                        if response.status >= 400:
+                            raise AIRequestError(
+                                f"Model API returned {response.status}: {await response.text()}", response.status
+                            )
+                        body = await response.json(content_type=None)
+                usage = body.get('usage', {})
+                used = usage.get('input_tokens', 0) + usage.get('output_tokens', 0)
+                self.stats['input_tokens'] += usage.get('input_tokens', 0)
+                self.stats['output_tokens'] += usage.get('output_tokens', 0)
+                if used:
+                    self.token_bucket.refund(reserved - used)
+                return body
+            except (_RetryableResponse, aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                status = getattr(e, 'status', None)
+                if attempt == self.max_retries:
+                    self.stats['failures'] += 1
+                    if self.logger:
+                        self.logger.error(f"Model API request failed after {attempt + 1} attempts: {str(e)}")
+                    raise AIRequestError(f"Model API request failed: {str(e)}", status) from e
+                delay = self._backoff_delay(attempt, getattr(e, 'retry_after', None))
+                self.stats['retries'] += 1
+                if self.logger:
+                    self.logger.warning(f"Model API {str(e)}; retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
     async def extract_entities_from_email(self, email_content: Dict) -> Dict:
-        # Placeholder for async GenAI/Claude API call
-        # Use ai_parse or Azure OpenAI as per config
-        # Return extracted entities as dict
-        return {}
+        if self.cache is not None:
+            text = f"{email_content.get('subject', '')}\n{EmailParser.content_text(email_content)}"
+            return await self.cache.aget_or_compute(text, lambda: self._extract(email_content), 'ai')
+        return await self._extract(email_content)
+    async def extract_fields(self, email_content: Dict, fields: List[str]) -> Dict:
+        """Extract only the given fields, with a prompt listing just those"""
+        if self.cache is not None:
+            text = f"{email_content.get('subject', '')}\n{EmailParser.content_text(email_content)}"
+            namespace = 'ai:' + ','.join(sorted(fields))
+            return await self.cache.aget_or_compute(text, lambda: self._extract(email_content, fields), namespace)
+        return await self._extract(email_content, fields)
+    async def _extract(self, email_content: Dict, fields: Optional[List[str]] = None) -> Dict:
+        fields = fields or self.entity_fields()
+        body = await self._post(self.build_prompt([email_content], fields))
+        result = self._parse_json(body)
+        if isinstance(result, list):
+            result = result[0] if result else {}
+        if not isinstance(result, dict):
+            raise ValueError("Model response was not a JSON object")
+        return {field: result.get(field) for field in fields}
+    def _batch_groups(self, emails: List[Dict]) -> List[List[int]]:
+        # Pack short emails into shared requests; long ones go alone
+        groups, current, current_chars = [], [], 0
+        for index, email in enumerate(emails):
+            size = len(self._email_text(email))
+            if size > self.batch_max_chars:
+                groups.append([index])
+                continue
+            if current and (current_chars + size > self.batch_max_chars or len(current) >= self.batch_max_emails):
+                groups.append(current)
+                current, current_chars = [], 0
+            current.append(index)
+            current_chars += size
+        if current:
+            groups.append(current)
+        return groups
+    async def _extract_group(self, emails: List[Dict], fields: List[str]) -> List[Optional[Dict]]:
+        """Per-email results; None where the model's array had no usable entry for that index"""
+        if len(emails) == 1:
+            return [await self._extract(emails[0], fields)]
+        body = await self._post(self.build_prompt(emails, fields))
+        try:
+            parsed = self._parse_json(body)
+        except ValueError:
+            parsed = None
+        by_index = {}
+        if isinstance(parsed, list):
+            for item in parsed:
+                if isinstance(item, dict) and type(item.get('index')) is int and 0 <= item['index'] < len(emails):
+                    by_index.setdefault(item['index'], item)
+        return [
+            {field: by_index[i].get(field) for field in fields} if i in by_index else None
+            for i in range(len(emails))
+        ]
+    def _store(self, results: List[Optional[Dict]], keys: Dict, index: int, entities: Dict):
+        results[index] = entities
+        if index in keys:
+            key, version = keys[index]
+            self.cache.put(key, entities, version)
+    async def extract_entities_batch(self, emails: List[Dict]) -> List[Dict]:
+        """Extract entities for many emails concurrently, packing short emails into shared requests"""
+        fields = self.entity_fields()
+        results: List[Optional[Dict]] = [None] * len(emails)
+        keys = {}
+        pending = []
+        for index, email in enumerate(emails):
+            if self.cache is not None:
+                key, version = self.cache.versioned_key(f"{email.get('subject', '')}\n{EmailParser.content_text(email)}", 'ai')
+                cached = self.cache.get(key)
+                if cached is not None:
+                    results[index] = cached
+                    continue
+                keys[index] = (key, version)
+            pending.append(index)
+        groups = self._batch_groups([emails[i] for i in pending])
+        group_results = await asyncio.gather(*(
+            self._extract_group([emails[pending[i]] for i in group], fields) for group in groups
+        ))
+        missing = []
+        for group, extracted in zip(groups, group_results):
+            for i, entities in zip(group, extracted):
+                if entities is None:
+                    missing.append(pending[i])
+                else:
+                    self._store(results, keys, pending[i], entities)
+        if missing:
+            # Entries the shared request dropped or mangled are asked for one email at a time
+            self.stats['batch_fallbacks'] += len(missing)
+            if self.logger:
+                self.logger.warning(f"Model response missed {len(missing)} email(s); retrying them individually")
+            retried = await asyncio.gather(*(self._extract(emails[index], fields) for index in missing))
+            for index, entities in zip(missing, retried):
+                self._store(results, keys, index, entities)
+        return results
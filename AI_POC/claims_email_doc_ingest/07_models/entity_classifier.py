@@ -1,38 +1,311 @@
 import re
+import json
 from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+_BACKREFERENCE = re.compile(r'\\[1-9]|\(\?P=')
+_ENGINE_CACHE: Dict[str, "CompiledEntityExtractor"] = {}
+_MATCHER_CACHE: Dict[str, "KeywordMatcher"] = {}
+
+class CompiledEntityExtractor:
+    """Entity extraction engine with every pattern compiled once from the entity_extraction config
+
+    One scan over the text visits each position where any pattern matches:
+    every pattern is an optional lookahead of a single expression, so all
+    patterns are tried at the same position in one pass. Per-pattern
+    bookkeeping then keeps a hit only if it starts at or after the end of that
+    pattern's previous hit, which is exactly what re.findall returns for the
+    pattern alone. Patterns of the same or different entities may therefore
+    match overlapping text ("CLM1234567" and "1234567", "POL12345678" inside
+    "CLAIM #POL12345678") and all of those matches are kept. Configs whose
+    patterns cannot be merged safely (named groups, backreferences, global
+    flags) are scanned one pattern at a time.
+    """
+    def __init__(self, entity_patterns: Dict):
+        self.entity_patterns = entity_patterns
+        self.compiled = {
+            entity: [re.compile(p) for p in entity_config.get('patterns', [])]
+            for entity, entity_config in entity_patterns.items()
+        }
+        # (entity, position in the entity's pattern list, pattern) in scanner order
+        self._slots: List[Tuple[str, int, re.Pattern]] = [
+            (entity, position, pattern)
+            for entity, patterns in self.compiled.items()
+            for position, pattern in enumerate(patterns)
+        ]
+        self.scanner = self._build_scanner()
+    def _build_scanner(self) -> Optional[re.Pattern]:
+        if not self._slots:
+            return None
+        for _, _, pattern in self._slots:
+            if pattern.groupindex or _BACKREFERENCE.search(pattern.pattern) or pattern.flags != re.UNICODE:
+                return None
+        # The leading lookahead lets the regex engine skip positions where nothing matches
+        gate = "(?=" + "|".join(f"(?:{pattern.pattern})" for _, _, pattern in self._slots) + ")"
+        probes = "".join(f"(?:(?=(?P<_p{i}>{pattern.pattern})))?" for i, (_, _, pattern) in enumerate(self._slots))
+        try:
+            return re.compile(gate + probes)
+        except re.error:
+            return None
+    @staticmethod
+    def _findall_value(match: re.Match, first_group: int, group_count: int):
+        # Mirror re.findall: whole match without groups, the group with one, a tuple with several
+        if group_count == 0:
+            return match.group(first_group - 1)
+        if group_count == 1:
+            return match.group(first_group) or ''
+        return tuple(match.group(i) or '' for i in range(first_group, first_group + group_count))
+    def extract_entity(self, text: str, entity_name: str) -> List[str]:
+        # A single entity is cheaper to scan on its own patterns than with the combined scanner
+        results = []
+        for pattern in self.compiled.get(entity_name, []):
+            results.extend(pattern.findall(text))
+        return results
+    def extract(self, text: str) -> Dict[str, List]:
+        if self.scanner is None:
+            return {entity: self.extract_entity(text, entity) for entity in self.compiled}
+        hits: List[Optional[List]] = [[] for _ in self._slots]
+        next_start = [0] * len(self._slots)
+        groupindex = self.scanner.groupindex
+        for match in self.scanner.finditer(text):
+            position = match.start()
+            for i, (_, _, pattern) in enumerate(self._slots):
+                group = groupindex[f"_p{i}"]
+                end = match.end(group)
+                if end < 0 or position < next_start[i] or hits[i] is None:
+                    continue
+                if end == position:
+                    # findall's handling of empty matches is not reproducible here; rescan this pattern
+                    hits[i] = None
+                    continue
+                hits[i].append(self._findall_value(match, group + 1, pattern.groups))
+                next_start[i] = end
+        results = {entity: [] for entity in self.compiled}
+        for i, (entity, _, pattern) in enumerate(self._slots):
+            results[entity].extend(pattern.findall(text) if hits[i] is None else hits[i])
+        return results
+    def extract_series(self, bodies: pd.Series) -> Dict[str, pd.Series]:
+        """Vectorized extract(): one Series of match lists per entity, aligned to bodies"""
+        # Rows without a text body get empty lists, like extract() on a body without matches
+        rows = [self.extract(body) if isinstance(body, str) else None for body in bodies]
+        return {
+            entity: pd.Series([row[entity] if row else [] for row in rows], index=bodies.index, dtype=object)
+            for entity in self.compiled
+        }
+
+class KeywordMatcher:
+    """Keyword automaton for the classification and triage keyword lists
+
+    A single lowercase pass and a single scan of the body report every keyword
+    occurrence, including keywords nested in longer ones ("injury" inside
+    "severe injury"), for all keyword groups at once.
+    """
+    def __init__(self, groups: Dict[str, Dict[str, List[str]]]):
+        self.groups = groups
+        self._targets: Dict[str, List[Tuple[str, str]]] = {}
+        for group, labels in groups.items():
+            for label, keywords in labels.items():
+                for kw in keywords:
+                    keyword = kw.lower()
+                    if keyword and (group, label) not in self._targets.setdefault(keyword, []):
+                        self._targets[keyword].append((group, label))
+        keywords = sorted(self._targets, key=len, reverse=True)
+        # The lookahead reports the longest keyword starting at every position;
+        # shorter keywords sharing that start are expanded from the prefix table.
+        self._expansions = {
+            keyword: [other for other in keywords if keyword.startswith(other)]
+            for keyword in keywords
+        }
+        self.scanner = (
+            re.compile("(?=(" + "|".join(re.escape(k) for k in keywords) + "))")
+            if keywords else None
+        )
+    def scan(self, text: str) -> Dict[str, Dict[str, Dict]]:
+        """Return {group: {label: {'count', 'offsets', 'keywords'}}} for every hit in text
+
+        Offsets refer to positions in the lowercased text.
+        """
+        hits = {group: {} for group in self.groups}
+        if self.scanner is None or not text:
+            return hits
+        for match in self.scanner.finditer(text.lower()):
+            start = match.start()
+            for keyword in self._expansions[match.group(1)]:
+                for group, label in self._targets[keyword]:
+                    entry = hits[group].setdefault(label, {'count': 0, 'offsets': [], 'keywords': {}})
+                    entry['count'] += 1
+                    entry['offsets'].append(start)
+                    entry['keywords'][keyword] = entry['keywords'].get(keyword, 0) + 1
+        return hits
+
+def _config_key(section) -> str:
+    return json.dumps(section, sort_keys=True, default=str)
+
+def get_extraction_engine(entity_patterns: Dict) -> CompiledEntityExtractor:
+    """Return the compiled engine for an entity config, building it on first use"""
+    key = _config_key(entity_patterns)
+    engine = _ENGINE_CACHE.get(key)
+    if engine is None:
+        engine = CompiledEntityExtractor(entity_patterns)
+        _ENGINE_CACHE[key] = engine
+    return engine
+
+def get_keyword_matcher(config: Dict) -> KeywordMatcher:
+    """Return the keyword matcher for the classification/triage config, building it on first use"""
+    classification = config.get('classification', {})
+    groups = {
+        'priority': classification.get('priority_levels', {}),
+        'claim_type': classification.get('claim_types', {}),
+        'high_risk': {'high_risk': config.get('triage_rules', {}).get('high_risk_indicators', [])}
+    }
+    key = _config_key(groups)
+    matcher = _MATCHER_CACHE.get(key)
+    if matcher is None:
+        matcher = KeywordMatcher(groups)
+        _MATCHER_CACHE[key] = matcher
+    return matcher
+
+def _label_confidence(group_hits: Dict[str, Dict], label: str) -> float:
+    # Share of the group's keyword hits that belong to the chosen label
+    total = sum(entry['count'] for entry in group_hits.values())
+    return round(group_hits[label]['count'] / total, 4) if total else 0.0
 
 class EntityClassifier:
     """Classify and extract entities from text"""
-    def __init__(self, config: Dict):
+    def __init__(self, config: Dict, cache=None):
+        # Optional ExtractionCache shared by extract_all_entities and classify_all
+        self.cache = cache
+        self.reload_config(config)
+        if cache is not None:
+            # A config change the cache picks up must also reach the compiled patterns
+            cache.add_listener(self.reload_config)
+    def reload_config(self, config: Dict):
         self.config = config
         self.entity_patterns = config.get('entity_extraction', {}).get('entities', {})
+        self.extraction_engine = get_extraction_engine(self.entity_patterns)
+        self.keyword_matcher = get_keyword_matcher(config)
     def extract_with_patterns(self, text: str, entity_name: str) -> List[str]:
-        entity_config = self.entity_patterns.get(entity_name, {})
-        patterns = entity_config.get('patterns', [])
-        results = []
-        for pattern in patterns:
-            matches = re.findall(pattern, text)
-            results.extend(matches)
-        return results
+        return self.extraction_engine.extract_entity(text, entity_name)
     def extract_all_entities(self, text: str) -> Dict[str, any]:
-        extracted = {}
-        for entity in self.entity_patterns:
-            extracted[entity] = self.extract_with_patterns(text, entity)
-        return extracted
-    def classify_priority(self, text: str, config: Dict) -> Tuple[str, float]:
+        if self.cache is not None:
+            return self.cache.get_or_compute(text, lambda: self.extraction_engine.extract(text), 'regex')
+        return self.extraction_engine.extract(text)
+    def _matcher_for(self, config: Dict) -> KeywordMatcher:
+        if config is self.config:
+            return self.keyword_matcher
+        return get_keyword_matcher(config)
+    def _pick_priority(self, hits: Dict, config: Dict) -> Tuple[str, float]:
+        # Levels are listed from most to least severe: the first level with a hit wins
         levels = config.get('classification', {}).get('priority_levels', {})
-        for level, keywords in levels.items():
-            for kw in keywords:
-                if kw.lower() in text.lower():
-                    return level, 1.0
+        group_hits = hits['priority']
+        for level in levels:
+            if level in group_hits:
+                return level, _label_confidence(group_hits, level)
         return 'low', 0.5
-    def classify_claim_type(self, text: str, config: Dict) -> Tuple[str, float]:
+    def _pick_claim_type(self, hits: Dict, config: Dict) -> Tuple[str, float]:
+        # Most keyword hits wins, ties go to the type listed first in the config
         types = config.get('classification', {}).get('claim_types', {})
-        for claim_type, keywords in types.items():
-            for kw in keywords:
-                if kw.lower() in text.lower():
-                    return claim_type, 1.0
-        return 'other', 0.5
+        group_hits = hits['claim_type']
+        best = None
+        for claim_type in types:
+            if claim_type in group_hits and (best is None or group_hits[claim_type]['count'] > group_hits[best]['count']):
+                best = claim_type
+        if best is None:
+            return 'other', 0.5
+        return best, _label_confidence(group_hits, best)
+    def classify_all(self, text: str, config: Optional[Dict] = None) -> Dict:
+        """Priority, claim type and high-risk flag from a single keyword scan"""
+        if self.cache is not None and (config is None or config is self.config):
+            return self.cache.get_or_compute(text, lambda: self._classify_all(text, self.config), 'triage')
+        return self._classify_all(text, self.config if config is None else config)
+    def _classify_all(self, text: str, config: Dict) -> Dict:
+        hits = self._matcher_for(config).scan(text)
+        priority, priority_conf = self._pick_priority(hits, config)
+        claim_type, claim_conf = self._pick_claim_type(hits, config)
+        return {
+            'priority_level': priority,
+            'priority_confidence': priority_conf,
+            'claim_type': claim_type,
+            'claim_type_confidence': claim_conf,
+            'high_risk': bool(hits['high_risk']),
+            'keyword_hits': hits
+        }
+    def classify_batch(self, df: pd.DataFrame, text_column: str = 'body_text') -> pd.DataFrame:
+        """Vectorized triage of a DataFrame of email bodies
+
+        Returns a frame aligned to df.index with one list column per entity plus
+        priority_level, priority_confidence, claim_type, claim_type_confidence
+        and high_risk, matching classify_all()/extract_all_entities() per row.
+        """
+        all_bodies = df[text_column].fillna('').astype(str)
+        # Forwarded/replied copies share a body: triage each distinct body once, then broadcast
+        codes, _ = pd.factorize(all_bodies)
+        _, first_rows = np.unique(codes, return_index=True)
+        bodies = all_bodies.iloc[first_rows].reset_index(drop=True)
+        if self.cache is None or not len(bodies):
+            result = self._classify_bodies(bodies)
+        else:
+            result = self._classify_bodies_cached(bodies)
+        result = result.iloc[codes]
+        result.index = df.index
+        return result
+    def _classify_bodies_cached(self, bodies: pd.Series) -> pd.DataFrame:
+        # Only bodies missing from the cache go through the vectorized pass
+        keyed = [self.cache.versioned_key(body, 'batch') for body in bodies]
+        rows = [self.cache.get(key) for key, _ in keyed]
+        missing = [i for i, row in enumerate(rows) if row is None]
+        if missing:
+            computed = self._classify_bodies(bodies.iloc[missing].reset_index(drop=True))
+            for i, row in zip(missing, computed.to_dict('records')):
+                key, version = keyed[i]
+                self.cache.put(key, row, version)
+                rows[i] = row
+        return pd.DataFrame(rows)
+    def _classify_bodies(self, bodies: pd.Series) -> pd.DataFrame:
+        lowered = bodies.str.lower()
+        result = pd.DataFrame(self.extraction_engine.extract_series(bodies), index=bodies.index)
+        classification = self.config.get('classification', {})
+        result['priority_level'], result['priority_confidence'] = self._batch_labels(
+            lowered, classification.get('priority_levels', {}), 'low', first_hit_wins=True)
+        result['claim_type'], result['claim_type_confidence'] = self._batch_labels(
+            lowered, classification.get('claim_types', {}), 'other', first_hit_wins=False)
+        indicators = self.config.get('triage_rules', {}).get('high_risk_indicators', [])
+        if indicators:
+            pattern = "|".join(re.escape(kw.lower()) for kw in indicators if kw)
+            result['high_risk'] = lowered.str.contains(pattern, regex=True).to_numpy(dtype=bool)
+        else:
+            result['high_risk'] = np.zeros(len(bodies), dtype=bool)
+        return result
+    @staticmethod
+    def _keyword_counts(lowered: pd.Series, labels: Dict[str, List[str]]) -> np.ndarray:
+        # (rows x labels) matrix of keyword occurrences, counted per keyword like
+        # KeywordMatcher: "work" and "workplace" at one position are two hits
+        counts = np.zeros((len(lowered), len(labels)), dtype=np.int64)
+        for column, keywords in enumerate(labels.values()):
+            for keyword in dict.fromkeys(kw.lower() for kw in keywords if kw):
+                pattern = "(?=" + re.escape(keyword) + ")"
+                counts[:, column] += lowered.str.count(pattern).to_numpy(dtype=np.int64)
+        return counts
+    def _batch_labels(self, lowered: pd.Series, labels: Dict[str, List[str]], default: str,
+                      first_hit_wins: bool) -> Tuple[np.ndarray, np.ndarray]:
+        # Same decision rules as _pick_priority (first_hit_wins) and _pick_claim_type
+        n_rows = len(lowered)
+        if not labels:
+            return np.full(n_rows, default, dtype=object), np.full(n_rows, 0.5)
+        counts = self._keyword_counts(lowered, labels)
+        has_hit = counts > 0
+        chosen = has_hit.argmax(axis=1) if first_hit_wins else counts.argmax(axis=1)
+        matched = has_hit.any(axis=1)
+        chosen_counts = counts[np.arange(n_rows), chosen]
+        totals = np.maximum(counts.sum(axis=1), 1)
+        names = np.array(list(labels), dtype=object)
+        label_values = np.where(matched, names[chosen], default)
+        confidence = np.where(matched, np.round(chosen_counts / totals, 4), 0.5)
+        return label_values, confidence
+    def classify_priority(self, text: str, config: Dict) -> Tuple[str, float]:
+        return self._pick_priority(self._matcher_for(config).scan(text), config)
+    def classify_claim_type(self, text: str, config: Dict) -> Tuple[str, float]:
+        return self._pick_claim_type(self._matcher_for(config).scan(text), config)
     def is_high_risk(self, text: str, config: Dict) -> bool:
-        indicators = config.get('triage_rules', {}).get('high_risk_indicators', [])
-        return any(kw.lower() in text.lower() for kw in indicators)
+        return bool(self._matcher_for(config).scan(text)['high_risk'])
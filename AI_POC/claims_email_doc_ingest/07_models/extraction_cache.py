@@ -0,0 +1,173 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Config sections whose changes alter extraction or triage output
+VERSIONED_SECTIONS = ('entity_extraction', 'classification', 'triage_rules', 'ai_config')
+
+def config_version(config: Dict) -> str:
+    versioned = {section: config.get(section) for section in VERSIONED_SECTIONS}
+    return hashlib.sha256(json.dumps(versioned, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+
+class ExtractionCache:
+    """Content-addressed cache for regex, triage and AI extraction results
+
+    Keys are sha256(namespace + config version + exact body), so identical
+    bodies repeated across forwarded/replied threads share one entry, and any
+    change to the extraction, classification, triage or AI config sections
+    produces new keys. Bodies are not normalized before hashing because
+    patterns may match on whitespace, so cached values are always the ones
+    computed on that exact text. Entries live in an in-memory LRU with an optional SQLite file
+    tier. When config_path is given the file is re-checked every
+    config_check_interval seconds and a changed config invalidates the cache
+    and is handed to every add_listener() callback, so owners such as
+    EntityClassifier rebuild their patterns before computing again. Results
+    computed under a superseded version are not stored. Cached values are
+    shared between callers and must be treated as read-only.
+    """
+    def __init__(
+        self,
+        config: Dict,
+        max_entries: int = 10000,
+        disk_path: Optional[str] = None,
+        config_path: Optional[str] = None,
+        config_check_interval: float = 5.0,
+        logger=None
+    ):
+        self.max_entries = max_entries
+        self.config_path = config_path
+        self.config_check_interval = config_check_interval
+        self.logger = logger
+        self.config = config
+        self.version = config_version(config)
+        self._listeners: List[Callable[[Dict], None]] = []
+        self._config_mtime = os.path.getmtime(config_path) if config_path else None
+        self._next_config_check = time.monotonic() + config_check_interval
+        self._memory: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'memory_hits': 0, 'disk_hits': 0, 'evictions': 0, 'invalidations': 0}
+        self._disk = None
+        if disk_path:
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False)
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS extraction_cache ("
+                "cache_key TEXT PRIMARY KEY, config_version TEXT NOT NULL, "
+                "value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._prune_disk()
+    def _prune_disk(self):
+        # Entries written under another config version can never be hit again
+        self._disk.execute("DELETE FROM extraction_cache WHERE config_version != ?", (self.version,))
+        self._disk.commit()
+    def refresh_config(self, config: Dict) -> bool:
+        """Adopt a new config; returns True when its version changed and the cache was invalidated"""
+        version = config_version(config)
+        with self._lock:
+            if version == self.version:
+                return False
+            self.config = config
+            self.version = version
+            self._memory.clear()
+            self._stats['invalidations'] += 1
+            if self._disk is not None:
+                self._prune_disk()
+        for listener in list(self._listeners):
+            listener(config)
+        if self.logger:
+            self.logger.info(f"Extraction config changed, cache invalidated (version {version})")
+        return True
+    def add_listener(self, callback: Callable[[Dict], None]):
+        """Call callback(config) whenever a config change invalidates the cache"""
+        self._listeners.append(callback)
+    def _check_config_file(self):
+        if not self.config_path or time.monotonic() < self._next_config_check:
+            return
+        self._next_config_check = time.monotonic() + self.config_check_interval
+        mtime = os.path.getmtime(self.config_path)
+        if mtime != self._config_mtime:
+            self._config_mtime = mtime
+            with open(self.config_path, 'r') as f:
+                self.refresh_config(json.load(f))
+    def key(self, text: str, namespace: str = 'regex') -> str:
+        self._check_config_file()
+        return self._key(text, namespace, self.version)
+    @staticmethod
+    def _key(text: str, namespace: str, version: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(f"{namespace}\x00{version}\x00".encode('utf-8'))
+        digest.update((text or '').encode('utf-8'))
+        return digest.hexdigest()
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._stats['hits'] += 1
+                self._stats['memory_hits'] += 1
+                return self._memory[key]
+            if self._disk is not None:
+                row = self._disk.execute(
+                    "SELECT value FROM extraction_cache WHERE cache_key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value = json.loads(row[0])
+                    self._remember(key, value)
+                    self._stats['hits'] += 1
+                    self._stats['disk_hits'] += 1
+                    return value
+            self._stats['misses'] += 1
+            return None
+    def _remember(self, key: str, value: Any):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats['evictions'] += 1
+    def put(self, key: str, value: Any, version: Optional[str] = None):
+        """Store value; skipped when version is given and the config has moved on since"""
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            self._remember(key, value)
+            if self._disk is not None:
+                self._disk.execute(
+                    "INSERT OR REPLACE INTO extraction_cache (cache_key, config_version, value, created_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, self.version, json.dumps(value, default=str), time.time())
+                )
+                self._disk.commit()
+    def versioned_key(self, text: str, namespace: str = 'regex') -> tuple:
+        """(key, version) for a body; pass the version back to put()"""
+        self._check_config_file()
+        version = self.version
+        return self._key(text, namespace, version), version
+    def get_or_compute(self, text: str, compute: Callable[[], Any], namespace: str = 'regex') -> Any:
+        key, version = self.versioned_key(text, namespace)
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value, version)
+        return value
+    async def aget_or_compute(self, text: str, compute: Callable[[], Awaitable[Any]], namespace: str = 'ai') -> Any:
+        key, version = self.versioned_key(text, namespace)
+        value = self.get(key)
+        if value is None:
+            value = await compute()
+            self.put(key, value, version)
+        return value
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'entries': len(self._memory),
+                'hit_rate': round(self._stats['hits'] / lookups, 4) if lookups else 0.0
+            }
+    def close(self):
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
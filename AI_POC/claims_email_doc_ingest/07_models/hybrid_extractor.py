@@ -0,0 +1,135 @@
+import asyncio
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+from 07_models.entity_classifier import EntityClassifier
+from 12_integration.email_parser import EmailParser
+
+class HybridEntityExtractor:
+    """Regex-first entity extraction with per-field confidence and AI fallback
+
+    The compiled regex pass runs first and every field is scored: no match is
+    0.0, a single distinct value is 1.0, and k competing values score 1/k for
+    the most frequent one. Only fields flagged required and ai_extract in the
+    entity config whose score is below confidence_threshold are sent to the
+    model, in a prompt listing just those fields. The result records which
+    method produced each field, and ai_error when the model call failed.
+    """
+    def __init__(self, config: Dict, classifier: Optional[EntityClassifier] = None, ai_extractor=None, logger=None):
+        self.config = config
+        self.classifier = classifier or EntityClassifier(config)
+        self.ai_extractor = ai_extractor
+        self.logger = logger
+        entity_config = config.get('entity_extraction', {})
+        self.entities = entity_config.get('entities', {})
+        hybrid = entity_config.get('hybrid', {})
+        self.confidence_threshold = hybrid.get('confidence_threshold', 0.75)
+        self.ai_field_confidence = hybrid.get('ai_field_confidence', 0.8)
+    @staticmethod
+    def score_values(values: List) -> Tuple[Optional[str], float]:
+        if not values:
+            return None, 0.0
+        counts = Counter(values)
+        value, _ = counts.most_common(1)[0]
+        return value, round(1.0 / len(counts), 4)
+    def fields_needing_ai(self, field_confidence: Dict[str, float]) -> List[str]:
+        return [
+            name for name, entity in self.entities.items()
+            if entity.get('required') and entity.get('ai_extract')
+            and field_confidence.get(name, 0.0) < self.confidence_threshold
+        ]
+    def _summarize(self, result: Dict) -> Dict:
+        methods = set(result['field_methods'].values()) - {'none'}
+        if methods == {'ai'}:
+            result['extraction_method'] = 'ai'
+        elif 'ai' in methods:
+            result['extraction_method'] = 'hybrid'
+        else:
+            result['extraction_method'] = 'regex'
+        required = [name for name, entity in self.entities.items() if entity.get('required')] or list(self.entities)
+        scores = [result['field_confidence'].get(name, 0.0) for name in required]
+        result['confidence_score'] = round(sum(scores) / len(scores), 4) if scores else 0.0
+        return result
+    def regex_stage(self, text: str, history: str = '') -> Dict:
+        """Regex extraction and scoring; ai_fields_requested lists what the AI stage should fill
+
+        Fields with no match in text are looked up in history (the quoted
+        reply chain) before being handed to the model.
+        """
+        extracted = self._regex_matches(text, history)
+        result = {'field_methods': {}, 'field_confidence': {}}
+        for name in self.entities:
+            value, confidence = self.score_values(extracted.get(name, []))
+            result[name] = value
+            result['field_methods'][name] = 'regex' if value is not None else 'none'
+            result['field_confidence'][name] = confidence
+        result['ai_fields_requested'] = self.fields_needing_ai(result['field_confidence'])
+        return self._summarize(result)
+    def _regex_matches(self, text: str, history: str = '') -> Dict[str, List]:
+        extracted = self.classifier.extract_all_entities(text)
+        if history and any(not extracted.get(name) for name in self.entities):
+            earlier = self.classifier.extract_all_entities(history)
+            extracted = {name: extracted.get(name) or earlier.get(name, []) for name in self.entities}
+        return extracted
+    def triage_bodies(self, bodies: pd.Series) -> pd.DataFrame:
+        """Vectorized regex matches and triage of raw bodies, from the same text build_email_bundle uses
+
+        Returns classify_batch()'s columns aligned to bodies. Entity match lists
+        come from each body's new-content view, falling back per field to its
+        quoted history; triage runs on the view plus the history.
+        """
+        emails = [{'body_view': EmailParser.normalize_body(body)} for body in bodies.fillna('').astype(str)]
+        result = self.classifier.classify_batch(
+            pd.DataFrame({'body_text': [self.triage_text(email) for email in emails]}, index=bodies.index)
+        )
+        matches = [self._regex_matches(self.email_text(email), self.history_text(email)) for email in emails]
+        for name in self.entities:
+            result[name] = pd.Series([row.get(name, []) for row in matches], index=bodies.index, dtype=object)
+        return result
+    async def ai_stage(self, email_content: Dict, result: Dict) -> Dict:
+        fields = result.get('ai_fields_requested') or []
+        if not fields or self.ai_extractor is None:
+            return result
+        try:
+            ai_values = await self.ai_extractor.extract_fields(email_content, fields)
+            filled = {name: ai_values[name] for name in fields if ai_values.get(name) not in (None, '')}
+        except Exception as e:
+            # Keep the regex result; the email can still be persisted and reviewed
+            if self.logger:
+                self.logger.error(f"AI fallback failed for fields {fields}: {str(e)}")
+            result['ai_error'] = str(e) or type(e).__name__
+            return result
+        for name, value in filled.items():
+            result[name] = value
+            result['field_methods'][name] = 'ai'
+            result['field_confidence'][name] = self.ai_field_confidence
+        return self._summarize(result)
+    @staticmethod
+    def email_text(email_content: Dict) -> str:
+        return "\n".join(part for part in (email_content.get('subject'), EmailParser.content_text(email_content)) if part)
+    @staticmethod
+    def history_text(email_content: Dict) -> str:
+        return (email_content.get('body_view') or {}).get('quoted_text', '')
+    @staticmethod
+    def triage_text(email_content: Dict) -> str:
+        """New content plus quoted history; a forward's risk usually sits in the quoted part"""
+        parts = (HybridEntityExtractor.email_text(email_content), HybridEntityExtractor.history_text(email_content))
+        return "\n".join(part for part in parts if part)
+    async def extract(self, email_content: Dict) -> Dict:
+        result = self.regex_stage(self.email_text(email_content), self.history_text(email_content))
+        return await self.ai_stage(email_content, result)
+    async def extract_batch(self, emails: List[Dict]) -> List[Dict]:
+        results = [self.regex_stage(self.email_text(email), self.history_text(email)) for email in emails]
+        return await self.complete_batch(emails, results)
+    async def complete_batch(self, emails: List[Dict], results: List[Dict]) -> List[Dict]:
+        """Run the AI stage for the results that requested fields; concurrency is bounded by the AI extractor
+
+        A result whose model call failed keeps its regex values and carries ai_error.
+        """
+        if self.ai_extractor is None:
+            return results
+        pending = [i for i, result in enumerate(results) if result.get('ai_fields_requested')]
+        completed = await asyncio.gather(*(self.ai_stage(emails[i], results[i]) for i in pending))
+        for i, result in zip(pending, completed):
+            results[i] = result
+        return results
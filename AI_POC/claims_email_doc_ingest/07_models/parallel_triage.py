@@ -0,0 +1,84 @@
+import os
+import multiprocessing
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import pandas as pd
+from 07_models.entity_classifier import EntityClassifier
+
+# Per-process classifier, built once by the pool initializer
+_WORKER_CLASSIFIER: Optional[EntityClassifier] = None
+
+def _init_worker(config: Dict):
+    global _WORKER_CLASSIFIER
+    _WORKER_CLASSIFIER = EntityClassifier(config)
+
+def _triage_chunk(chunk: Tuple[int, List[str]]) -> Tuple[int, List[Dict]]:
+    start, bodies = chunk
+    frame = _WORKER_CLASSIFIER.classify_batch(pd.DataFrame({'body_text': bodies}))
+    return start, frame.to_dict('records')
+
+def _chunks(bodies: Iterable[str], chunk_size: int) -> Iterator[Tuple[int, List[str]]]:
+    iterator = iter(bodies)
+    start = 0
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+class ParallelTriageExecutor:
+    """Shard batch triage across a process pool
+
+    Each worker builds its EntityClassifier (compiled patterns and keyword
+    matcher) once in the pool initializer; afterwards only chunks of bodies
+    and result rows cross the process boundary. Chunks run through the
+    vectorized classify_batch and stream back in input order (ordered) or
+    as they finish. Settings come from config['parallel_triage']; with one
+    worker everything runs in-process on the given classifier.
+    """
+    def __init__(self, config: Dict, classifier: Optional[EntityClassifier] = None, logger=None):
+        self.config = config
+        self.logger = logger
+        settings = config.get('parallel_triage', {})
+        self.max_workers = settings.get('max_workers') or os.cpu_count() or 1
+        self.chunk_size = settings.get('chunk_size', 500)
+        self.ordered = settings.get('ordered', True)
+        self.start_method = settings.get('start_method')
+        self.classifier = classifier
+        self._pool = None
+    def __enter__(self):
+        return self
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    def _get_pool(self):
+        if self._pool is None:
+            context = multiprocessing.get_context(self.start_method)
+            self._pool = context.Pool(self.max_workers, initializer=_init_worker, initargs=(self.config,))
+            if self.logger:
+                self.logger.info(f"Started triage pool with {self.max_workers} workers")
+        return self._pool
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+    def iter_chunks(self, bodies: Iterable[str], ordered: Optional[bool] = None) -> Iterator[Tuple[int, List[Dict]]]:
+        """Yield (start_index, rows) per chunk; rows match EntityClassifier.classify_batch columns"""
+        ordered = self.ordered if ordered is None else ordered
+        chunks = _chunks(bodies, self.chunk_size)
+        if self.max_workers <= 1:
+            classifier = self.classifier or EntityClassifier(self.config)
+            for start, chunk in chunks:
+                yield start, classifier.classify_batch(pd.DataFrame({'body_text': chunk})).to_dict('records')
+            return
+        pool = self._get_pool()
+        mapper = pool.imap if ordered else pool.imap_unordered
+        yield from mapper(_triage_chunk, chunks)
+    def triage_dataframe(self, df: pd.DataFrame, text_column: str = 'body_text') -> pd.DataFrame:
+        """Parallel equivalent of EntityClassifier.classify_batch, aligned to df.index"""
+        rows: List[Optional[Dict]] = [None] * len(df)
+        bodies = df[text_column].fillna('').astype(str)
+        for start, chunk_rows in self.iter_chunks(bodies, ordered=False):
+            rows[start:start + len(chunk_rows)] = chunk_rows
+        return pd.DataFrame(rows, index=df.index)
@@ -0,0 +1,228 @@
+# Vector similarity search over the RAG knowledge base
+import os
+import json
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+import numpy as np
+
+# kb_embeddings.embedding holds little-endian float32 vectors
+EMBEDDING_DTYPE = np.dtype('<f4')
+MATRIX_FILE = "embeddings.f32"
+IDS_FILE = "ids.npy"
+TEXTS_FILE = "texts.json"
+META_FILE = "meta.json"
+IVF_FILE = "ivf.npz"
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+def _top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Column indices and values of the k highest scores per row, best first"""
+    k = min(k, scores.shape[1])
+    if k == 0:
+        empty = np.empty((scores.shape[0], 0))
+        return empty.astype(np.int64), empty
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    values = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-values, axis=1, kind='stable')
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(values, order, axis=1)
+
+def write_embedding_cache(rows: Iterable[Tuple[int, str, bytes]], cache_dir: str) -> Dict:
+    """Stream (id, text, embedding bytes) rows into the local cache, unit-normalized
+
+    The matrix file is a raw contiguous float32 array, so VectorIndex can
+    memory-map it without copying. Everything is written to .tmp files and
+    moved into place only once the stream completes, meta.json last, so a
+    failed refresh leaves the previous cache untouched.
+    """
+    path = Path(cache_dir)
+    path.mkdir(parents=True, exist_ok=True)
+    staged = {name: path / f"{name}.tmp" for name in (MATRIX_FILE, IDS_FILE, TEXTS_FILE, META_FILE)}
+    ids, texts, dim = [], [], None
+    try:
+        with open(staged[MATRIX_FILE], 'wb') as matrix_file:
+            for row_id, text, blob in rows:
+                vector = np.frombuffer(blob, dtype=EMBEDDING_DTYPE)
+                if dim is None:
+                    dim = vector.size
+                elif vector.size != dim:
+                    raise ValueError(f"Embedding {row_id} has dimension {vector.size}, expected {dim}")
+                matrix_file.write(_normalize(vector.astype(np.float32)).astype(EMBEDDING_DTYPE).tobytes())
+                ids.append(row_id)
+                texts.append(text)
+        with open(staged[IDS_FILE], 'wb') as ids_file:
+            np.save(ids_file, np.asarray(ids, dtype=np.int64))
+        staged[TEXTS_FILE].write_text(json.dumps(texts), encoding='utf-8')
+        meta = {'count': len(ids), 'dim': dim or 0}
+        staged[META_FILE].write_text(json.dumps(meta))
+    except BaseException:
+        for staged_path in staged.values():
+            staged_path.unlink(missing_ok=True)
+        raise
+    # Without meta.json a reader fails cleanly instead of pairing old metadata with new data
+    (path / META_FILE).unlink(missing_ok=True)
+    for name in (MATRIX_FILE, IDS_FILE, TEXTS_FILE):
+        os.replace(staged[name], path / name)
+    (path / IVF_FILE).unlink(missing_ok=True)
+    os.replace(staged[META_FILE], path / META_FILE)
+    return meta
+
+def sync_embedding_cache(sql_writer, cache_dir: str, table_name: str = "kb_embeddings", fetch_size: int = 10000) -> Dict:
+    """Refresh the local cache from the embeddings table in one streamed read"""
+    def rows():
+        with sql_writer.cursor() as (conn, cursor):
+            cursor.execute(f"SELECT id, text, embedding FROM {table_name} WHERE embedding IS NOT NULL ORDER BY id")
+            while True:
+                batch = cursor.fetchmany(fetch_size)
+                if not batch:
+                    return
+                for row_id, text, blob in batch:
+                    yield row_id, text, bytes(blob)
+    return write_embedding_cache(rows(), cache_dir)
+
+class IVFIndex:
+    """Inverted-file index: spherical k-means centroids with rows grouped by nearest centroid"""
+    def __init__(self, centroids: np.ndarray, order: np.ndarray, offsets: np.ndarray):
+        self.centroids = centroids
+        self.order = order
+        self.offsets = offsets
+    @classmethod
+    def build(cls, matrix: np.ndarray, nlist: int, iterations: int = 10, sample_size: int = 100000,
+              seed: int = 0, block_size: int = 65536) -> "IVFIndex":
+        rng = np.random.default_rng(seed)
+        count = matrix.shape[0]
+        nlist = max(1, min(nlist, count))
+        sample = np.asarray(matrix[np.sort(rng.choice(count, size=min(count, max(sample_size, nlist)), replace=False))])
+        centroids = sample[rng.choice(sample.shape[0], size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            empty = np.bincount(assignment, minlength=nlist) == 0
+            # Empty lists are re-seeded from random sample rows
+            sums[empty] = sample[rng.choice(sample.shape[0], size=int(empty.sum()))]
+            centroids = _normalize(sums)
+        assignment = np.concatenate([
+            np.argmax(np.asarray(matrix[start:start + block_size]) @ centroids.T, axis=1)
+            for start in range(0, count, block_size)
+        ])
+        order = np.argsort(assignment, kind='stable')
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=nlist))])
+        return cls(centroids.astype(np.float32), order.astype(np.int64), offsets.astype(np.int64))
+    def save(self, path: Path):
+        np.savez(path, centroids=self.centroids, order=self.order, offsets=self.offsets)
+    @classmethod
+    def load(cls, path: Path) -> "IVFIndex":
+        data = np.load(path)
+        return cls(data['centroids'], data['order'], data['offsets'])
+    def candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        lists = _top_k((self.centroids @ query)[None, :], nprobe)[0][0]
+        return np.concatenate([self.order[self.offsets[i]:self.offsets[i + 1]] for i in lists])
+
+class VectorIndex:
+    """Top-k cosine search over a memory-mapped, unit-normalized embedding matrix
+
+    Exact search scores the whole matrix for a batch of queries in row
+    blocks, keeping a running top-k, so memory stays bounded at any KB size.
+    With an IVF index, each query only scores the rows in its nprobe nearest
+    lists.
+    """
+    def __init__(self, matrix: np.ndarray, ids: np.ndarray, texts: Sequence[str],
+                 ivf: Optional[IVFIndex] = None, block_size: int = 65536):
+        self.matrix = matrix
+        self.ids = ids
+        self.texts = texts
+        self.ivf = ivf
+        self.block_size = block_size
+    @classmethod
+    def from_cache(cls, cache_dir: str, block_size: int = 65536) -> "VectorIndex":
+        path = Path(cache_dir)
+        meta = json.loads((path / META_FILE).read_text())
+        if meta['count']:
+            matrix = np.memmap(path / MATRIX_FILE, dtype=EMBEDDING_DTYPE, mode='r', shape=(meta['count'], meta['dim']))
+        else:
+            matrix = np.empty((0, meta['dim']), dtype=EMBEDDING_DTYPE)
+        ids = np.load(path / IDS_FILE, mmap_mode='r')
+        texts = json.loads((path / TEXTS_FILE).read_text(encoding='utf-8'))
+        ivf = IVFIndex.load(path / IVF_FILE) if (path / IVF_FILE).exists() else None
+        return cls(matrix, ids, texts, ivf, block_size)
+    def build_ivf(self, nlist: int, cache_dir: Optional[str] = None, **kwargs) -> IVFIndex:
+        self.ivf = IVFIndex.build(self.matrix, nlist, block_size=self.block_size, **kwargs)
+        if cache_dir:
+            self.ivf.save(Path(cache_dir) / IVF_FILE)
+        return self.ivf
+    def _exact(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        best_rows = np.empty((queries.shape[0], 0), dtype=np.int64)
+        best_scores = np.empty((queries.shape[0], 0), dtype=np.float32)
+        for start in range(0, self.matrix.shape[0], self.block_size):
+            block = np.asarray(self.matrix[start:start + self.block_size])
+            rows, scores = _top_k(queries @ block.T, k)
+            merged_rows = np.concatenate([best_rows, rows + start], axis=1)
+            merged_scores = np.concatenate([best_scores, scores], axis=1)
+            keep, best_scores = _top_k(merged_scores, k)
+            best_rows = np.take_along_axis(merged_rows, keep, axis=1)
+        return best_rows, best_scores
+    def _approximate(self, queries: np.ndarray, k: int, nprobe: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        results = []
+        for query in queries:
+            candidates = np.sort(self.ivf.candidates(query, nprobe))
+            scores = np.asarray(self.matrix[candidates]) @ query
+            keep, values = _top_k(scores[None, :], k)
+            results.append((candidates[keep[0]], values[0]))
+        return results
+    def search(self, queries: np.ndarray, k: int = 10, nprobe: Optional[int] = None) -> List[List[Dict]]:
+        """Ranked passages per query: [{'id', 'text', 'score', 'rank'}], best first
+
+        nprobe uses the IVF index when one is built; None means exact search.
+        """
+        queries = _normalize(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+        if self.ivf is not None and nprobe:
+            hits = self._approximate(queries, k, nprobe)
+        else:
+            hits = list(zip(*self._exact(queries, k)))
+        return [
+            [
+                {'id': int(self.ids[row]), 'text': self.texts[row], 'score': round(float(score), 6), 'rank': rank}
+                for rank, (row, score) in enumerate(zip(rows, scores), start=1)
+            ]
+            for rows, scores in hits
+        ]
+
+class KnowledgeBase:
+    """Query API over the cached KB: text in, ranked passages out
+
+    embed turns a list of query strings into an (n, dim) array using the same
+    model that produced kb_embeddings. Settings come from config['rag_kb'].
+    The cache is rebuilt from sql_writer when refresh_on_start is set or
+    when there is no cache yet.
+    """
+    def __init__(self, config: Dict, embed: Callable[[List[str]], np.ndarray], sql_writer=None, logger=None):
+        settings = config.get('rag_kb', {})
+        self.embed = embed
+        self.logger = logger
+        self.cache_dir = settings.get('cache_dir', '../08_rag_kb/cache')
+        self.top_k = settings.get('top_k', 5)
+        ivf_settings = settings.get('ivf', {})
+        self.nprobe = ivf_settings.get('nprobe', 16)
+        cached = (Path(self.cache_dir) / META_FILE).exists()
+        if not cached and sql_writer is None:
+            raise FileNotFoundError(
+                f"No KB embedding cache in {self.cache_dir}; pass a sql_writer to build it from "
+                f"{settings.get('table', 'kb_embeddings')} or point rag_kb.cache_dir at an existing cache"
+            )
+        if sql_writer is not None and (settings.get('refresh_on_start', False) or not cached):
+            meta = sync_embedding_cache(sql_writer, self.cache_dir, settings.get('table', 'kb_embeddings'))
+            if logger:
+                logger.info(f"Cached {meta['count']} KB embeddings in {self.cache_dir}")
+        self.index = VectorIndex.from_cache(self.cache_dir)
+        use_ivf = ivf_settings.get('enabled', True) and self.index.matrix.shape[0] >= ivf_settings.get('min_rows', 100000)
+        if use_ivf and self.index.ivf is None:
+            self.index.build_ivf(ivf_settings.get('nlist', 1024), self.cache_dir)
+        if not use_ivf:
+            self.nprobe = None
+    def query(self, queries: Union[str, List[str]], k: Optional[int] = None) -> Union[List[Dict], List[List[Dict]]]:
+        single = isinstance(queries, str)
+        texts = [queries] if single else list(queries)
+        results = self.index.search(self.embed(texts), k or self.top_k, self.nprobe)
+        return results[0] if single else results
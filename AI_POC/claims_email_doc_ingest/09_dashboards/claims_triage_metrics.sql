@@ -1,11 +1,12 @@
+-- Last 30 days from the daily rollup (03_sql_queries/migrations/V007__triage_rollup.sql),
+-- so refreshes never touch the raw triage and entity tables
 SELECT 
-    t.claim_type,
-    t.risk_level,
-    COUNT(*) as email_count,
-    SUM(CASE WHEN t.requires_escalation = 1 THEN 1 ELSE 0 END) as escalated_count,
-    AVG(CAST(ent.claim_amount AS FLOAT)) as avg_claim_amount
-FROM tbl_triage_results t
-INNER JOIN tbl_extracted_entities ent ON t.email_id = ent.email_id
-WHERE t.created_at >= DATEADD(day, -30, GETDATE())
-GROUP BY t.claim_type, t.risk_level
+    r.claim_type,
+    r.risk_level,
+    SUM(r.email_count) as email_count,
+    SUM(CASE WHEN r.requires_escalation = 1 THEN r.email_count ELSE 0 END) as escalated_count,
+    SUM(r.amount_sum) / NULLIF(SUM(r.amount_count), 0) as avg_claim_amount
+FROM tbl_triage_daily_rollup r
+WHERE r.rollup_date >= CAST(DATEADD(day, -30, GETDATE()) AS DATE)
+GROUP BY r.claim_type, r.risk_level
 ORDER BY email_count DESC;
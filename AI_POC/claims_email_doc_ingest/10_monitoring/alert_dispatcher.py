@@ -0,0 +1,183 @@
+import time
+import queue
+import random
+import threading
+import requests
+from typing import Dict, List, Optional
+from 04_logs.metrics import MetricsRegistry
+from 12_integration.http_utils import retry_after_seconds
+
+# Worth another attempt: timeouts, throttling and server-side failures
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+class AlertDispatcher:
+    """Delivers high-risk claim alerts to Teams from a background thread
+
+    submit() only enqueues, so pipeline threads never wait on the webhook.
+    The worker coalesces everything submitted within window_seconds into one
+    digest card, and claims already alerted within dedupe_seconds are dropped
+    at submit time; a claim only counts as alerted once its alert is queued,
+    and again stops counting if delivery fails. Posts are spaced at least
+    min_interval_seconds apart and throttled or failed posts are retried with
+    exponential backoff, honouring Retry-After (seconds or an HTTP-date).
+    Settings come from config['alerts'].
+    """
+    def __init__(self, notifier, config: Dict, metrics: Optional[MetricsRegistry] = None, logger=None):
+        settings = config.get('alerts', {})
+        self.notifier = notifier
+        self.metrics = metrics or MetricsRegistry()
+        self.logger = logger
+        self.window_seconds = settings.get('window_seconds', 30.0)
+        self.max_batch = settings.get('max_batch', 50)
+        self.max_digest_facts = settings.get('max_digest_facts', 20)
+        self.dedupe_seconds = settings.get('dedupe_seconds', 3600.0)
+        self.max_retries = settings.get('max_retries', 5)
+        self.backoff_base_seconds = settings.get('backoff_base_seconds', 1.0)
+        self.backoff_max_seconds = settings.get('backoff_max_seconds', 60.0)
+        self.min_interval_seconds = settings.get('min_interval_seconds', 1.0)
+        self.stats = {
+            'alerts_submitted': 0,
+            'alerts_deduplicated': 0,
+            'alerts_dropped': 0,
+            'alerts_delivered': 0,
+            'alerts_failed': 0,
+            'alert_cards_sent': 0,
+            'alert_retries': 0,
+            'alert_throttled': 0
+        }
+        self._queue: queue.Queue = queue.Queue(maxsize=settings.get('queue_size', 1000))
+        self._recent: Dict[str, float] = {}
+        self._outstanding = 0
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._flush_now = threading.Event()
+        self._stop = threading.Event()
+        self._next_send = 0.0
+        self._thread = threading.Thread(target=self._run, name="alert_dispatcher", daemon=True)
+        self._thread.start()
+    def _count(self, name: str, value: int = 1):
+        with self._lock:
+            self.stats[name] += value
+        self.metrics.increment(name, value)
+    @staticmethod
+    def _key(alert: Dict) -> Optional[str]:
+        return alert.get('claim_number') or alert.get('message_id')
+    def submit(self, alert: Dict) -> bool:
+        """Queue an alert without blocking; False when it was a duplicate or the queue is full"""
+        key = self._key(alert)
+        now = time.monotonic()
+        duplicate = full = False
+        with self._lock:
+            if key and now - self._recent.get(key, float('-inf')) < self.dedupe_seconds:
+                duplicate = True
+            else:
+                # put_nowait never blocks, and enqueueing under the lock keeps check and record atomic
+                try:
+                    self._queue.put_nowait(alert)
+                except queue.Full:
+                    full = True
+                else:
+                    if key:
+                        self._recent[key] = now
+                    if len(self._recent) > 10 * self._queue.maxsize:
+                        self._recent = {k: t for k, t in self._recent.items() if now - t < self.dedupe_seconds}
+                    self._outstanding += 1
+        if duplicate:
+            self._count('alerts_deduplicated')
+            return False
+        if full:
+            self._count('alerts_dropped')
+            if self.logger:
+                self.logger.warning(f"Alert queue full, dropped alert for {key}")
+            return False
+        self._count('alerts_submitted')
+        self.metrics.set_gauge('alert_queue_depth', self._queue.qsize())
+        return True
+    def _next_batch(self) -> Optional[List[Dict]]:
+        try:
+            batch = [self._queue.get(timeout=0.1)]
+        except queue.Empty:
+            return None
+        deadline = time.monotonic() + self.window_seconds
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=min(remaining, 0.1)))
+            except queue.Empty:
+                if self._flush_now.is_set():
+                    break
+        return batch
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if not batch:
+                continue
+            self.metrics.set_gauge('alert_queue_depth', self._queue.qsize())
+            try:
+                self._deliver(batch)
+            except Exception as e:
+                self._failed(batch)
+                if self.logger:
+                    self.logger.error(f"Alert delivery error: {str(e)}")
+            with self._idle:
+                self._outstanding -= len(batch)
+                self._idle.notify_all()
+    def _failed(self, batch: List[Dict]):
+        # Undelivered claims may be alerted again without waiting out dedupe_seconds
+        with self._lock:
+            for alert in batch:
+                self._recent.pop(self._key(alert), None)
+        self._count('alerts_failed', len(batch))
+    def _deliver(self, batch: List[Dict]) -> bool:
+        if len(batch) == 1:
+            message = self.notifier.high_risk_card(batch[0])
+        else:
+            message = self.notifier.high_risk_digest_card(batch, self.max_digest_facts)
+        for attempt in range(self.max_retries + 1):
+            wait = self._next_send - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            status, retry_after, error = None, None, None
+            started = time.perf_counter()
+            try:
+                response = self.notifier.post_message(message)
+                status = response.status_code
+                retry_after = retry_after_seconds(response.headers.get('Retry-After'))
+            except requests.RequestException as e:
+                error = str(e)
+            self.metrics.observe('alert_delivery_seconds', time.perf_counter() - started)
+            self._next_send = time.monotonic() + self.min_interval_seconds
+            if status is not None and 200 <= status < 300:
+                self._count('alert_cards_sent')
+                self._count('alerts_delivered', len(batch))
+                return True
+            if status == 429:
+                self._count('alert_throttled')
+            if status is not None and status not in RETRYABLE_STATUS:
+                error = f"HTTP {status}"
+                break
+            error = error or f"HTTP {status}"
+            if attempt < self.max_retries:
+                self._count('alert_retries')
+                backoff = min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** attempt)
+                # Jitter keeps several dispatchers from retrying in lockstep
+                time.sleep(retry_after if retry_after is not None else backoff * (0.5 + random.random() / 2))
+        self._failed(batch)
+        if self.logger:
+            self.logger.error(f"Teams alert card for {len(batch)} claims was not delivered: {error}")
+        return False
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Send whatever is queued now instead of waiting out the window; True once all was handled"""
+        self._flush_now.set()
+        try:
+            with self._idle:
+                return self._idle.wait_for(lambda: self._outstanding == 0, timeout)
+        finally:
+            self._flush_now.clear()
+    def close(self, timeout: Optional[float] = 30.0) -> bool:
+        self._flush_now.set()
+        self._stop.set()
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
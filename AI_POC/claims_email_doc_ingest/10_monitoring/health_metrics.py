@@ -0,0 +1,132 @@
+import time
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from 12_integration.sql_writer import DEFAULT_TABLES, HEALTH_STAGES
+
+HEALTH_TABLES = {
+    "stage_watermarks": "tbl_pipeline_stage_watermarks",
+    "pending_counters": "tbl_pipeline_pending_counters",
+    "processing_log": "tbl_processing_log"
+}
+
+class HealthMetricsStore:
+    """Pipeline health read in one batched round-trip and cached for a TTL
+
+    Backlog and watermarks come from the counters SQLWriter maintains as it
+    writes (migration V006__pipeline_health_counters), so a check
+    never scans email history. Escalations and failures are read through
+    filtered indexes that only cover open escalations and failed steps.
+    Settings come from config['monitoring']['health'].
+    """
+    def __init__(self, sql_writer, config: Dict, logger=None):
+        self.sql_writer = sql_writer
+        self.logger = logger
+        self.tables = {**DEFAULT_TABLES, **HEALTH_TABLES, **config.get('database', {}).get('tables', {})}
+        settings = config.get('monitoring', {}).get('health', {})
+        self.ttl_seconds = settings.get('cache_ttl_seconds', 300)
+        self.failure_window_hours = settings.get('failure_window_hours', 24)
+        self.stuck_after_hours = settings.get('stuck_after_hours', 2)
+        self.escalation_after_hours = settings.get('escalation_after_hours', 4)
+        self.escalation_detail_limit = settings.get('escalation_detail_limit', 50)
+        self._lock = threading.Lock()
+        self._report: Optional[Dict] = None
+        self._fetched_at = 0.0
+    def _batch_query(self) -> Tuple[str, List]:
+        t = self.tables
+        # A bucket counts as stuck only once its whole hour is older than stuck_after_hours
+        query = f"""
+        SET NOCOUNT ON;
+        SELECT pipeline_name, step_name, error_message, created_at, COUNT(*) as failure_count
+        FROM {t['processing_log']}
+        WHERE status = 'failed'
+            AND created_at >= DATEADD(hour, -?, GETDATE())
+        GROUP BY pipeline_name, step_name, error_message, created_at
+        ORDER BY created_at DESC;
+        SELECT stage,
+            SUM(CASE WHEN bucket_hour <= DATEADD(hour, -?, GETDATE()) THEN pending_count ELSE 0 END),
+            SUM(pending_count),
+            MIN(bucket_hour)
+        FROM {t['pending_counters']}
+        WHERE pending_count > 0
+        GROUP BY stage;
+        SELECT stage, processed_count, last_email_id, updated_at
+        FROM {t['stage_watermarks']};
+        SELECT TOP (?) e.id, e.subject, ent.claim_number, tr.priority_level, tr.created_at
+        FROM {t['triage']} tr
+        INNER JOIN {t['emails']} e ON e.id = tr.email_id
+        OUTER APPLY (
+            SELECT TOP (1) claim_number FROM {t['entities']} WHERE email_id = tr.email_id
+        ) ent
+        WHERE tr.requires_escalation = 1
+            AND tr.reviewed_at IS NULL
+            AND tr.created_at < DATEADD(hour, -?, GETDATE())
+        ORDER BY tr.created_at ASC;
+        SELECT COUNT(*)
+        FROM {t['triage']}
+        WHERE requires_escalation = 1
+            AND reviewed_at IS NULL
+            AND created_at < DATEADD(hour, -?, GETDATE());
+        """
+        params = [
+            self.failure_window_hours,
+            self.stuck_after_hours + 1,
+            self.escalation_detail_limit,
+            self.escalation_after_hours,
+            self.escalation_after_hours
+        ]
+        return query, params
+    def fetch(self) -> Dict:
+        """Query the database now, bypassing and refreshing the cache"""
+        query, params = self._batch_query()
+        try:
+            with self.sql_writer.cursor() as (conn, cursor):
+                cursor.execute(query, params)
+                result_sets = [cursor.fetchall()]
+                while cursor.nextset():
+                    result_sets.append(cursor.fetchall())
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"Error reading health metrics: {str(e)}")
+            raise
+        failures, backlog_rows, watermark_rows, escalations, escalation_total = result_sets
+        backlog = {stage: {'pending': 0, 'stuck': 0, 'oldest_bucket': None} for stage in HEALTH_STAGES[1:]}
+        for stage, stuck, pending, oldest in backlog_rows:
+            backlog[stage] = {'pending': pending, 'stuck': stuck, 'oldest_bucket': oldest}
+        watermarks = {
+            stage: {'processed_count': processed, 'last_email_id': last_id, 'updated_at': updated_at}
+            for stage, processed, last_id, updated_at in watermark_rows
+        }
+        report = {
+            'timestamp': datetime.now().isoformat(),
+            'failures': [
+                {'pipeline': row[0], 'step': row[1], 'error': row[2], 'timestamp': row[3], 'count': row[4]}
+                for row in failures
+            ],
+            'unprocessed': {
+                'no_entities': backlog['entities']['stuck'],
+                'no_triage': backlog['triage']['stuck']
+            },
+            'high_risk_pending': [
+                {'email_id': row[0], 'subject': row[1], 'claim_number': row[2], 'priority': row[3], 'pending_since': row[4]}
+                for row in escalations
+            ],
+            'high_risk_pending_count': escalation_total[0][0],
+            'backlog': backlog,
+            'watermarks': watermarks
+        }
+        with self._lock:
+            self._report = report
+            self._fetched_at = time.monotonic()
+        return report
+    def report(self, force_refresh: bool = False) -> Dict:
+        """Last report while it is younger than ttl_seconds, otherwise a fresh one"""
+        with self._lock:
+            cached = self._report
+            age = time.monotonic() - self._fetched_at
+        if cached is not None and not force_refresh and age < self.ttl_seconds:
+            return cached
+        return self.fetch()
+    def invalidate(self):
+        with self._lock:
+            self._report = None
@@ -1,25 +1,50 @@
 import json
 import requests
-from typing import Dict, Optional
+from requests.adapters import HTTPAdapter
+from typing import Dict, List, Optional
 from datetime import datetime
 
+HIGH_RISK_FIELDS = (
+    ("Claim Number", 'claim_number'),
+    ("Policy Number", 'policy_number'),
+    ("Insured Name", 'insured_name'),
+    ("Priority", 'priority_level'),
+    ("Risk Level", 'risk_level'),
+    ("Claim Amount", 'claim_amount')
+)
+
 class TeamsNotifier:
-    """Send notifications to Microsoft Teams via webhook"""
-    def __init__(self, webhook_url: str, logger=None):
+    """Send notifications to Microsoft Teams via webhook
+
+    Posts go through one requests.Session, so connections to the webhook
+    host are pooled and kept alive between notifications.
+    """
+    def __init__(self, webhook_url: str, logger=None, timeout: float = 10.0, pool_size: int = 4,
+                 session: Optional[requests.Session] = None):
         self.webhook_url = webhook_url
         self.logger = logger
+        self.timeout = timeout
+        self.session = session or self._build_session(pool_size)
+    @staticmethod
+    def _build_session(pool_size: int) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({'Content-Type': 'application/json'})
+        return session
+    def post_message(self, message: Dict) -> requests.Response:
+        """One POST of a card; raises requests exceptions so callers can decide on retries"""
+        return self.session.post(self.webhook_url, json=message, timeout=self.timeout)
+    def close(self):
+        self.session.close()
     def send_notification(self, message: Dict) -> bool:
         if not self.webhook_url:
             if self.logger:
                 self.logger.warning("Teams webhook URL not configured")
             return False
         try:
-            response = requests.post(
-                self.webhook_url,
-                json=message,
-                headers={'Content-Type': 'application/json'},
-                timeout=10
-            )
+            response = self.post_message(message)
             if response.status_code == 200:
                 if self.logger:
                     self.logger.info("Teams notification sent successfully")
@@ -32,8 +57,28 @@ class TeamsNotifier:
             if self.logger:
                 self.logger.error(f"Error sending Teams notification: {str(e)}")
             return False
-    def send_pipeline_completion(self, pipeline_name: str, stats: Dict) -> bool:
+    @staticmethod
+    def _stage_facts(stages: Dict) -> list:
+        return [
+            {
+                "name": f"Stage {stage.replace('_', ' ').title()}",
+                "value": (
+                    f"p50 {summary.get('p50_ms', 0)} ms / p95 {summary.get('p95_ms', 0)} ms / "
+                    f"p99 {summary.get('p99_ms', 0)} ms, {summary.get('items_per_second', 0)} items/s"
+                )
+            }
+            for stage, summary in stages.items()
+        ]
+    def send_pipeline_completion(self, pipeline_name: str, stats: Dict, metrics=None) -> bool:
+        """Completion card with the run statistics and, from a MetricsRegistry, per-stage latency and throughput"""
         color = "00FF00" if stats.get("status") != "FAILED" else "FF0000"
+        facts = [
+            {"name": key.replace("_", " ").title(), "value": str(value)}
+            for key, value in stats.items()
+            if key not in ["errors", "start_time", "end_time", "stages"] and not isinstance(value, dict)
+        ]
+        stages = metrics.stage_summary() if metrics is not None else stats.get("stages", {})
+        facts.extend(self._stage_facts(stages))
         message = {
             "@type": "MessageCard",
             "@context": "http://schema.org/extensions",
@@ -42,11 +87,7 @@ class TeamsNotifier:
             "sections": [{
                 "activityTitle": f"📊 {pipeline_name} Completed",
                 "activitySubtitle": f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-                "facts": [
-                    {"name": key.replace("_", " ").title(), "value": str(value)}
-                    for key, value in stats.items()
-                    if key not in ["errors", "start_time", "end_time"]
-                ],
+                "facts": facts,
                 "markdown": True
             }]
         }
@@ -65,8 +106,9 @@ class TeamsNotifier:
             }]
         }
         return self.send_notification(message)
-    def send_high_risk_alert(self, email_data: Dict) -> bool:
-        message = {
+    @staticmethod
+    def high_risk_card(email_data: Dict) -> Dict:
+        return {
             "@type": "MessageCard",
             "@context": "http://schema.org/extensions",
             "themeColor": "FFA500",
@@ -74,15 +116,35 @@ class TeamsNotifier:
             "sections": [{
                 "activityTitle": "⚠️ High-Risk Claim Requires Attention",
                 "activitySubtitle": f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-                "facts": [
-                    {"name": "Claim Number", "value": email_data.get('claim_number', 'N/A')},
-                    {"name": "Policy Number", "value": email_data.get('policy_number', 'N/A')},
-                    {"name": "Insured Name", "value": email_data.get('insured_name', 'N/A')},
-                    {"name": "Priority", "value": email_data.get('priority_level', 'N/A')},
-                    {"name": "Risk Level", "value": email_data.get('risk_level', 'N/A')},
-                    {"name": "Claim Amount", "value": email_data.get('claim_amount', 'N/A')}
-                ],
+                "facts": [{"name": name, "value": email_data.get(key) or 'N/A'} for name, key in HIGH_RISK_FIELDS],
                 "markdown": True
             }]
         }
-        return self.send_notification(message)
+    @staticmethod
+    def high_risk_digest_card(alerts: List[Dict], max_facts: int = 20) -> Dict:
+        """One card listing several high-risk claims, one fact per claim"""
+        facts = [
+            {
+                "name": alert.get('claim_number') or 'N/A',
+                "value": ", ".join(
+                    f"{name}: {alert[key]}" for name, key in HIGH_RISK_FIELDS[1:] if alert.get(key)
+                ) or 'N/A'
+            }
+            for alert in alerts[:max_facts]
+        ]
+        if len(alerts) > max_facts:
+            facts.append({"name": "More", "value": f"+{len(alerts) - max_facts} further claims"})
+        return {
+            "@type": "MessageCard",
+            "@context": "http://schema.org/extensions",
+            "themeColor": "FFA500",
+            "summary": f"{len(alerts)} High-Risk Claims Detected",
+            "sections": [{
+                "activityTitle": f"⚠️ {len(alerts)} High-Risk Claims Require Attention",
+                "activitySubtitle": f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+                "facts": facts,
+                "markdown": True
+            }]
+        }
+    def send_high_risk_alert(self, email_data: Dict) -> bool:
+        return self.send_notification(self.high_risk_card(email_data))
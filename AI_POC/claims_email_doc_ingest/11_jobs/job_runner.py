@@ -0,0 +1,233 @@
+import json
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set
+from 04_logs.metrics import MetricsRegistry
+
+CRON_ALIASES = {
+    '@hourly': "0 * * * *",
+    '@daily': "0 0 * * *",
+    '@weekly': "0 0 * * 0",
+    '@monthly': "0 0 1 * *"
+}
+# (low, high) of minute, hour, day of month, month, day of week; 7 is also Sunday
+_FIELD_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+# Upper bound on missed triggers counted after a stall; they coalesce into one run either way
+_MAX_MISSED = 1000
+
+def _parse_field(field: str, low: int, high: int) -> Set[int]:
+    values = set()
+    for part in field.split(','):
+        expression, _, step = part.partition('/')
+        step = int(step) if step else 1
+        if expression == '*':
+            start, end = low, high
+        elif '-' in expression:
+            start, end = (int(value) for value in expression.split('-', 1))
+        else:
+            start = int(expression)
+            end = high if step > 1 else start
+        if step < 1 or start < low or end > high or start > end:
+            raise ValueError(f"Cron field '{field}' is outside {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return values
+
+class CronExpression:
+    """Standard five-field cron expression (minute hour day-of-month month day-of-week)
+
+    Supports *, lists, ranges and steps. As in cron, when both day fields are
+    restricted a time matches if either of them does.
+    """
+    def __init__(self, expression: str):
+        self.expression = expression
+        fields = CRON_ALIASES.get(expression.strip(), expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: '{expression}'")
+        try:
+            minutes, hours, days, months, weekdays = (
+                _parse_field(field, low, high) for field, (low, high) in zip(fields, _FIELD_RANGES)
+            )
+        except ValueError as e:
+            raise ValueError(f"Invalid cron expression '{expression}': {str(e)}")
+        self.minutes, self.hours, self.days, self.months = minutes, hours, days, months
+        self.weekdays = {day % 7 for day in weekdays}
+        self.any_day = fields[2] == '*'
+        self.any_weekday = fields[4] == '*'
+    def _day_matches(self, moment: datetime) -> bool:
+        day = moment.day in self.days
+        # Python weekday() is Monday=0; cron is Sunday=0
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day and weekday
+        return day or weekday
+    def matches(self, moment: datetime) -> bool:
+        return (moment.minute in self.minutes and moment.hour in self.hours
+                and moment.month in self.months and self._day_matches(moment))
+    def next_after(self, moment: datetime) -> datetime:
+        """First matching minute strictly after moment"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                year, month = divmod(candidate.month, 12)
+                candidate = candidate.replace(year=candidate.year + year, month=month + 1, day=1, hour=0, minute=0)
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron expression never matches: '{self.expression}'")
+
+class ScheduledJob:
+    def __init__(self, name: str, func: Callable, schedules: List[str], history_size: int = 50,
+                 min_interval_minutes: float = 0):
+        self.name = name
+        self.func = func
+        self.crons = [CronExpression(expression) for expression in schedules]
+        self.min_interval = timedelta(minutes=min_interval_minutes)
+        self.lock = threading.Lock()
+        self.history = deque(maxlen=history_size)
+        self.last_checked: Optional[datetime] = None
+        self.last_started: Optional[datetime] = None
+    def due(self, now: datetime) -> int:
+        """Distinct trigger times in (last_checked, now], capped at _MAX_MISSED per schedule"""
+        if self.last_checked is None:
+            return 0
+        triggers = set()
+        for cron in self.crons:
+            moment = self.last_checked
+            for _ in range(_MAX_MISSED):
+                moment = cron.next_after(moment)
+                if moment > now:
+                    break
+                triggers.add(moment)
+        return len(triggers)
+
+class JobRunner:
+    """Runs cron-scheduled jobs on a worker pool, one instance of each job at a time
+
+    Every job has its own lock: a trigger that fires while the previous run
+    is still working is skipped rather than queued, and so is one that comes
+    within the job's min_interval_minutes of the last start. Triggers that
+    pile up while the runner was stalled coalesce into a single run. Each
+    run's duration and outcome is kept in a per-job history and observed
+    as job_duration_seconds{job=...}.
+    """
+    def __init__(self, definitions: List[Dict], job_functions: Dict[str, Callable], max_workers: int = 4,
+                 history_size: int = 50, metrics: Optional[MetricsRegistry] = None, logger=None):
+        self.logger = logger
+        self.metrics = metrics or MetricsRegistry()
+        self.jobs: Dict[str, ScheduledJob] = {}
+        for definition in definitions:
+            name = definition['name']
+            if name not in job_functions:
+                raise ValueError(f"No function registered for job '{name}'")
+            schedules = definition['schedule']
+            if isinstance(schedules, str):
+                schedules = [schedules]
+            self.jobs[name] = ScheduledJob(
+                name, job_functions[name], schedules, history_size, definition.get('min_interval_minutes', 0)
+            )
+        self.stats = {'runs_started': 0, 'runs_skipped': 0, 'triggers_coalesced': 0}
+        self._stats_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job_runner")
+        self._stop = threading.Event()
+    @classmethod
+    def from_file(cls, definitions_path: str, job_functions: Dict[str, Callable], **kwargs) -> "JobRunner":
+        with open(definitions_path, 'r') as f:
+            definitions = json.load(f)
+        kwargs.setdefault('max_workers', definitions.get('max_workers', 4))
+        kwargs.setdefault('history_size', definitions.get('history_size', 50))
+        return cls(definitions['jobs'], job_functions, **kwargs)
+    def _count(self, name: str, job: str, value: int = 1):
+        with self._stats_lock:
+            self.stats[name] += value
+        self.metrics.increment(name, value, job=job)
+    def start(self, now: Optional[datetime] = None):
+        """Begin counting triggers from now; earlier ones are not run"""
+        now = now or datetime.now()
+        for job in self.jobs.values():
+            job.last_checked = now
+    def tick(self, now: Optional[datetime] = None) -> List[str]:
+        """Start every job with a trigger since the last tick; returns the jobs started"""
+        now = now or datetime.now()
+        started = []
+        for job in self.jobs.values():
+            triggers = job.due(now)
+            job.last_checked = now
+            if not triggers:
+                continue
+            if triggers > 1:
+                self._count('triggers_coalesced', job.name, triggers - 1)
+                if self.logger:
+                    self.logger.warning(f"Job '{job.name}': {triggers} triggers coalesced into one run")
+            if job.last_started is not None and now - job.last_started < job.min_interval:
+                self._count('runs_skipped', job.name)
+                if self.logger:
+                    self.logger.info(f"Job '{job.name}' skipped: last run started at {job.last_started:%H:%M}")
+                continue
+            if self.run_now(job.name, now):
+                started.append(job.name)
+        return started
+    def run_now(self, name: str, scheduled_for: Optional[datetime] = None) -> bool:
+        """Submit a run unless one is already working; False when skipped"""
+        job = self.jobs[name]
+        scheduled_for = scheduled_for or datetime.now()
+        if not job.lock.acquire(blocking=False):
+            self._count('runs_skipped', name)
+            if self.logger:
+                self.logger.warning(f"Job '{name}' skipped: previous run still in progress")
+            return False
+        self._count('runs_started', name)
+        job.last_started = scheduled_for
+        try:
+            self._executor.submit(self._execute, job, scheduled_for)
+        except RuntimeError:
+            job.lock.release()
+            raise
+        return True
+    def _execute(self, job: ScheduledJob, scheduled_for: datetime):
+        started_at = datetime.now()
+        started = time.perf_counter()
+        status, error = "success", None
+        try:
+            if self.logger:
+                self.logger.info(f"Job '{job.name}' started")
+            job.func()
+        except Exception as e:
+            status, error = "failed", str(e)
+            if self.logger:
+                self.logger.error(f"Job '{job.name}' failed: {error}")
+        finally:
+            duration = time.perf_counter() - started
+            job.history.append({
+                'scheduled_for': scheduled_for.isoformat(),
+                'started_at': started_at.isoformat(),
+                'duration_seconds': round(duration, 3),
+                'status': status,
+                'error': error
+            })
+            self.metrics.observe('job_duration_seconds', duration, job=job.name)
+            job.lock.release()
+        if self.logger:
+            self.logger.info(f"Job '{job.name}' finished: {status} in {duration:.1f}s")
+    def history(self, name: str) -> List[Dict]:
+        return list(self.jobs[name].history)
+    def is_running(self, name: str) -> bool:
+        return self.jobs[name].lock.locked()
+    def run_forever(self, poll_seconds: float = 5.0):
+        """Tick every poll_seconds until stop() is called"""
+        if any(job.last_checked is None for job in self.jobs.values()):
+            self.start()
+        while not self._stop.is_set():
+            self.tick()
+            self._stop.wait(poll_seconds)
+    def stop(self, wait: bool = True):
+        self._stop.set()
+        self._executor.shutdown(wait=wait)
@@ -1,45 +1,46 @@
-import schedule
-import time
-from datetime import datetime
+import os
 from 04_logs.log_utils import LogUtils
+from 11_jobs.job_runner import JobRunner
 from 02_pipelines.pipeline_master_orchestrator import MasterOrchestrator
 from 10_monitoring.monitor_pipeline_health import PipelineHealthMonitor
 
 logger = LogUtils.setup_logger("job_scheduler", log_dir="../04_logs")
 config_path = "../00_configs/config_poc.json"
+definitions_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "job_definitions.json")
 
+# Failures propagate so the runner logs them and records the run as failed
 def run_full_pipeline():
-    try:
-        logger.info("Starting scheduled full pipeline execution")
-        orchestrator = MasterOrchestrator(config_path)
-        results = orchestrator.run()
-        logger.info(f"Pipeline completed: {results['status']}")
-    except Exception as e:
-        logger.error(f"Scheduled pipeline failed: {str(e)}")
+    logger.info("Starting scheduled full pipeline execution")
+    orchestrator = MasterOrchestrator(config_path)
+    results = orchestrator.run()
+    logger.info(f"Pipeline completed: {results['status']}")
 
 def run_health_check():
-    try:
-        logger.info("Starting scheduled health check")
-        monitor = PipelineHealthMonitor(config_path)
-        report = monitor.run_health_check()
-        logger.info(f"Health check completed: {report['status']}")
-    except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
+    logger.info("Starting scheduled health check")
+    monitor = PipelineHealthMonitor(config_path)
+    report = monitor.run_health_check()
+    logger.info(f"Health check completed: {report['status']}")
 
-def setup_schedules():
-    schedule.every(4).hours.do(run_full_pipeline)
-    schedule.every(1).hours.do(run_health_check)
-    schedule.every().day.at("08:00").do(run_full_pipeline)
-    schedule.every().day.at("13:00").do(run_full_pipeline)
-    schedule.every().day.at("18:00").do(run_full_pipeline)
+JOB_FUNCTIONS = {
+    "Full Pipeline": run_full_pipeline,
+    "Health Check": run_health_check
+}
+
+def setup_runner() -> JobRunner:
+    runner = JobRunner.from_file(definitions_path, JOB_FUNCTIONS, logger=logger)
     logger.info("Job schedules configured")
-    logger.info("- Full pipeline: Every 4 hours + 08:00, 13:00, 18:00")
-    logger.info("- Health check: Every hour")
+    for job in runner.jobs.values():
+        logger.info(f"- {job.name}: {', '.join(cron.expression for cron in job.crons)}")
+    return runner
 
 if __name__ == "__main__":
     logger.info("Starting job scheduler")
-    setup_schedules()
-    run_health_check()
-    while True:
-        schedule.run_pending()
-        time.sleep(60)
+    runner = setup_runner()
+    runner.start()
+    runner.run_now("Health Check")
+    try:
+        runner.run_forever()
+    except KeyboardInterrupt:
+        logger.info("Stopping job scheduler")
+    finally:
+        runner.stop()
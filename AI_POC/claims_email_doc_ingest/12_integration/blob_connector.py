@@ -1,22 +1,104 @@
+from azure.core import MatchConditions
 from azure.storage.blob import BlobServiceClient, BlobClient, ContainerClient
-from typing import List, Dict, Optional, BinaryIO
+from typing import Iterator, List, Dict, Optional, BinaryIO
 from datetime import datetime
 from pathlib import Path
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import io
 import json
+import mmap
+import tempfile
+
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+# spool_attachment keeps attachments up to this size in memory instead of a temp file
+DEFAULT_SPOOL_THRESHOLD = 4 * 1024 * 1024
+
+def _pinned(etag: Optional[str]) -> Dict:
+    # Ranged reads of one blob must all see the same version; a blob overwritten
+    # mid-read then fails with ResourceModifiedError instead of returning a spliced body
+    return {'etag': etag, 'match_condition': MatchConditions.IfNotModified} if etag else {}
+
+class BlobRangeReader(io.RawIOBase):
+    """Seekable, read-only file object over a blob that fetches one ranged chunk at a time
+
+    With an etag every range is conditional on that blob version.
+    """
+    
+    def __init__(self, blob_client: BlobClient, size: int, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 etag: Optional[str] = None):
+        self.blob_client = blob_client
+        self.size = size
+        self.chunk_size = chunk_size
+        self.etag = etag
+        self._position = 0
+        self._buffer = b""
+        self._buffer_start = 0
+    
+    def readable(self) -> bool:
+        return True
+    
+    def seekable(self) -> bool:
+        return True
+    
+    def tell(self) -> int:
+        return self._position
+    
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if position < 0:
+            raise ValueError("Negative seek position")
+        self._position = position
+        return position
+    
+    def readinto(self, buffer) -> int:
+        if self._position >= self.size:
+            return 0
+        offset = self._position - self._buffer_start
+        if not 0 <= offset < len(self._buffer):
+            length = min(self.chunk_size, self.size - self._position)
+            self._buffer = self.blob_client.download_blob(
+                offset=self._position, length=length, **_pinned(self.etag)
+            ).readall()
+            self._buffer_start = self._position
+            offset = 0
+        count = min(len(buffer), len(self._buffer) - offset)
+        buffer[:count] = self._buffer[offset:offset + count]
+        self._position += count
+        return count
 
 class BlobConnector:
     """Azure Blob Storage connector for claims data"""
     
-    def __init__(self, connection_string: str, logger=None):
+    def __init__(self, connection_string: str, logger=None, blob_service_client=None):
         self.connection_string = connection_string
-        self.blob_service_client = BlobServiceClient.from_connection_string(connection_string)
+        self.blob_service_client = blob_service_client or BlobServiceClient.from_connection_string(connection_string)
         self.logger = logger
     
     def list_emails(self, container_name: str, prefix: str = "") -> List[str]:
+        return [blob['name'] for blob in self.iter_email_blobs(container_name, prefix)]
+    
+    def iter_email_blobs(self, container_name: str, prefix: str = "", page_size: int = 500) -> Iterator[Dict]:
+        """Lazily page through the container, yielding name, etag, last_modified and size per blob"""
         try:
             container_client = self.blob_service_client.get_container_client(container_name)
-            blobs = container_client.list_blobs(name_starts_with=prefix)
-            return [blob.name for blob in blobs]
+            pages = container_client.list_blobs(name_starts_with=prefix, results_per_page=page_size).by_page()
+            for page in pages:
+                for blob in page:
+                    yield {
+                        'name': blob.name,
+                        'etag': blob.etag,
+                        'last_modified': blob.last_modified,
+                        'size': blob.size
+                    }
         except Exception as e:
             if self.logger:
                 self.logger.error(f"Error listing blobs: {str(e)}")
@@ -38,6 +120,7 @@ class BlobConnector:
             raise
     
     def read_attachment(self, container_name: str, blob_name: str) -> bytes:
+        # Loads the whole blob into memory; use iter_attachment_chunks/open_attachment for large files
         try:
             blob_client = self.blob_service_client.get_blob_client(
                 container=container_name,
@@ -50,6 +133,98 @@ class BlobConnector:
                 self.logger.error(f"Error reading attachment {blob_name}: {str(e)}")
             raise
     
+    def read_attachment_header(self, container_name: str, blob_name: str, num_bytes: int = 8192) -> bytes:
+        """Fetch only the first num_bytes of an attachment, enough for type sniffing"""
+        try:
+            blob_client = self.blob_service_client.get_blob_client(container=container_name, blob=blob_name)
+            return blob_client.download_blob(offset=0, length=num_bytes).readall()
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"Error reading attachment header {blob_name}: {str(e)}")
+            raise
+    
+    def iter_attachment_chunks(
+        self,
+        container_name: str,
+        blob_name: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_concurrency: int = 1
+    ) -> Iterator[bytes]:
+        """Yield an attachment in order as ranged chunks
+
+        Up to max_concurrency chunks are downloaded in parallel, so memory stays
+        bounded by chunk_size * max_concurrency regardless of attachment size.
+        Every chunk is read from the blob version seen when streaming started.
+        """
+        try:
+            blob_client = self.blob_service_client.get_blob_client(container=container_name, blob=blob_name)
+            properties = blob_client.get_blob_properties()
+            size, etag = properties.size, properties.etag
+            def fetch(offset: int) -> bytes:
+                return blob_client.download_blob(
+                    offset=offset, length=min(chunk_size, size - offset), **_pinned(etag)
+                ).readall()
+            offsets = range(0, size, chunk_size)
+            if max_concurrency <= 1:
+                for offset in offsets:
+                    yield fetch(offset)
+                return
+            with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+                pending = deque()
+                for offset in offsets:
+                    pending.append(executor.submit(fetch, offset))
+                    if len(pending) >= max_concurrency:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"Error streaming attachment {blob_name}: {str(e)}")
+            raise
+    
+    def open_attachment(self, container_name: str, blob_name: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> BlobRangeReader:
+        """Seekable file-like view of an attachment backed by ranged downloads"""
+        blob_client = self.blob_service_client.get_blob_client(container=container_name, blob=blob_name)
+        properties = blob_client.get_blob_properties()
+        return BlobRangeReader(blob_client, properties.size, chunk_size, properties.etag)
+    
+    @contextmanager
+    def spool_attachment(
+        self,
+        container_name: str,
+        blob_name: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_concurrency: int = 1,
+        memory_threshold: int = DEFAULT_SPOOL_THRESHOLD
+    ):
+        """Yield an attachment as bytes-like data without holding large ones in memory
+
+        Attachments up to memory_threshold bytes are yielded as bytes; larger
+        ones are streamed into an anonymous temp file and yielded memory-mapped
+        read-only.
+        """
+        chunks = self.iter_attachment_chunks(container_name, blob_name, chunk_size, max_concurrency)
+        buffered, buffered_size = [], 0
+        for chunk in chunks:
+            buffered.append(chunk)
+            buffered_size += len(chunk)
+            if buffered_size > memory_threshold:
+                break
+        else:
+            yield b"".join(buffered)
+            return
+        with tempfile.TemporaryFile() as spool:
+            spool.writelines(buffered)
+            buffered.clear()
+            for chunk in chunks:
+                spool.write(chunk)
+            spool.flush()
+            mapped = mmap.mmap(spool.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                yield mapped
+            finally:
+                mapped.close()
+    
     def write_processed_data(self, container_name: str, blob_name: str, data: Dict) -> str:
         try:
             blob_client = self.blob_service_client.get_blob_client(
@@ -0,0 +1,169 @@
+import os
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+def _as_iso(value) -> Optional[str]:
+    if value is None:
+        return None
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+class FileCheckpointStore:
+    """Ingestion checkpoint kept in a local append-only JSON-lines journal
+
+    Each committed batch appends one line holding the etag/last-modified of its
+    blobs and the message_ids it persisted, so a commit costs O(batch) and a
+    crash loses at most the uncommitted batch. The journal is replayed on open
+    and compacted into a single snapshot line once it grows past
+    compact_after lines.
+    """
+    def __init__(self, path: str, compact_after: int = 1000, logger=None):
+        self.path = Path(path)
+        self.compact_after = compact_after
+        self.logger = logger
+        self.blobs: Dict[str, Dict] = {}
+        self.message_ids: set = set()
+        self.high_water_mark: Optional[str] = None
+        self._journal_lines = 0
+        self._load()
+        if self._journal_lines > self.compact_after:
+            self.compact()
+    def _apply(self, entry: Dict):
+        for blob in entry.get('blobs', []):
+            self.blobs[blob['name']] = {'etag': blob.get('etag'), 'last_modified': blob.get('last_modified')}
+            if blob.get('last_modified') and (self.high_water_mark is None or blob['last_modified'] > self.high_water_mark):
+                self.high_water_mark = blob['last_modified']
+        self.message_ids.update(entry.get('message_ids', []))
+    def _load(self):
+        if not self.path.exists():
+            return
+        complete = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                complete += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    if self.logger:
+                        self.logger.warning(f"Ignoring unreadable checkpoint entry in {self.path}")
+                    continue
+                self._apply(entry)
+                self._journal_lines += 1
+        if complete < self.path.stat().st_size:
+            # A torn final line from a crash mid-commit; that batch was never committed.
+            # Cut it off so the next append starts on a line of its own.
+            if self.logger:
+                self.logger.warning(f"Dropping incomplete checkpoint entry at the end of {self.path}")
+            with open(self.path, 'r+b') as f:
+                f.truncate(complete)
+                f.flush()
+                os.fsync(f.fileno())
+    def is_processed(self, blob: Dict) -> bool:
+        """True when the blob was committed before with the same etag"""
+        committed = self.blobs.get(blob['name'])
+        return committed is not None and committed['etag'] == blob.get('etag')
+    def has_message(self, message_id: str) -> bool:
+        return message_id in self.message_ids
+    def commit_batch(self, blobs: Iterable[Dict], message_ids: Iterable[str]):
+        entry = {
+            'committed_at': datetime.now().isoformat(),
+            'blobs': [
+                {'name': blob['name'], 'etag': blob.get('etag'), 'last_modified': _as_iso(blob.get('last_modified'))}
+                for blob in blobs
+            ],
+            'message_ids': [message_id for message_id in message_ids if message_id]
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._apply(entry)
+        self._journal_lines += 1
+    def compact(self):
+        """Rewrite the journal as one snapshot line, atomically"""
+        snapshot = {
+            'committed_at': datetime.now().isoformat(),
+            'blobs': [{'name': name, **state} for name, state in self.blobs.items()],
+            'message_ids': sorted(self.message_ids)
+        }
+        temp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(snapshot) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        self._journal_lines = 1
+
+class SQLCheckpointStore:
+    """Ingestion checkpoint kept in tbl_ingest_checkpoints (see 03_sql_queries)
+
+    The committed blob states and message_ids are loaded once per run; each
+    batch commit upserts its blobs in one transaction.
+    """
+    def __init__(self, sql_writer, table_name: str = "tbl_ingest_checkpoints", logger=None):
+        self.sql_writer = sql_writer
+        self.table_name = table_name
+        self.logger = logger
+        self.blobs: Dict[str, Dict] = {}
+        self.message_ids: set = set()
+        self.high_water_mark: Optional[str] = None
+        with self.sql_writer.cursor() as (conn, cursor):
+            cursor.execute(f"SELECT blob_name, etag, last_modified, message_id FROM {self.table_name}")
+            for blob_name, etag, last_modified, message_id in cursor.fetchall():
+                last_modified = _as_iso(last_modified)
+                self.blobs[blob_name] = {'etag': etag, 'last_modified': last_modified}
+                if message_id:
+                    self.message_ids.add(message_id)
+                if last_modified and (self.high_water_mark is None or last_modified > self.high_water_mark):
+                    self.high_water_mark = last_modified
+    def is_processed(self, blob: Dict) -> bool:
+        committed = self.blobs.get(blob['name'])
+        return committed is not None and committed['etag'] == blob.get('etag')
+    def has_message(self, message_id: str) -> bool:
+        return message_id in self.message_ids
+    def commit_batch(self, blobs: Iterable[Dict], message_ids: Iterable[str]):
+        blobs = list(blobs)
+        message_ids = list(message_ids)
+        message_by_blob = {blob['name']: blob.get('message_id') for blob in blobs}
+        query = f"""
+        MERGE {self.table_name} AS target
+        USING (SELECT ? AS blob_name, ? AS etag, ? AS last_modified, ? AS message_id) AS source
+            ON target.blob_name = source.blob_name
+        WHEN MATCHED THEN UPDATE SET
+            etag = source.etag, last_modified = source.last_modified,
+            message_id = source.message_id, committed_at = GETDATE()
+        WHEN NOT MATCHED THEN INSERT (blob_name, etag, last_modified, message_id, committed_at)
+            VALUES (source.blob_name, source.etag, source.last_modified, source.message_id, GETDATE());
+        """
+        rows = [
+            (blob['name'], blob.get('etag'), blob.get('last_modified'), message_by_blob[blob['name']])
+            for blob in blobs
+        ]
+        with self.sql_writer.cursor() as (conn, cursor):
+            if rows:
+                cursor.executemany(query, rows)
+            conn.commit()
+        for blob in blobs:
+            last_modified = _as_iso(blob.get('last_modified'))
+            self.blobs[blob['name']] = {'etag': blob.get('etag'), 'last_modified': last_modified}
+            if last_modified and (self.high_water_mark is None or last_modified > self.high_water_mark):
+                self.high_water_mark = last_modified
+        self.message_ids.update(message_id for message_id in message_ids if message_id)
+
+def create_checkpoint_store(config: Dict, sql_writer=None, logger=None):
+    """Build the checkpoint store described by config['ingestion']['checkpoint'], if any"""
+    checkpoint = config.get('ingestion', {}).get('checkpoint')
+    if not checkpoint:
+        return None
+    backend = checkpoint.get('backend', 'file')
+    if backend == 'file':
+        return FileCheckpointStore(checkpoint['path'], checkpoint.get('compact_after', 1000), logger)
+    if backend == 'sql':
+        return SQLCheckpointStore(sql_writer, checkpoint.get('table', 'tbl_ingest_checkpoints'), logger)
+    raise ValueError(f"Unknown checkpoint backend: {backend}")
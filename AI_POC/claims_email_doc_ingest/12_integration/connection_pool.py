@@ -0,0 +1,218 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes available within the pool timeout"""
+
+class PooledConnection:
+    """A pooled DB-API connection with its lifecycle timestamps and reusable cursor"""
+    def __init__(self, connection):
+        self.connection = connection
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self._cursor = None
+    def cursor(self):
+        if self._cursor is None:
+            self._cursor = self.connection.cursor()
+        return self._cursor
+    def reset_cursor(self):
+        if self._cursor is not None:
+            try:
+                self._cursor.close()
+            except Exception:
+                pass
+            self._cursor = None
+    def close(self):
+        self.reset_cursor()
+        try:
+            self.connection.close()
+        except Exception:
+            pass
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of database connections
+
+    Connections are health-checked on checkout when they have been idle longer
+    than health_check_interval, evicted after max_idle_seconds unused, and
+    recycled once they are older than max_lifetime_seconds.
+    """
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        max_size: int = 10,
+        timeout: float = 30.0,
+        max_idle_seconds: float = 300.0,
+        max_lifetime_seconds: float = 1800.0,
+        health_check_interval: float = 30.0,
+        health_check_query: str = "SELECT 1",
+        logger=None
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be a positive integer")
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle_seconds = max_idle_seconds
+        self.max_lifetime_seconds = max_lifetime_seconds
+        self.health_check_interval = health_check_interval
+        self.health_check_query = health_check_query
+        self.logger = logger
+        self._idle = deque()
+        self._size = 0
+        self._in_use = 0
+        self._closed = False
+        self._lock = threading.Condition(threading.Lock())
+        self._stats = {
+            'created': 0,
+            'closed': 0,
+            'checkouts': 0,
+            'timeouts': 0,
+            'health_check_failures': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0
+        }
+    def _expired(self, pooled: PooledConnection, now: float) -> bool:
+        return (
+            now - pooled.created_at > self.max_lifetime_seconds
+            or now - pooled.last_used > self.max_idle_seconds
+        )
+    def _evict_expired(self, now: float) -> list:
+        # Called with the lock held; the oldest idle connections sit at the left
+        evicted = []
+        for pooled in list(self._idle):
+            if self._expired(pooled, now):
+                self._idle.remove(pooled)
+                self._size -= 1
+                evicted.append(pooled)
+        return evicted
+    def _discard(self, pooled: PooledConnection):
+        pooled.close()
+        with self._lock:
+            self._stats['closed'] += 1
+            self._lock.notify()
+    def _is_healthy(self, pooled: PooledConnection) -> bool:
+        if time.monotonic() - pooled.last_used < self.health_check_interval:
+            return True
+        try:
+            cursor = pooled.cursor()
+            cursor.execute(self.health_check_query)
+            cursor.fetchall()
+            return True
+        except Exception as e:
+            if self.logger:
+                self.logger.warning(f"Discarding unhealthy pooled connection: {str(e)}")
+            return False
+    def acquire(self) -> PooledConnection:
+        start = time.monotonic()
+        deadline = start + self.timeout
+        while True:
+            pooled = None
+            create = False
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+                evicted = self._evict_expired(time.monotonic())
+                self._stats['closed'] += len(evicted)
+                if self._idle:
+                    pooled = self._idle.pop()
+                    self._in_use += 1
+                elif self._size < self.max_size:
+                    # Reserve the slot now, connect outside the lock
+                    self._size += 1
+                    self._in_use += 1
+                    create = True
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeoutError(
+                            f"No database connection available after {self.timeout}s "
+                            f"({self._in_use}/{self.max_size} in use)"
+                        )
+                    self._lock.wait(remaining)
+                    continue
+            for stale in evicted:
+                stale.close()
+            if create:
+                try:
+                    pooled = PooledConnection(self.connect())
+                except Exception:
+                    with self._lock:
+                        self._size -= 1
+                        self._in_use -= 1
+                        self._lock.notify()
+                    raise
+                with self._lock:
+                    self._stats['created'] += 1
+            elif not self._is_healthy(pooled):
+                with self._lock:
+                    self._size -= 1
+                    self._in_use -= 1
+                    self._stats['health_check_failures'] += 1
+                self._discard(pooled)
+                continue
+            waited = time.monotonic() - start
+            with self._lock:
+                self._stats['checkouts'] += 1
+                self._stats['wait_time_total'] += waited
+                self._stats['wait_time_max'] = max(self._stats['wait_time_max'], waited)
+            return pooled
+    def release(self, pooled: PooledConnection, discard: bool = False):
+        now = time.monotonic()
+        with self._lock:
+            self._in_use -= 1
+            if discard or self._closed or now - pooled.created_at > self.max_lifetime_seconds:
+                self._size -= 1
+            else:
+                pooled.last_used = now
+                self._idle.append(pooled)
+                self._lock.notify()
+                return
+        self._discard(pooled)
+    @contextmanager
+    def cursor(self):
+        """Borrow a connection and its reusable cursor; rolls back and returns it on exit"""
+        pooled = self.acquire()
+        failed = True
+        try:
+            yield pooled.connection, pooled.cursor()
+            failed = False
+        finally:
+            # Uncommitted work never goes back to the pool, however the block exits
+            if failed:
+                pooled.reset_cursor()
+            discard = False
+            try:
+                pooled.connection.rollback()
+            except Exception:
+                discard = True
+            self.release(pooled, discard=discard)
+    @contextmanager
+    def connection(self):
+        """Borrow a raw connection; rolls back uncommitted work on exit"""
+        with self.cursor() as (conn, _):
+            yield conn
+    def close_all(self):
+        with self._lock:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._stats['closed'] += len(idle)
+            self._lock.notify_all()
+        for pooled in idle:
+            pooled.close()
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            checkouts = self._stats['checkouts']
+            return {
+                **self._stats,
+                'size': self._size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'max_size': self.max_size,
+                'wait_time_avg': self._stats['wait_time_total'] / checkouts if checkouts else 0.0
+            }
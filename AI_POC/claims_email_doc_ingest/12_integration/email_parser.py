@@ -1,7 +1,166 @@
 import re
-from typing import Dict, List, Optional
+from bisect import bisect_right
+from html.parser import HTMLParser
+from typing import Dict, Iterator, List, Optional, Tuple
 from pathlib import Path
 
+# Leading-byte signatures for attachment type sniffing; results match classify_attachment_type
+MAGIC_SIGNATURES = [
+    (b'%PDF', {'type': 'document', 'category': 'pdf_document'}),
+    (b'\xff\xd8\xff', {'type': 'image', 'category': 'photo'}),
+    (b'\x89PNG\r\n\x1a\n', {'type': 'image', 'category': 'photo'}),
+    (b'GIF8', {'type': 'image', 'category': 'photo'}),
+    (b'II*\x00', {'type': 'image', 'category': 'photo'}),
+    (b'MM\x00*', {'type': 'image', 'category': 'photo'}),
+    (b'PK\x03\x04', {'type': 'document', 'category': 'office_document'}),
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', {'type': 'document', 'category': 'office_document'})
+]
+
+# Field patterns, compiled once; ENTITY_SCANNER tries them in this order at each position
+FIELD_PATTERNS = {
+    'email_addresses': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b',
+    'amounts': r'\$\s*[\d,]+\.?\d{0,2}',
+    'dates': (
+        r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b'
+        r'|\b\d{4}[/-]\d{1,2}[/-]\d{1,2}\b'
+        r'|\b(?i:(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*)\s+\d{1,2},?\s+\d{4}\b'
+    ),
+    # One pattern covers both legacy phone forms: 555-123-4567, (555) 123 4567, +1 555.123.4567, 5551234567
+    'phone_numbers': r'(?<![\d$])(?:\+?1[\s.-]?)?(?:\(\d{3}\)|\d{3})[\s.-]?\d{3}[\s.-]?\d{4}(?!\d)'
+}
+FIELD_REGEXES = {kind: re.compile(pattern) for kind, pattern in FIELD_PATTERNS.items()}
+ENTITY_SCANNER = re.compile("|".join(f"(?P<{kind}>{pattern})" for kind, pattern in FIELD_PATTERNS.items()))
+_NON_DIGIT = re.compile(r'\D')
+_AMOUNT_NOISE = re.compile(r'[\s,]')
+_AMOUNT_VALUE = re.compile(r'-?\d+(?:\.\d+)?')
+
+def _dedupe_key(kind: str, value: str) -> str:
+    # Formatting variants of the same phone number, amount or address collapse to one entry
+    if kind == 'phone_numbers':
+        return _NON_DIGIT.sub('', value)[-10:]
+    if kind == 'amounts':
+        return _AMOUNT_NOISE.sub('', value)
+    if kind == 'email_addresses':
+        return value.lower()
+    return value
+
+def _unique_matches(kind: str, text: str) -> List[str]:
+    seen = {}
+    for match in FIELD_REGEXES[kind].finditer(text):
+        seen.setdefault(_dedupe_key(kind, match.group(0)), match.group(0))
+    return list(seen.values())
+
+# Body normalization: a line matching _REPLY_HEADER starts the quoted history
+_REPLY_HEADER = re.compile(
+    r'^\s*(?:On\b.{0,200}\bwrote:\s*$'
+    r'|-{2,}\s*(?:Original|Forwarded) Message\s*-{2,}'
+    r'|Begin forwarded message:'
+    r'|_{20,}\s*$'
+    r'|From:\s.+)',
+    re.IGNORECASE
+)
+# An Outlook-style "From:" line only counts when a Sent:/Date: header follows within a few lines
+_HEADER_FOLLOWS = re.compile(r'^\s*(?:Sent|Date|To|Subject):', re.IGNORECASE)
+_QUOTED_LINE = re.compile(r'^\s*>')
+_SIGNATURE_START = re.compile(
+    r'^\s*(?:--\s*$|(?:best |kind |warm |many )?(?:regards|thanks|thank you|sincerely|cheers),?\s*$|sent from my\b)',
+    re.IGNORECASE
+)
+_DISCLAIMER_START = re.compile(
+    r'^\s*(?:\**\s*(?:confidentiality notice|disclaimer|privileged (?:and|&) confidential)\b'
+    r'|this (?:e-?mail|message|communication)(?: and any (?:files|attachments))?.{0,40}\b(?:confidential|intended (?:solely|only)))',
+    re.IGNORECASE
+)
+# Claim references, amounts and loss details after a sign-off mean it was not the start of the signature
+_MESSAGE_CONTENT = re.compile(
+    r'\b(?:claim|policy)\b[\s#:.-]*(?:(?:no|number)\b\.?[\s#:.-]*)?[A-Z0-9-]*\d'
+    r'|\$\s*\d'
+    r'|\b(?:damage|injury|injured|injuries|accident|collision|fatality|lawsuit)\b',
+    re.IGNORECASE
+)
+_WORD = re.compile(r'\S+')
+# Sign-offs further up than this many lines are treated as part of the message
+SIGNATURE_MAX_LINES = 12
+_BLOCK_TAGS = {'p', 'div', 'br', 'tr', 'li', 'table', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote', 'hr'}
+
+class _HTMLTextExtractor(HTMLParser):
+    """HTML to plain text; blockquote and gmail_quote content is emitted as '>' lines"""
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.lines: List[str] = []
+        self.current: List[str] = []
+        self.skip_depth = 0
+        self.quote_depth = 0
+        self.quote_tags: List[bool] = []
+    def _break(self):
+        line = "".join(self.current)
+        self.lines.append(("> " + line) if self.quote_depth and line.strip() else line)
+        self.current = []
+    def handle_starttag(self, tag, attrs):
+        if tag in ('script', 'style', 'head'):
+            self.skip_depth += 1
+            return
+        if tag in _BLOCK_TAGS:
+            self._break()
+        if tag in ('blockquote', 'div'):
+            quoted = tag == 'blockquote' or 'gmail_quote' in (dict(attrs).get('class') or '')
+            self.quote_tags.append(quoted)
+            self.quote_depth += quoted
+    def handle_endtag(self, tag):
+        if tag in ('script', 'style', 'head'):
+            self.skip_depth = max(0, self.skip_depth - 1)
+            return
+        if tag in _BLOCK_TAGS:
+            self._break()
+        if tag in ('blockquote', 'div') and self.quote_tags:
+            self.quote_depth -= self.quote_tags.pop()
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.current.append(data)
+    def text(self) -> str:
+        self._break()
+        return "\n".join(self.lines)
+
+def html_to_text(html: str) -> str:
+    extractor = _HTMLTextExtractor()
+    extractor.feed(html or "")
+    extractor.close()
+    return extractor.text()
+
+def _split_lines(text: str) -> List[Tuple[int, str]]:
+    lines, offset = [], 0
+    for line in text.splitlines(keepends=True):
+        lines.append((offset, line.rstrip('\r\n')))
+        offset += len(line)
+    return lines
+
+def _history_start(lines: List[Tuple[int, str]]) -> int:
+    for index, (_, line) in enumerate(lines):
+        # Converted HTML marks quoted blocks with '>', so headers may carry one too
+        line = _QUOTED_LINE.sub('', line, count=1)
+        if not _REPLY_HEADER.match(line):
+            continue
+        if line.lstrip()[:5].lower() == 'from:':
+            following = [text for _, text in lines[index + 1:index + 5]]
+            if not any(_HEADER_FOLLOWS.match(text) for text in following):
+                continue
+        return index
+    return len(lines)
+
+def _trailer_start(lines: List[Tuple[int, str]], end: int) -> Tuple[int, int]:
+    """Line indexes where the signature and disclaimer start within lines[:end] (end when absent)"""
+    disclaimer = next((i for i in range(end) if _DISCLAIMER_START.match(lines[i][1])), end)
+    content = [i for i in range(disclaimer) if lines[i][1].strip()]
+    window = content[-SIGNATURE_MAX_LINES:]
+    # Only a sign-off with nothing but name and contact lines after it starts the signature
+    last_message = max((i for i in window if _MESSAGE_CONTENT.search(lines[i][1])), default=-1)
+    # The first such sign-off in the tail wins; an earlier one would leave the name and contact lines in
+    first = content[0] if content else None
+    signature = next(
+        (i for i in window if i > last_message and i != first and _SIGNATURE_START.match(lines[i][1])), disclaimer
+    )
+    return signature, disclaimer
+
 class EmailParser:
     """Parse email content and extract structured data"""
     @staticmethod
@@ -18,40 +177,130 @@ class EmailParser:
             "attachments": email_data.get("attachments", []),
             "headers": email_data.get("headers", {})
         }
+        parsed["body_view"] = EmailParser.normalize_body(parsed["body_text"], parsed["body_html"])
         return parsed
     @staticmethod
+    def normalize_body(body_text: str, body_html: str = "") -> Dict:
+        """Build the compact new-content view of an email body that extractors consume
+
+        The plain-text body is used when present, otherwise the HTML body is
+        converted to text (source_text). Quoted history from the first reply
+        or forward header onwards, '>' quoted lines, the trailing signature and
+        any legal disclaimer are removed and whitespace is collapsed. segments
+        holds (view_start, source_start, length) runs so view offsets can be
+        mapped back to source_text with map_offset.
+        """
+        source = 'body_text' if (body_text or '').strip() else 'body_html'
+        source_text = body_text if source == 'body_text' else html_to_text(body_html)
+        lines = _split_lines(source_text or '')
+        history = _history_start(lines)
+        signature, disclaimer = _trailer_start(lines, history)
+        parts: List[str] = []
+        segments: List[Tuple[int, int, int]] = []
+        position = 0
+        pending_break = ''
+        for line_start, line in lines[:signature]:
+            if _QUOTED_LINE.match(line):
+                continue
+            words = list(_WORD.finditer(line))
+            if not words:
+                if parts:
+                    pending_break = '\n\n'
+                continue
+            if parts:
+                separator = pending_break or '\n'
+                parts.append(separator)
+                position += len(separator)
+            pending_break = ''
+            for index, word in enumerate(words):
+                if index:
+                    parts.append(' ')
+                    position += 1
+                source_start = line_start + word.start()
+                length = word.end() - word.start()
+                previous = segments[-1] if segments else None
+                # Words separated by a single space in the source extend the current run
+                if index and previous[0] + previous[2] + 1 == position and previous[1] + previous[2] + 1 == source_start:
+                    segments[-1] = (previous[0], previous[1], previous[2] + 1 + length)
+                else:
+                    segments.append((position, source_start, length))
+                parts.append(word.group(0))
+                position += length
+        def section(start: int, end: int) -> str:
+            if start >= end:
+                return ''
+            stop = lines[end][0] if end < len(lines) else len(source_text)
+            return source_text[lines[start][0]:stop].strip()
+        text = "".join(parts)
+        return {
+            'text': text,
+            'source': source,
+            'source_text': source_text,
+            'segments': segments,
+            'signature_text': section(signature, disclaimer),
+            'disclaimer_text': section(disclaimer, history),
+            'quoted_text': section(history, len(lines)),
+            'original_length': len(source_text or ''),
+            'view_length': len(text)
+        }
+    @staticmethod
+    def map_offset(body_view: Dict, offset: int) -> int:
+        """Map an offset in body_view['text'] back to body_view['source_text']"""
+        segments = body_view['segments']
+        if not segments:
+            return 0
+        index = max(bisect_right([segment[0] for segment in segments], offset) - 1, 0)
+        view_start, source_start, length = segments[index]
+        return source_start + min(max(offset - view_start, 0), length)
+    @staticmethod
+    def content_text(email: Dict) -> str:
+        """Body text extractors should scan: the normalized view when parsed, else the raw body"""
+        view = email.get('body_view')
+        return view['text'] if view else email.get('body_text', '')
+    @staticmethod
+    def iter_all(text: str) -> Iterator[Tuple[str, str, int, int]]:
+        """Lazily yield (kind, value, start, end) for the first occurrence of each distinct field value
+
+        One combined scan finds every kind; matches do not overlap, so at a
+        given position email addresses win over amounts, dates and phone numbers.
+        """
+        seen = set()
+        for match in ENTITY_SCANNER.finditer(text or ''):
+            kind = match.lastgroup
+            value = match.group(kind)
+            key = (kind, _dedupe_key(kind, value))
+            if key in seen:
+                continue
+            seen.add(key)
+            yield kind, value, match.start(), match.end()
+    @staticmethod
+    def extract_all(text: str) -> Dict[str, List[Dict]]:
+        """Email addresses, phone numbers, dates and amounts with positions, in order of first appearance"""
+        found = {kind: [] for kind in FIELD_PATTERNS}
+        for kind, value, start, end in EmailParser.iter_all(text):
+            found[kind].append({'value': value, 'start': start, 'end': end})
+        return found
+    @staticmethod
     def extract_email_addresses(text: str) -> List[str]:
-        pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        return list(set(re.findall(pattern, text)))
+        return _unique_matches('email_addresses', text)
     @staticmethod
     def extract_phone_numbers(text: str) -> List[str]:
-        patterns = [
-            r'\+?1?\s*\(?([0-9]{3})\)?[\s.-]?([0-9]{3})[\s.-]?([0-9]{4})',
-            r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b'
-        ]
-        phones = []
-        for pattern in patterns:
-            matches = re.finditer(pattern, text)
-            for match in matches:
-                phones.append(match.group(0))
-        return list(set(phones))
+        return _unique_matches('phone_numbers', text)
     @staticmethod
     def extract_dates(text: str) -> List[str]:
-        patterns = [
-            r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b',
-            r'\b\d{4}[/-]\d{1,2}[/-]\d{1,2}\b',
-            r'\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{1,2},?\s+\d{4}\b'
-        ]
-        dates = []
-        for pattern in patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            dates.extend(matches)
-        return list(set(dates))
+        return _unique_matches('dates', text)
     @staticmethod
     def extract_amounts(text: str) -> List[str]:
-        pattern = r'\$\s*[\d,]+\.?\d{0,2}'
-        amounts = re.findall(pattern, text)
-        return list(set(amounts))
+        return _unique_matches('amounts', text)
+    @staticmethod
+    def parse_amount(value) -> Optional[float]:
+        """Numeric value of an extracted amount such as '$1,500.00' or 'USD 200', rounded to cents"""
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return round(float(value), 2)
+        if not isinstance(value, str):
+            return None
+        match = _AMOUNT_VALUE.search(_AMOUNT_NOISE.sub('', value))
+        return round(float(match.group(0)), 2) if match else None
     @staticmethod
     def classify_attachment_type(filename: str) -> Dict[str, str]:
         ext = Path(filename).suffix.lower()
@@ -74,3 +323,12 @@ class EmailParser:
             '.msg': {'type': 'email', 'category': 'email_file'}
         }
         return classifications.get(ext, {'type': 'unknown', 'category': 'other'})
+    @staticmethod
+    def sniff_attachment_type(header: bytes, filename: str = "") -> Dict[str, str]:
+        """Classify an attachment from its first bytes, falling back to the file extension"""
+        for signature, classification in MAGIC_SIGNATURES:
+            if header.startswith(signature):
+                return dict(classification)
+        if header[4:8] == b'ftyp' or (header[:4] == b'RIFF' and header[8:12] == b'AVI '):
+            return {'type': 'video', 'category': 'video'}
+        return EmailParser.classify_attachment_type(filename)
@@ -0,0 +1,16 @@
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Retry-After as delay-seconds or an HTTP-date; None when missing or unparseable"""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
@@ -0,0 +1,118 @@
+import os
+import json
+import mmap
+import shutil
+import hashlib
+from datetime import datetime, timezone
+from pathlib import Path
+from contextlib import contextmanager
+from typing import BinaryIO, Dict, Iterator, List
+
+class LocalBlobConnector:
+    """Filesystem stand-in for BlobConnector: containers are sub-directories of root_dir"""
+    
+    def __init__(self, root_dir: str, logger=None):
+        self.root_dir = Path(root_dir)
+        self.logger = logger
+    
+    def _blob_path(self, container_name: str, blob_name: str) -> Path:
+        return self.root_dir / container_name / blob_name
+    
+    def list_emails(self, container_name: str, prefix: str = "") -> List[str]:
+        return [blob['name'] for blob in self.iter_email_blobs(container_name, prefix)]
+    
+    def iter_email_blobs(self, container_name: str, prefix: str = "", page_size: int = 500) -> Iterator[Dict]:
+        """Yield blob properties in name order, mirroring BlobConnector.iter_email_blobs"""
+        container = self.root_dir / container_name
+        if not container.exists():
+            return
+        for root, dirs, files in os.walk(container):
+            dirs.sort()
+            for filename in sorted(files):
+                path = Path(root) / filename
+                name = path.relative_to(container).as_posix()
+                if not name.startswith(prefix):
+                    continue
+                stat = path.stat()
+                yield {
+                    'name': name,
+                    'etag': hashlib.md5(f"{stat.st_mtime_ns}:{stat.st_size}".encode()).hexdigest(),
+                    'last_modified': datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+                    'size': stat.st_size
+                }
+    
+    def read_email_blob(self, container_name: str, blob_name: str) -> Dict:
+        try:
+            with open(self._blob_path(container_name, blob_name), 'rb') as f:
+                return json.loads(f.read().decode('utf-8'))
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"Error reading blob {blob_name}: {str(e)}")
+            raise
+    
+    def read_attachment(self, container_name: str, blob_name: str) -> bytes:
+        try:
+            with open(self._blob_path(container_name, blob_name), 'rb') as f:
+                return f.read()
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"Error reading attachment {blob_name}: {str(e)}")
+            raise
+    
+    def read_attachment_header(self, container_name: str, blob_name: str, num_bytes: int = 8192) -> bytes:
+        with open(self._blob_path(container_name, blob_name), 'rb') as f:
+            return f.read(num_bytes)
+    
+    def iter_attachment_chunks(
+        self,
+        container_name: str,
+        blob_name: str,
+        chunk_size: int = 4 * 1024 * 1024,
+        max_concurrency: int = 1
+    ) -> Iterator[bytes]:
+        with open(self._blob_path(container_name, blob_name), 'rb') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+    
+    def open_attachment(self, container_name: str, blob_name: str, chunk_size: int = 4 * 1024 * 1024) -> BinaryIO:
+        return open(self._blob_path(container_name, blob_name), 'rb', buffering=chunk_size)
+    
+    @contextmanager
+    def spool_attachment(
+        self,
+        container_name: str,
+        blob_name: str,
+        chunk_size: int = 4 * 1024 * 1024,
+        max_concurrency: int = 1,
+        memory_threshold: int = 4 * 1024 * 1024
+    ):
+        # The local file already is the spool; map it directly whatever its size
+        with open(self._blob_path(container_name, blob_name), 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield b""
+                return
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                yield mapped
+            finally:
+                mapped.close()
+    
+    def write_processed_data(self, container_name: str, blob_name: str, data: Dict) -> str:
+        path = self._blob_path(container_name, blob_name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(data, indent=2, default=str), encoding='utf-8')
+        return path.as_uri()
+    
+    def move_to_archive(self, source_container: str, dest_container: str, blob_name: str) -> bool:
+        try:
+            dest = self._blob_path(dest_container, f"archived_{datetime.now().strftime('%Y%m%d')}_{blob_name}")
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            shutil.move(str(self._blob_path(source_container, blob_name)), str(dest))
+            return True
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"Error archiving blob {blob_name}: {str(e)}")
+            return False
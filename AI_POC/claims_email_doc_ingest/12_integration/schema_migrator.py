@@ -0,0 +1,128 @@
+import re
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Optional
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[1] / "03_sql_queries" / "migrations"
+MIGRATION_FILE = re.compile(r'^V(\d+)__(\w+)\.sql$')
+# sqlcmd-style batch separator: GO alone on its line
+_BATCH_SEPARATOR = re.compile(r'^\s*GO\s*$', re.IGNORECASE | re.MULTILINE)
+
+def split_batches(sql: str) -> List[str]:
+    return [batch.strip() for batch in _BATCH_SEPARATOR.split(sql) if batch.strip()]
+
+def load_migrations(migrations_dir: Optional[str] = None) -> List[Dict]:
+    """Versioned scripts named V<version>__<name>.sql, in version order"""
+    migrations = []
+    for path in sorted(Path(migrations_dir or MIGRATIONS_DIR).glob("*.sql")):
+        match = MIGRATION_FILE.match(path.name)
+        if not match:
+            raise ValueError(f"Migration file must be named V<version>__<name>.sql: {path.name}")
+        sql = path.read_text(encoding='utf-8')
+        migrations.append({
+            'version': int(match.group(1)),
+            'name': match.group(2),
+            'path': str(path),
+            'checksum': hashlib.sha256(sql.encode('utf-8')).hexdigest(),
+            'batches': split_batches(sql)
+        })
+    migrations.sort(key=lambda migration: migration['version'])
+    versions = [migration['version'] for migration in migrations]
+    if len(set(versions)) != len(versions):
+        raise ValueError(f"Duplicate migration versions in {migrations_dir or MIGRATIONS_DIR}")
+    return migrations
+
+class SchemaMigrator:
+    """Applies the versioned scripts in 03_sql_queries/migrations, one transaction per version
+
+    Applied versions are recorded with their checksum in the history table;
+    an applied script that has since been edited is reported instead of
+    silently skipped, so schema drift surfaces before anything new runs.
+    """
+    def __init__(self, sql_writer, migrations_dir: Optional[str] = None,
+                 table_name: str = "tbl_schema_migrations", logger=None):
+        self.sql_writer = sql_writer
+        self.migrations_dir = migrations_dir
+        self.table_name = table_name
+        self.logger = logger
+    def ensure_history_table(self):
+        with self.sql_writer.cursor() as (conn, cursor):
+            cursor.execute(f"""
+            IF OBJECT_ID('{self.table_name}') IS NULL
+            CREATE TABLE {self.table_name} (
+                version INT NOT NULL PRIMARY KEY,
+                name NVARCHAR(255) NOT NULL,
+                checksum CHAR(64) NOT NULL,
+                applied_at DATETIME DEFAULT GETDATE()
+            )
+            """)
+            conn.commit()
+    def applied_versions(self) -> Dict[int, str]:
+        """version -> checksum of every applied migration"""
+        with self.sql_writer.cursor() as (conn, cursor):
+            cursor.execute(f"SELECT version, checksum FROM {self.table_name}")
+            return {row[0]: row[1] for row in cursor.fetchall()}
+    def pending(self) -> List[Dict]:
+        applied = self.applied_versions()
+        migrations = load_migrations(self.migrations_dir)
+        changed = [
+            f"V{m['version']:03d}__{m['name']}" for m in migrations
+            if m['version'] in applied and applied[m['version']].strip() != m['checksum']
+        ]
+        if changed:
+            raise ValueError(f"Applied migrations were edited after they ran: {', '.join(changed)}")
+        return [m for m in migrations if m['version'] not in applied]
+    def migrate(self, target_version: Optional[int] = None) -> List[int]:
+        """Apply pending migrations up to target_version (all by default); returns the versions applied"""
+        self.ensure_history_table()
+        applied = []
+        for migration in self.pending():
+            if target_version is not None and migration['version'] > target_version:
+                break
+            label = f"V{migration['version']:03d}__{migration['name']}"
+            try:
+                with self.sql_writer.cursor() as (conn, cursor):
+                    for batch in migration['batches']:
+                        cursor.execute(batch)
+                    cursor.execute(
+                        f"INSERT INTO {self.table_name} (version, name, checksum, applied_at) VALUES (?, ?, ?, GETDATE())",
+                        (migration['version'], migration['name'], migration['checksum'])
+                    )
+                    conn.commit()
+            except Exception as e:
+                if self.logger:
+                    self.logger.error(f"Migration {label} failed and was rolled back: {str(e)}")
+                raise
+            if self.logger:
+                self.logger.info(f"Applied migration {label}")
+            applied.append(migration['version'])
+        return applied
+    def extend_monthly_partitions(self, months_ahead: int = 3,
+                                  function_name: str = "pf_monthly_created_at",
+                                  scheme_name: str = "ps_monthly_created_at") -> int:
+        """Split in empty partitions up to months_ahead past the current month; returns months added"""
+        with self.sql_writer.cursor() as (conn, cursor):
+            cursor.execute(f"""
+            SET NOCOUNT ON;
+            DECLARE @last DATETIME = (
+                SELECT MAX(CAST(rv.value AS DATETIME))
+                FROM sys.partition_range_values rv
+                INNER JOIN sys.partition_functions pf ON pf.function_id = rv.function_id
+                WHERE pf.name = '{function_name}'
+            );
+            DECLARE @target DATETIME = DATEADD(month, ?, DATEFROMPARTS(YEAR(GETDATE()), MONTH(GETDATE()), 1));
+            DECLARE @added INT = 0;
+            WHILE @last < @target
+            BEGIN
+                SET @last = DATEADD(month, 1, @last);
+                ALTER PARTITION SCHEME {scheme_name} NEXT USED [PRIMARY];
+                ALTER PARTITION FUNCTION {function_name}() SPLIT RANGE (@last);
+                SET @added += 1;
+            END
+            SELECT @added;
+            """, (months_ahead,))
+            added = cursor.fetchone()[0]
+            conn.commit()
+        if self.logger:
+            self.logger.info(f"Added {added} monthly partitions to {function_name}")
+        return added
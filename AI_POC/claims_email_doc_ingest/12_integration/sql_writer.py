@@ -1,181 +1,542 @@
 import pyodbc
 import json
-from typing import Dict, List, Optional, Any
-from datetime import datetime
+from typing import Callable, Dict, List, Optional, Any
+from datetime import date, datetime
 import pandas as pd
+from 12_integration.connection_pool import ConnectionPool
+from 12_integration.email_parser import EmailParser
+
+DEFAULT_TABLES = {
+    "emails": "tbl_claims_emails",
+    "entities": "tbl_extracted_entities",
+    "attachments": "tbl_attachments",
+    "triage": "tbl_triage_results"
+}
+EMAIL_COLUMNS = (
+    "message_id", "subject", "sender", "recipients", "email_date",
+    "body_text", "body_html", "has_attachments", "attachment_count", "blob_path"
+)
+ENTITY_COLUMNS = (
+    "email_id", "claim_number", "policy_number", "insured_name",
+    "date_of_loss", "claim_amount", "phone_numbers", "email_addresses",
+    "incident_description", "confidence_score", "extraction_method"
+)
+# Numeric claim amount; V007 adds the column together with the triage rollup table, so it is
+# only written when tables names 'triage_rollup'
+AMOUNT_VALUE_COLUMN = "claim_amount_value"
+TRIAGE_COLUMNS = (
+    "email_id", "priority_level", "claim_type", "risk_level",
+    "requires_escalation", "assigned_to", "triage_notes", "confidence_score"
+)
+ATTACHMENT_COLUMNS = (
+    "email_id", "filename", "file_type", "file_category", "file_size",
+    "blob_path", "is_invoice", "is_medical_record", "document_type",
+    "classification_confidence"
+)
+# SQL Server caps a statement at 2100 parameters and a VALUES list at 1000 rows
+MAX_PARAMETERS = 2100
+MAX_VALUES_ROWS = 1000
+# Health counter stages: every email passes emails -> entities -> triage
+HEALTH_STAGES = ("emails", "entities", "triage")
+
+def _email_row(email_data: Dict) -> tuple:
+    return (
+        email_data.get('message_id'),
+        email_data.get('subject'),
+        email_data.get('from'),
+        json.dumps(email_data.get('to', [])),
+        email_data.get('date'),
+        email_data.get('body_text'),
+        email_data.get('body_html'),
+        len(email_data.get('attachments', [])) > 0,
+        len(email_data.get('attachments', [])),
+        email_data.get('blob_path')
+    )
+
+def _entity_columns(tables: Dict[str, str]) -> tuple:
+    return ENTITY_COLUMNS + (AMOUNT_VALUE_COLUMN,) if tables.get('triage_rollup') else ENTITY_COLUMNS
+
+def _entity_row(email_id: int, entities: Dict, amount_value: bool = False) -> tuple:
+    row = (
+        email_id,
+        entities.get('claim_number'),
+        entities.get('policy_number'),
+        entities.get('insured_name'),
+        entities.get('date_of_loss'),
+        entities.get('claim_amount'),
+        json.dumps(entities.get('phone_numbers', [])),
+        json.dumps(entities.get('email_addresses', [])),
+        entities.get('incident_description'),
+        entities.get('confidence_score', 0.0),
+        entities.get('extraction_method', 'ai')
+    )
+    return row + (EmailParser.parse_amount(entities.get('claim_amount')),) if amount_value else row
+
+def _triage_row(email_id: int, triage_data: Dict) -> tuple:
+    return (
+        email_id,
+        triage_data.get('priority_level'),
+        triage_data.get('claim_type'),
+        triage_data.get('risk_level'),
+        triage_data.get('requires_escalation', False),
+        triage_data.get('assigned_to'),
+        triage_data.get('triage_notes'),
+        triage_data.get('confidence_score', 0.0)
+    )
+
+def _attachment_row(email_id: int, att: Dict) -> tuple:
+    return (
+        email_id,
+        att.get('filename'),
+        att.get('file_type'),
+        att.get('file_category'),
+        att.get('file_size'),
+        att.get('blob_path'),
+        att.get('is_invoice', False),
+        att.get('is_medical_record', False),
+        att.get('document_type'),
+        att.get('classification_confidence', 0.0)
+    )
+
+def _multi_row_insert(cursor, table_name: str, columns: tuple, rows: List[tuple], output: str = "") -> List:
+    """INSERT rows with multi-row VALUES lists; returns OUTPUT rows when output is given"""
+    rows_per_statement = _rows_per_statement(len(columns))
+    row_placeholder = "(" + ", ".join("?" for _ in columns) + ", GETDATE())"
+    returned = []
+    for start in range(0, len(rows), rows_per_statement):
+        chunk = rows[start:start + rows_per_statement]
+        query = (
+            f"INSERT INTO {table_name} ({', '.join(columns)}, created_at) "
+            f"{output} VALUES {', '.join(row_placeholder for _ in chunk)}"
+        )
+        cursor.execute(query, [value for row in chunk for value in row])
+        if output:
+            returned.extend(cursor.fetchall())
+    return returned
+
+def _rows_per_statement(column_count: int) -> int:
+    return max(1, min(MAX_VALUES_ROWS, (MAX_PARAMETERS - 1) // column_count))
+
+def _record_stage_progress(cursor, tables: Dict[str, str], progress: Dict[str, List[int]],
+                           pending: List[tuple]):
+    """Keep the health counters current inside the caller's transaction
+
+    progress maps a stage to the email ids it just wrote (watermark and
+    processed count); pending holds (stage, email_id, delta) changes to the
+    backlog, bucketed by the hour the email arrived. A no-op unless tables
+    names both 'stage_watermarks' and 'pending_counters'.
+    """
+    watermarks, counters = tables.get('stage_watermarks'), tables.get('pending_counters')
+    if not (watermarks and counters):
+        return
+    progress_rows = [(stage, len(ids), max(ids)) for stage, ids in progress.items() if ids]
+    if progress_rows:
+        cursor.execute(
+            f"""
+            MERGE {watermarks} WITH (HOLDLOCK) AS target
+            USING (VALUES {', '.join('(?, ?, ?)' for _ in progress_rows)}) AS source (stage, items, last_email_id)
+            ON target.stage = source.stage
+            WHEN MATCHED THEN UPDATE SET
+                processed_count = target.processed_count + source.items,
+                last_email_id = CASE WHEN source.last_email_id > target.last_email_id
+                                     THEN source.last_email_id ELSE target.last_email_id END,
+                updated_at = GETDATE()
+            WHEN NOT MATCHED THEN INSERT (stage, processed_count, last_email_id, updated_at)
+                VALUES (source.stage, source.items, source.last_email_id, GETDATE());
+            """,
+            [value for row in progress_rows for value in row]
+        )
+    rows_per_statement = _rows_per_statement(3)
+    for start in range(0, len(pending), rows_per_statement):
+        chunk = pending[start:start + rows_per_statement]
+        cursor.execute(
+            f"""
+            MERGE {counters} WITH (HOLDLOCK) AS target
+            USING (
+                SELECT v.stage, DATEADD(hour, DATEDIFF(hour, 0, e.created_at), 0) AS bucket_hour, SUM(v.delta) AS delta
+                FROM (VALUES {', '.join('(?, ?, ?)' for _ in chunk)}) AS v (stage, email_id, delta)
+                INNER JOIN {tables['emails']} e ON e.id = v.email_id
+                GROUP BY v.stage, DATEADD(hour, DATEDIFF(hour, 0, e.created_at), 0)
+            ) AS source
+            ON target.stage = source.stage AND target.bucket_hour = source.bucket_hour
+            WHEN MATCHED THEN UPDATE SET pending_count = target.pending_count + source.delta, updated_at = GETDATE()
+            WHEN NOT MATCHED THEN INSERT (stage, bucket_hour, pending_count, updated_at)
+                VALUES (source.stage, source.bucket_hour, source.delta, GETDATE());
+            """,
+            [value for row in chunk for value in row]
+        )
+    if pending:
+        # Drained buckets are dropped so the counter table only holds the live backlog
+        cursor.execute(f"DELETE FROM {counters} WHERE pending_count = 0")
+
+def _existing_email_ids(cursor, table_name: str, message_ids: List[str]) -> Dict[str, int]:
+    found = {}
+    for start in range(0, len(message_ids), MAX_PARAMETERS - 1):
+        chunk = message_ids[start:start + MAX_PARAMETERS - 1]
+        cursor.execute(
+            f"SELECT message_id, id FROM {table_name} WHERE message_id IN ({', '.join('?' for _ in chunk)})", chunk
+        )
+        found.update({message_id: email_id for message_id, email_id in cursor.fetchall()})
+    return found
+
+def _rollup_key(triage_data: Dict) -> tuple:
+    return (
+        triage_data.get('claim_type') or 'unknown',
+        triage_data.get('risk_level') or 'unknown',
+        bool(triage_data.get('requires_escalation', False))
+    )
+
+def _record_triage_rollup(cursor, tables: Dict[str, str], rows: List[tuple]):
+    """Add (rollup key, claim amount or None) rows to today's triage rollup
+
+    Rows are pre-aggregated here so each write merges one row per
+    claim_type/risk_level/escalation group. A no-op unless tables names
+    'triage_rollup'.
+    """
+    rollup = tables.get('triage_rollup')
+    if not rollup or not rows:
+        return
+    groups: Dict[tuple, List] = {}
+    for key, amount in rows:
+        totals = groups.setdefault(key, [0, 0, 0.0])
+        totals[0] += 1
+        if amount is not None:
+            totals[1] += 1
+            totals[2] += amount
+    values = [key + tuple(totals) for key, totals in groups.items()]
+    rows_per_statement = _rows_per_statement(6)
+    for start in range(0, len(values), rows_per_statement):
+        chunk = values[start:start + rows_per_statement]
+        cursor.execute(
+            f"""
+            MERGE {rollup} WITH (HOLDLOCK) AS target
+            USING (
+                SELECT CAST(GETDATE() AS DATE) AS rollup_date, v.claim_type, v.risk_level, v.requires_escalation,
+                    v.email_count, v.amount_count, CAST(v.amount_sum AS DECIMAL(18, 2)) AS amount_sum
+                FROM (VALUES {', '.join('(?, ?, ?, ?, ?, ?)' for _ in chunk)})
+                    AS v (claim_type, risk_level, requires_escalation, email_count, amount_count, amount_sum)
+            ) AS source
+            ON target.rollup_date = source.rollup_date
+                AND target.claim_type = source.claim_type
+                AND target.risk_level = source.risk_level
+                AND target.requires_escalation = source.requires_escalation
+            WHEN MATCHED THEN UPDATE SET
+                email_count = target.email_count + source.email_count,
+                amount_count = target.amount_count + source.amount_count,
+                amount_sum = target.amount_sum + source.amount_sum,
+                updated_at = GETDATE()
+            WHEN NOT MATCHED THEN INSERT (
+                rollup_date, claim_type, risk_level, requires_escalation,
+                email_count, amount_count, amount_sum, updated_at
+            )
+            VALUES (
+                source.rollup_date, source.claim_type, source.risk_level, source.requires_escalation,
+                source.email_count, source.amount_count, source.amount_sum, GETDATE()
+            );
+            """,
+            [value for row in chunk for value in row]
+        )
 
 class SQLWriter:
     """SQL Server database writer for claims data"""
-    def __init__(self, connection_string: str, logger=None):
+    def __init__(self, connection_string: str, logger=None, connection_factory: Optional[Callable] = None,
+                 pool_options: Optional[Dict[str, Any]] = None):
         self.connection_string = connection_string
         self.logger = logger
+        # Any DB-API connect(connection_string) callable; sqlite3.connect gives an offline stand-in
+        self.connection_factory = connection_factory or pyodbc.connect
+        # pool_options: max_size, timeout, max_idle_seconds, max_lifetime_seconds, health_check_interval
+        self.pool = ConnectionPool(self.get_connection, logger=logger, **(pool_options or {}))
     def get_connection(self):
         try:
-            return pyodbc.connect(self.connection_string)
+            return self.connection_factory(self.connection_string)
         except Exception as e:
             if self.logger:
                 self.logger.error(f"Database connection error: {str(e)}")
             raise
-    def insert_email(self, email_data: Dict, table_name: str = "tbl_claims_emails") -> int:
+    def connection(self):
+        """Borrow a pooled connection: `with writer.connection() as conn:`"""
+        return self.pool.connection()
+    def cursor(self):
+        """Borrow a pooled connection and its reusable cursor: `with writer.cursor() as (conn, cursor):`"""
+        return self.pool.cursor()
+    def pool_metrics(self) -> Dict[str, Any]:
+        return self.pool.metrics()
+    def close(self):
+        self.pool.close_all()
+    def insert_email(self, email_data: Dict, table_name: str = "tbl_claims_emails",
+                     tables: Optional[Dict[str, str]] = None) -> int:
+        """Insert one email; with health counter tables in tables it is counted as awaiting entities
+
+        An email whose message_id is already stored is not inserted again; its existing id is returned.
+        """
+        tables = {**DEFAULT_TABLES, **(tables or {}), 'emails': table_name}
+        message_id = email_data.get('message_id')
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            query = f"""
-            INSERT INTO {table_name} (
-                message_id, subject, sender, recipients, email_date,
-                body_text, body_html, has_attachments, attachment_count,
-                blob_path, created_at
-            )
-            OUTPUT INSERTED.id
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, GETDATE())
-            """
-            cursor.execute(query, (
-                email_data.get('message_id'),
-                email_data.get('subject'),
-                email_data.get('from'),
-                json.dumps(email_data.get('to', [])),
-                email_data.get('date'),
-                email_data.get('body_text'),
-                email_data.get('body_html'),
-                len(email_data.get('attachments', [])) > 0,
-                len(email_data.get('attachments', [])),
-                email_data.get('blob_path')
-            ))
-            email_id = cursor.fetchone()[0]
-            conn.commit()
-            if self.logger:
-                self.logger.info(f"Inserted email with ID: {email_id}")
-            return email_id
+            with self.cursor() as (conn, cursor):
+                existing = _existing_email_ids(cursor, table_name, [message_id]) if message_id else {}
+                if message_id in existing:
+                    if self.logger:
+                        self.logger.info(f"Email {message_id} already stored with ID: {existing[message_id]}")
+                    return existing[message_id]
+                query = f"""
+                INSERT INTO {table_name} (
+                    message_id, subject, sender, recipients, email_date,
+                    body_text, body_html, has_attachments, attachment_count,
+                    blob_path, created_at
+                )
+                OUTPUT INSERTED.id
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, GETDATE())
+                """
+                cursor.execute(query, _email_row(email_data))
+                row = cursor.fetchone()
+                if row is None:
+                    # Dropped by an index that ignores duplicate keys: another writer stored it in the meantime
+                    return _existing_email_ids(cursor, table_name, [message_id])[message_id]
+                email_id = row[0]
+                _record_stage_progress(cursor, tables, {'emails': [email_id]}, [('entities', email_id, 1)])
+                conn.commit()
+                if self.logger:
+                    self.logger.info(f"Inserted email with ID: {email_id}")
+                return email_id
         except Exception as e:
             if self.logger:
                 self.logger.error(f"Error inserting email: {str(e)}")
             raise
-        finally:
-            if conn:
-                conn.close()
-    def insert_entities(self, email_id: int, entities: Dict, table_name: str = "tbl_extracted_entities") -> bool:
+    def insert_entities(self, email_id: int, entities: Dict, table_name: str = "tbl_extracted_entities",
+                        tables: Optional[Dict[str, str]] = None) -> bool:
+        tables = {**DEFAULT_TABLES, **(tables or {})}
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            query = f"""
-            INSERT INTO {table_name} (
-                email_id, claim_number, policy_number, insured_name,
-                date_of_loss, claim_amount, phone_numbers, email_addresses,
-                incident_description, confidence_score, extraction_method,
-                created_at
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, GETDATE())
-            """
-            cursor.execute(query, (
-                email_id,
-                entities.get('claim_number'),
-                entities.get('policy_number'),
-                entities.get('insured_name'),
-                entities.get('date_of_loss'),
-                entities.get('claim_amount'),
-                json.dumps(entities.get('phone_numbers', [])),
-                json.dumps(entities.get('email_addresses', [])),
-                entities.get('incident_description'),
-                entities.get('confidence_score', 0.0),
-                entities.get('extraction_method', 'ai')
-            ))
-            conn.commit()
-            if self.logger:
-                self.logger.info(f"Inserted entities for email ID: {email_id}")
-            return True
+            with self.cursor() as (conn, cursor):
+                _multi_row_insert(
+                    cursor, table_name, _entity_columns(tables),
+                    [_entity_row(email_id, entities, bool(tables.get('triage_rollup')))]
+                )
+                _record_stage_progress(
+                    cursor, tables, {'entities': [email_id]},
+                    [('entities', email_id, -1), ('triage', email_id, 1)]
+                )
+                conn.commit()
+                if self.logger:
+                    self.logger.info(f"Inserted entities for email ID: {email_id}")
+                return True
         except Exception as e:
             if self.logger:
                 self.logger.error(f"Error inserting entities: {str(e)}")
             raise
-        finally:
-            if conn:
-                conn.close()
-    def insert_triage_result(self, email_id: int, triage_data: Dict, table_name: str = "tbl_triage_results") -> bool:
+    def insert_triage_result(self, email_id: int, triage_data: Dict, table_name: str = "tbl_triage_results",
+                             tables: Optional[Dict[str, str]] = None) -> bool:
+        tables = {**DEFAULT_TABLES, **(tables or {})}
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            query = f"""
-            INSERT INTO {table_name} (
-                email_id, priority_level, claim_type, risk_level,
-                requires_escalation, assigned_to, triage_notes,
-                confidence_score, created_at
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, GETDATE())
-            """
-            cursor.execute(query, (
-                email_id,
-                triage_data.get('priority_level'),
-                triage_data.get('claim_type'),
-                triage_data.get('risk_level'),
-                triage_data.get('requires_escalation', False),
-                triage_data.get('assigned_to'),
-                triage_data.get('triage_notes'),
-                triage_data.get('confidence_score', 0.0)
-            ))
-            conn.commit()
-            if self.logger:
-                self.logger.info(f"Inserted triage result for email ID: {email_id}")
-            return True
+            with self.cursor() as (conn, cursor):
+                query = f"""
+                INSERT INTO {table_name} (
+                    email_id, priority_level, claim_type, risk_level,
+                    requires_escalation, assigned_to, triage_notes,
+                    confidence_score, created_at
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, GETDATE())
+                """
+                cursor.execute(query, _triage_row(email_id, triage_data))
+                _record_stage_progress(cursor, tables, {'triage': [email_id]}, [('triage', email_id, -1)])
+                if tables.get('triage_rollup'):
+                    cursor.execute(
+                        f"SELECT TOP (1) claim_amount_value FROM {tables['entities']} WHERE email_id = ?", (email_id,)
+                    )
+                    amount = cursor.fetchone()
+                    _record_triage_rollup(cursor, tables, [(_rollup_key(triage_data), amount[0] if amount else None)])
+                conn.commit()
+                if self.logger:
+                    self.logger.info(f"Inserted triage result for email ID: {email_id}")
+                return True
         except Exception as e:
             if self.logger:
                 self.logger.error(f"Error inserting triage result: {str(e)}")
             raise
-        finally:
-            if conn:
-                conn.close()
     def insert_attachments(self, email_id: int, attachments: List[Dict], table_name: str = "tbl_attachments") -> bool:
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            for att in attachments:
-                query = f"""
-                INSERT INTO {table_name} (
-                    email_id, filename, file_type, file_category, file_size,
-                    blob_path, is_invoice, is_medical_record, document_type,
-                    classification_confidence, created_at
+            with self.cursor() as (conn, cursor):
+                _multi_row_insert(
+                    cursor, table_name, ATTACHMENT_COLUMNS,
+                    [_attachment_row(email_id, att) for att in attachments]
                 )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, GETDATE())
-                """
-                cursor.execute(query, (
-                    email_id,
-                    att.get('filename'),
-                    att.get('file_type'),
-                    att.get('file_category'),
-                    att.get('file_size'),
-                    att.get('blob_path'),
-                    att.get('is_invoice', False),
-                    att.get('is_medical_record', False),
-                    att.get('document_type'),
-                    att.get('classification_confidence', 0.0)
-                ))
-            conn.commit()
-            if self.logger:
-                self.logger.info(f"Inserted {len(attachments)} attachments for email ID: {email_id}")
-            return True
+                conn.commit()
+                if self.logger:
+                    self.logger.info(f"Inserted {len(attachments)} attachments for email ID: {email_id}")
+                return True
         except Exception as e:
             if self.logger:
                 self.logger.error(f"Error inserting attachments: {str(e)}")
             raise
-        finally:
-            if conn:
-                conn.close()
-    def bulk_insert_dataframe(self, df: pd.DataFrame, table_name: str) -> bool:
+    def persist_email_bundle(self, bundle: Dict, tables: Optional[Dict[str, str]] = None) -> int:
+        """Write one processed email in a single transaction
+
+        bundle holds 'email' (parsed email), 'entities', 'triage' and 'attachments';
+        entities, triage and attachments are optional. Returns the new email id.
+        """
+        return self.persist_email_bundles([bundle], tables)[0]
+    def persist_email_bundles(self, bundles: List[Dict], tables: Optional[Dict[str, str]] = None) -> List[int]:
+        """Write N processed emails with set-based inserts and one commit
+
+        Child rows are keyed on the OUTPUT INSERTED ids, matched back through
+        message_id, so message_ids must be present and unique within the batch.
+        Emails whose message_id is already stored are not inserted again; they
+        keep their existing id and get no new child rows, so a retried batch is
+        idempotent. A concurrent writer storing the same message_id first makes
+        the batch fail on the unique index and roll back. When tables names the
+        health counter tables or 'triage_rollup', stage watermarks, the
+        entities/triage backlog and the daily triage rollup are updated in the
+        same transaction.
+        Returns the email ids in bundle order.
+        """
+        if not bundles:
+            return []
+        tables = {**DEFAULT_TABLES, **(tables or {})}
+        message_ids = [bundle['email'].get('message_id') for bundle in bundles]
+        if not all(message_ids) or len(set(message_ids)) != len(message_ids):
+            raise ValueError("Every bundle needs a unique, non-empty email message_id")
+        try:
+            with self.cursor() as (conn, cursor):
+                existing = _existing_email_ids(cursor, tables['emails'], message_ids)
+                inserted = _multi_row_insert(
+                    cursor, tables['emails'], EMAIL_COLUMNS,
+                    [
+                        _email_row(bundle['email']) for bundle in bundles
+                        if bundle['email']['message_id'] not in existing
+                    ],
+                    output="OUTPUT INSERTED.id, INSERTED.message_id"
+                )
+                ids_by_message = {message_id: email_id for email_id, message_id in inserted}
+                new_ids = set(ids_by_message.values())
+                unresolved = [m for m in message_ids if m not in ids_by_message and m not in existing]
+                if unresolved:
+                    # Only reachable while the index still ignores duplicate keys instead of rejecting them
+                    existing.update(_existing_email_ids(cursor, tables['emails'], unresolved))
+                ids_by_message.update(existing)
+                email_ids = [ids_by_message[message_id] for message_id in message_ids]
+                entity_rows, triage_rows, attachment_rows, pending, rollup_rows = [], [], [], [], []
+                for email_id, bundle in zip(email_ids, bundles):
+                    if email_id not in new_ids:
+                        continue
+                    if bundle.get('entities') is not None:
+                        entity_rows.append(_entity_row(email_id, bundle['entities'], bool(tables.get('triage_rollup'))))
+                    if bundle.get('triage') is not None:
+                        triage_rows.append(_triage_row(email_id, bundle['triage']))
+                        amount = EmailParser.parse_amount((bundle.get('entities') or {}).get('claim_amount'))
+                        rollup_rows.append((_rollup_key(bundle['triage']), amount))
+                    if bundle.get('entities') is None:
+                        pending.append(('entities', email_id, 1))
+                    elif bundle.get('triage') is None:
+                        pending.append(('triage', email_id, 1))
+                    attachment_rows.extend(_attachment_row(email_id, att) for att in bundle.get('attachments') or [])
+                _multi_row_insert(cursor, tables['entities'], _entity_columns(tables), entity_rows)
+                _multi_row_insert(cursor, tables['triage'], TRIAGE_COLUMNS, triage_rows)
+                _multi_row_insert(cursor, tables['attachments'], ATTACHMENT_COLUMNS, attachment_rows)
+                _record_stage_progress(cursor, tables, {
+                    'emails': sorted(new_ids),
+                    'entities': [row[0] for row in entity_rows],
+                    'triage': [row[0] for row in triage_rows]
+                }, pending)
+                _record_triage_rollup(cursor, tables, rollup_rows)
+                conn.commit()
+            if self.logger:
+                self.logger.info(
+                    f"Persisted {len(new_ids)} emails with {len(entity_rows)} entity, "
+                    f"{len(triage_rows)} triage and {len(attachment_rows)} attachment rows"
+                    + (f"; {len(existing)} were already stored" if existing else "")
+                )
+            return email_ids
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"Error persisting email bundles: {str(e)}")
+            raise
+    def rebuild_triage_rollup(self, start_date: date, end_date: date, tables: Optional[Dict[str, str]] = None) -> int:
+        """Recompute the daily triage rollup for start_date..end_date (inclusive) from the raw tables
+
+        Replaces the range in one transaction and returns the rollup rows
+        written. Rebuild closed days; rebuilding today while ingest is
+        running can race with the write-time updates.
+        """
+        tables = {**DEFAULT_TABLES, 'triage_rollup': "tbl_triage_daily_rollup", **(tables or {})}
+        rollup = tables['triage_rollup']
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            # This is a placeholder for bulk insert logic
-            # Use fast_executemany or SQL bulk copy for production
-            for _, row in df.iterrows():
-                # Example: insert each row as a dict
-                cursor.execute(f"INSERT INTO {table_name} VALUES (...) ")
-            conn.commit()
+            with self.cursor() as (conn, cursor):
+                cursor.execute(
+                    f"DELETE FROM {rollup} WHERE rollup_date >= ? AND rollup_date <= ?",
+                    (start_date, end_date)
+                )
+                cursor.execute(
+                    f"""
+                    INSERT INTO {rollup} (
+                        rollup_date, claim_type, risk_level, requires_escalation,
+                        email_count, amount_count, amount_sum, updated_at
+                    )
+                    SELECT
+                        CAST(t.created_at AS DATE),
+                        ISNULL(t.claim_type, 'unknown'),
+                        ISNULL(t.risk_level, 'unknown'),
+                        t.requires_escalation,
+                        COUNT(*),
+                        COUNT(ent.claim_amount_value),
+                        ISNULL(SUM(ent.claim_amount_value), 0),
+                        GETDATE()
+                    FROM {tables['triage']} t
+                    OUTER APPLY (
+                        SELECT TOP (1) claim_amount_value FROM {tables['entities']} WHERE email_id = t.email_id
+                    ) ent
+                    WHERE t.created_at >= ? AND t.created_at < DATEADD(day, 1, ?)
+                    GROUP BY CAST(t.created_at AS DATE), ISNULL(t.claim_type, 'unknown'),
+                        ISNULL(t.risk_level, 'unknown'), t.requires_escalation
+                    """,
+                    (start_date, end_date)
+                )
+                written = cursor.rowcount
+                conn.commit()
             if self.logger:
-                self.logger.info(f"Bulk inserted {len(df)} rows into {table_name}")
-            return True
+                self.logger.info(f"Rebuilt {written} triage rollup rows for {start_date} to {end_date}")
+            return written
         except Exception as e:
             if self.logger:
-                self.logger.error(f"Error bulk inserting dataframe: {str(e)}")
+                self.logger.error(f"Error rebuilding triage rollup: {str(e)}")
+            raise
+    def bulk_insert_dataframe(self, df: pd.DataFrame, table_name: str, chunk_size: int = 1000,
+                              column_map: Optional[Dict[str, str]] = None) -> List[int]:
+        """Insert df into table_name in chunks, one transaction per chunk
+
+        Table columns are the DataFrame columns, renamed through column_map where
+        given. Returns the number of rows committed by each chunk.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer")
+        column_map = column_map or {}
+        columns = [column_map.get(col, col) for col in df.columns]
+        query = (
+            f"INSERT INTO {table_name} ({', '.join(f'[{col}]' for col in columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)})"
+        )
+        # Plain Python values with None for missing data, which every ODBC/DB-API driver accepts
+        values = df.astype(object).where(df.notna(), None)
+        chunk_counts = []
+        try:
+            with self.cursor() as (conn, cursor):
+                if hasattr(cursor, 'fast_executemany'):
+                    cursor.fast_executemany = True
+                for start in range(0, len(values), chunk_size):
+                    rows = list(values.iloc[start:start + chunk_size].itertuples(index=False, name=None))
+                    # A failing chunk is rolled back by the pool; earlier chunks stay committed
+                    cursor.executemany(query, rows)
+                    conn.commit()
+                    chunk_counts.append(len(rows))
+                if self.logger:
+                    self.logger.info(
+                        f"Bulk inserted {sum(chunk_counts)} rows into {table_name} "
+                        f"in {len(chunk_counts)} chunks"
+                    )
+                return chunk_counts
+        except Exception as e:
+            if self.logger:
+                self.logger.error(
+                    f"Error bulk inserting dataframe into {table_name} after "
+                    f"{sum(chunk_counts)} committed rows: {str(e)}"
+                )
             raise
-        finally:
-            if conn:
-                conn.close()
@@ -0,0 +1,154 @@
+import json
+import math
+import random
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+FIRST_NAMES = ["John", "Mary", "Aisha", "Wei", "Carlos", "Priya", "Liam", "Sofia", "Noah", "Grace"]
+LAST_NAMES = ["Smith", "Nguyen", "Patel", "Garcia", "Brown", "Wilson", "Khan", "Taylor", "Lee", "Martin"]
+CLAIM_TYPES = {
+    "auto": ["vehicle", "car accident", "collision", "motor"],
+    "property": ["house fire", "flood", "storm damage", "building"],
+    "health": ["hospital", "medical treatment", "surgery"],
+    "liability": ["lawsuit", "third party", "negligence"]
+}
+PRIORITY_PHRASES = ["urgent", "emergency", "severe injury", "status update", "inquiry", "theft", "damage", "litigation"]
+RISK_PHRASES = ["fraud", "suspicious", "inconsistent", "multiple claims"]
+FILLER = (
+    "Please find the details of the incident below. The insured has provided photos and a repair estimate. "
+    "We will arrange an assessor visit once the documents are reviewed. "
+)
+SIGNATURE = "Kind regards,\n{name}\nClaims Officer | {phone}\n{email}"
+DISCLAIMER = (
+    "CONFIDENTIALITY NOTICE: This email and any attachments are confidential and intended only for the "
+    "named recipient. If you have received it in error please delete it."
+)
+
+class SyntheticCorpus:
+    """Seeded generator of realistic claims emails for benchmarks
+
+    Emails carry claim/policy numbers, insured names, loss dates, amounts and
+    triage keywords from the config vocabulary, optionally wrapped in HTML,
+    signatures, disclaimers and forwarded reply chains. Body sizes are drawn
+    log-uniformly between min_bytes and max_bytes so small and very large
+    emails both occur. The same seed always yields the same corpus.
+    """
+    def __init__(self, seed: int = 42, min_bytes: int = 1024, max_bytes: int = 1024 * 1024,
+                 html_ratio: float = 0.3, thread_ratio: float = 0.4, duplicate_ratio: float = 0.05):
+        self.seed = seed
+        self.min_bytes = min_bytes
+        self.max_bytes = max_bytes
+        self.html_ratio = html_ratio
+        self.thread_ratio = thread_ratio
+        self.duplicate_ratio = duplicate_ratio
+    def _random(self, index: int) -> random.Random:
+        # Per-email generator so any email can be regenerated independently of the others
+        return random.Random(f"{self.seed}:{index}")
+    def _target_size(self, rng: random.Random) -> int:
+        return int(math.exp(rng.uniform(math.log(self.min_bytes), math.log(self.max_bytes))))
+    @staticmethod
+    def _person(rng: random.Random) -> str:
+        return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    @staticmethod
+    def _phone(rng: random.Random) -> str:
+        return f"{rng.randint(200, 999)}-{rng.randint(200, 999)}-{rng.randint(1000, 9999)}"
+    def _message(self, rng: random.Random) -> Dict:
+        claim_type = rng.choice(list(CLAIM_TYPES))
+        keywords = rng.sample(CLAIM_TYPES[claim_type], k=min(2, len(CLAIM_TYPES[claim_type])))
+        keywords += rng.sample(PRIORITY_PHRASES, k=2)
+        if rng.random() < 0.1:
+            keywords.append(rng.choice(RISK_PHRASES))
+        claim_number = f"CLM{rng.randint(0, 10 ** 8 - 1):08d}"
+        policy_number = f"POL{rng.randint(0, 10 ** 9 - 1):09d}"
+        amount = f"{rng.randint(100, 250000):,}.{rng.randint(0, 99):02d}"
+        loss_date = f"{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}/{rng.randint(2021, 2025)}"
+        insured = self._person(rng)
+        lines = [
+            "Hi team,",
+            "",
+            f"CLAIM #{claim_number}",
+            f"POLICY: {policy_number}",
+            f"INSURED: {insured}",
+            f"LOSS DATE: {loss_date}",
+            f"Estimated cost ${amount} following the {' and '.join(keywords)}.",
+            ""
+        ]
+        return {
+            'claim_number': claim_number,
+            'policy_number': policy_number,
+            'claim_type': claim_type,
+            'lines': lines
+        }
+    def _thread(self, rng: random.Random, depth: int) -> str:
+        history = []
+        for level in range(depth):
+            quote = "> " * (level + 1)
+            sender = self._person(rng)
+            history.append(f"On Mon, 3 Jun 2024 at 09:{level:02d}, {sender} <{sender.split()[0].lower()}@broker.example> wrote:")
+            history.extend(f"{quote}{line}" for line in (FILLER.strip(), f"Ref CLAIM #CLM{rng.randint(0, 10 ** 8 - 1):08d}"))
+        return "\n".join(history)
+    def generate(self, index: int) -> Dict:
+        rng = self._random(index)
+        message = self._message(rng)
+        target = self._target_size(rng)
+        sender = self._person(rng)
+        lines = list(message['lines'])
+        body = "\n".join(lines)
+        # Pad the new content with narrative paragraphs up to the drawn size
+        while len(body) < target * 0.6:
+            body += "\n" + FILLER * rng.randint(1, 8)
+        body += "\n\n" + SIGNATURE.format(name=sender, phone=self._phone(rng), email=f"{sender.split()[0].lower()}@insurer.example")
+        body += "\n\n" + DISCLAIMER
+        if rng.random() < self.thread_ratio:
+            body += "\n\n" + self._thread(rng, rng.randint(1, 4))
+        email = {
+            'message_id': f"<bench-{self.seed}-{index}@claims.example>",
+            'subject': f"{'FW: ' if rng.random() < 0.2 else ''}Claim {message['claim_number']} - {message['claim_type']}",
+            'from': f"{sender.split()[0].lower()}@insurer.example",
+            'to': ["claims@guild.example"],
+            'date': f"2024-06-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00:00Z",
+            'body_text': body,
+            'body_html': "",
+            'attachments': [{'filename': f"photo_{index}.jpg", 'size': rng.randint(10_000, 5_000_000)}]
+        }
+        if rng.random() < self.html_ratio:
+            paragraphs = "".join(f"<p>{paragraph}</p>" for paragraph in body.split("\n\n"))
+            email['body_html'] = f"<html><head><style>p {{margin: 0}}</style></head><body>{paragraphs}</body></html>"
+            email['body_text'] = ""
+        return email
+    def iter_emails(self, count: int) -> Iterator[Dict]:
+        rng = random.Random(self.seed)
+        generated: List[Dict] = []
+        for index in range(count):
+            if generated and rng.random() < self.duplicate_ratio:
+                # Re-sent copy of an earlier email under a new message id
+                email = dict(rng.choice(generated))
+                email['message_id'] = f"<bench-{self.seed}-{index}@claims.example>"
+            else:
+                email = self.generate(index)
+                if len(generated) < 256:
+                    generated.append(email)
+            yield email
+    def write_container(self, root_dir: str, container_name: str, count: int) -> int:
+        """Write count emails as JSON blobs for LocalBlobConnector; returns the bytes written"""
+        container = Path(root_dir) / container_name
+        container.mkdir(parents=True, exist_ok=True)
+        total = 0
+        for index, email in enumerate(self.iter_emails(count)):
+            payload = json.dumps(email)
+            (container / f"email_{index:07d}.json").write_text(payload, encoding='utf-8')
+            total += len(payload)
+        return total
+
+def corpus_stats(emails: List[Dict]) -> Dict:
+    sizes = sorted(len(email.get('body_text') or email.get('body_html') or '') for email in emails)
+    if not sizes:
+        return {'emails': 0}
+    return {
+        'emails': len(sizes),
+        'total_bytes': sum(sizes),
+        'min_bytes': sizes[0],
+        'median_bytes': sizes[len(sizes) // 2],
+        'max_bytes': sizes[-1],
+        'html_emails': sum(1 for email in emails if email.get('body_html'))
+    }
@@ -0,0 +1,193 @@
+import re
+import sys
+import json
+import random
+import sqlite3
+import argparse
+from typing import Dict, List, Optional
+from 12_integration.schema_migrator import load_migrations
+
+# SQLite stand-in for the claims schema. Index names and key columns mirror the
+# SQL Server migrations; filtered indexes become partial indexes and INCLUDE
+# columns are appended to the key, since SQLite has no INCLUDE.
+LOCAL_SCHEMA = """
+CREATE TABLE tbl_claims_emails (
+    id INTEGER PRIMARY KEY, message_id TEXT, subject TEXT, sender TEXT, email_date TEXT, created_at TEXT
+);
+CREATE UNIQUE INDEX ux_claims_emails_message_id ON tbl_claims_emails (message_id);
+CREATE TABLE tbl_extracted_entities (
+    id INTEGER PRIMARY KEY, email_id INTEGER NOT NULL, claim_number TEXT, policy_number TEXT,
+    insured_name TEXT, claim_amount TEXT, claim_amount_value REAL, created_at TEXT
+);
+CREATE INDEX idx_entities_email_id
+    ON tbl_extracted_entities (email_id, claim_number, policy_number, insured_name, claim_amount, claim_amount_value);
+CREATE TABLE tbl_triage_results (
+    id INTEGER PRIMARY KEY, email_id INTEGER NOT NULL, priority_level TEXT, claim_type TEXT, risk_level TEXT,
+    requires_escalation INTEGER NOT NULL DEFAULT 0, assigned_to TEXT, triage_notes TEXT,
+    reviewed_at TEXT, created_at TEXT
+);
+CREATE INDEX idx_triage_email_id ON tbl_triage_results (email_id);
+CREATE INDEX idx_triage_escalation_unreviewed
+    ON tbl_triage_results (created_at, email_id, priority_level, claim_type, risk_level, assigned_to, triage_notes)
+    WHERE requires_escalation = 1 AND reviewed_at IS NULL;
+CREATE INDEX idx_triage_created_at
+    ON tbl_triage_results (created_at, email_id, claim_type, risk_level, requires_escalation);
+CREATE TABLE tbl_processing_log (
+    id INTEGER PRIMARY KEY, pipeline_name TEXT, step_name TEXT, status TEXT, error_message TEXT, created_at TEXT
+);
+CREATE INDEX idx_processing_log_failed
+    ON tbl_processing_log (created_at, pipeline_name, step_name, error_message)
+    WHERE status = 'failed';
+CREATE TABLE tbl_triage_daily_rollup (
+    rollup_date TEXT NOT NULL, claim_type TEXT NOT NULL, risk_level TEXT NOT NULL,
+    requires_escalation INTEGER NOT NULL, email_count INTEGER, amount_count INTEGER, amount_sum REAL,
+    PRIMARY KEY (rollup_date, claim_type, risk_level, requires_escalation)
+);
+"""
+# Tables that grow with email volume; a full scan of any of them is a regression
+LARGE_TABLES = ("tbl_claims_emails", "tbl_extracted_entities", "tbl_triage_results", "tbl_processing_log")
+# SQLite versions of the hot queries and the indexes each must use
+HOT_QUERIES = {
+    'high_risk_unreviewed': {
+        'sql': """
+            SELECT e.id, e.message_id, e.subject, ent.claim_number, ent.policy_number,
+                t.priority_level, t.claim_type, t.risk_level, t.triage_notes, t.assigned_to
+            FROM tbl_triage_results t
+            INNER JOIN tbl_claims_emails e ON e.id = t.email_id
+            INNER JOIN tbl_extracted_entities ent ON ent.email_id = t.email_id
+            WHERE t.requires_escalation = 1 AND t.reviewed_at IS NULL
+        """,
+        'params': (),
+        'indexes': ['idx_triage_escalation_unreviewed', 'idx_entities_email_id']
+    },
+    'health_escalations': {
+        'sql': """
+            SELECT t.email_id, e.subject, t.priority_level, t.created_at
+            FROM tbl_triage_results t
+            INNER JOIN tbl_claims_emails e ON e.id = t.email_id
+            WHERE t.requires_escalation = 1 AND t.reviewed_at IS NULL AND t.created_at < ?
+            ORDER BY t.created_at LIMIT 50
+        """,
+        'params': ("2024-06-20",),
+        'indexes': ['idx_triage_escalation_unreviewed']
+    },
+    'pipeline_failures': {
+        'sql': """
+            SELECT pipeline_name, step_name, error_message, created_at, COUNT(*)
+            FROM tbl_processing_log
+            WHERE status = 'failed' AND created_at >= ?
+            GROUP BY pipeline_name, step_name, error_message, created_at
+        """,
+        'params': ("2024-06-27",),
+        'indexes': ['idx_processing_log_failed']
+    },
+    'rollup_rebuild': {
+        'sql': """
+            SELECT substr(t.created_at, 1, 10), t.claim_type, t.risk_level, t.requires_escalation,
+                COUNT(*), SUM(ent.claim_amount_value)
+            FROM tbl_triage_results t
+            LEFT JOIN tbl_extracted_entities ent ON ent.email_id = t.email_id
+            WHERE t.created_at >= ? AND t.created_at < ?
+            GROUP BY 1, 2, 3, 4
+        """,
+        'params': ("2024-06-10", "2024-06-11"),
+        'indexes': ['idx_triage_created_at', 'idx_entities_email_id']
+    },
+    'dashboard_rollup': {
+        'sql': """
+            SELECT claim_type, risk_level, SUM(email_count), SUM(amount_sum) / SUM(amount_count)
+            FROM tbl_triage_daily_rollup
+            WHERE rollup_date >= ?
+            GROUP BY claim_type, risk_level
+        """,
+        'params': ("2024-06-01",),
+        'indexes': ['sqlite_autoindex_tbl_triage_daily_rollup_1']
+    },
+    'message_id_lookup': {
+        'sql': "SELECT message_id, id FROM tbl_claims_emails WHERE message_id IN (?, ?)",
+        'params': ("<msg-1@claims.example>", "<msg-2@claims.example>"),
+        'indexes': ['ux_claims_emails_message_id']
+    }
+}
+_INDEX_NAME = re.compile(r'\bINDEX\s+(\w+)')
+_FULL_SCAN = re.compile(r'^SCAN (\w+)(?: AS \w+)?$')
+
+def build_local_database(rows: int = 20000, seed: int = 7, path: str = ":memory:") -> sqlite3.Connection:
+    """Schema plus synthetic rows and ANALYZE statistics, so the planner sees realistic selectivity"""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.executescript(LOCAL_SCHEMA)
+    days = [f"2024-06-{day:02d}" for day in range(1, 31)]
+    emails, entities, triage, log = [], [], [], []
+    for email_id in range(1, rows + 1):
+        created = f"{days[email_id * len(days) // (rows + 1)]} {rng.randint(0, 23):02d}:00:00"
+        escalated = rng.random() < 0.05
+        emails.append((email_id, f"<msg-{email_id}@claims.example>", f"Claim {email_id}", "broker@example.com", created, created))
+        entities.append((email_id, email_id, f"CLM{email_id:08d}", f"POL{email_id:09d}", "Jane Doe",
+                         "$1,500.00", 1500.0, created))
+        triage.append((email_id, email_id, rng.choice(["low", "medium", "high"]), rng.choice(["auto", "property"]),
+                       "high" if escalated else "standard", int(escalated), None, None,
+                       None if rng.random() < 0.1 else created, created))
+        log.append((email_id, "email_ingest", "sql_write", "failed" if rng.random() < 0.01 else "success",
+                    None, created))
+    conn.executemany("INSERT INTO tbl_claims_emails VALUES (?, ?, ?, ?, ?, ?)", emails)
+    conn.executemany("INSERT INTO tbl_extracted_entities VALUES (?, ?, ?, ?, ?, ?, ?, ?)", entities)
+    conn.executemany("INSERT INTO tbl_triage_results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", triage)
+    conn.executemany("INSERT INTO tbl_processing_log VALUES (?, ?, ?, ?, ?, ?)", log)
+    conn.execute(
+        "INSERT INTO tbl_triage_daily_rollup "
+        "SELECT substr(created_at, 1, 10), claim_type, risk_level, requires_escalation, COUNT(*), 0, 0 "
+        "FROM tbl_triage_results GROUP BY 1, 2, 3, 4"
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+    return conn
+
+def explain(conn: sqlite3.Connection, sql: str, params=()) -> List[str]:
+    return [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+def check_query_plans(conn: Optional[sqlite3.Connection] = None, queries: Optional[Dict] = None) -> List[Dict]:
+    """Plan of every hot query; regressed when it scans a large table or misses an expected index"""
+    conn = conn or build_local_database()
+    results = []
+    for name, query in (queries or HOT_QUERIES).items():
+        plan = explain(conn, query['sql'], query['params'])
+        used = {match for step in plan for match in _INDEX_NAME.findall(step)}
+        full_scans = [
+            match.group(1) for match in (_FULL_SCAN.match(step) for step in plan)
+            if match and match.group(1) in LARGE_TABLES
+        ]
+        missing = [index for index in query['indexes'] if index not in used]
+        results.append({
+            'query': name,
+            'plan': plan,
+            'missing_indexes': missing,
+            'full_scans': full_scans,
+            'regressed': bool(missing or full_scans)
+        })
+    return results
+
+def check_index_parity(migrations_dir: Optional[str] = None) -> List[str]:
+    """Indexes in LOCAL_SCHEMA that no migration creates, i.e. a stand-in that has drifted"""
+    created = set()
+    for migration in load_migrations(migrations_dir):
+        for batch in migration['batches']:
+            created.update(re.findall(r'CREATE\s+(?:UNIQUE\s+)?(?:NONCLUSTERED\s+)?INDEX\s+(\w+)', batch, re.IGNORECASE))
+    local = re.findall(r'CREATE\s+(?:UNIQUE\s+)?INDEX\s+(\w+)', LOCAL_SCHEMA)
+    return [index for index in local if index not in created]
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Query-plan regression check on a local SQLite stand-in")
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args(argv)
+    results = check_query_plans(build_local_database(args.rows))
+    drift = check_index_parity()
+    print(json.dumps({'queries': results, 'unmigrated_indexes': drift}, indent=2))
+    regressions = [result['query'] for result in results if result['regressed']]
+    if regressions or drift:
+        print(f"Query plan regressions: {', '.join(regressions + drift)}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
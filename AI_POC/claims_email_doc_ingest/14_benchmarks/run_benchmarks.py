@@ -0,0 +1,189 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import platform
+import tempfile
+import statistics
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import pandas as pd
+from 02_pipelines.pipeline_email_ingest import EmailIngestPipeline
+from 07_models.entity_classifier import EntityClassifier
+from 12_integration.email_parser import EmailParser
+from 12_integration.local_blob_connector import LocalBlobConnector
+from 12_integration.sql_writer import SQLWriter
+from 14_benchmarks.corpus_generator import SyntheticCorpus, corpus_stats
+from 14_benchmarks.sqlite_tsql import BUNDLE_SCHEMA, TSQLiteConnection
+
+CONFIG_PATH = Path(__file__).resolve().parents[1] / "00_configs" / "config_poc.json"
+RESULTS_VERSION = 1
+
+class SQLiteBundleWriter:
+    """SQL stand-in for the end-to-end benchmark: SQLWriter.persist_email_bundles on SQLite
+
+    The configured tables are ignored: bundles go to the default core tables
+    created from BUNDLE_SCHEMA, since the health counters and the triage
+    rollup are T-SQL MERGE statements that SQLite cannot run.
+    """
+    def __init__(self, db_path: str):
+        conn = sqlite3.connect(db_path)
+        conn.executescript(BUNDLE_SCHEMA)
+        conn.close()
+        self.writer = SQLWriter(db_path, connection_factory=TSQLiteConnection)
+    def persist_email_bundles(self, bundles: List[Dict], tables=None) -> List[int]:
+        return self.writer.persist_email_bundles(bundles)
+    def close(self):
+        self.writer.close()
+
+def measure(fn: Callable[[], object], items: int, repeats: int) -> Dict:
+    """Run fn repeats times; throughput uses the median run"""
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    median = statistics.median(timings)
+    return {
+        'items': items,
+        'repeats': repeats,
+        'median_seconds': round(median, 6),
+        'best_seconds': round(min(timings), 6),
+        'ops_per_sec': round(items / median, 2) if median > 0 else 0.0
+    }
+
+def run_micro_benchmarks(config: Dict, emails: List[Dict], repeats: int) -> Dict[str, Dict]:
+    classifier = EntityClassifier(config)
+    views = [EmailParser.normalize_body(email['body_text'], email['body_html']) for email in emails]
+    texts = [view['text'] for view in views]
+    frame = pd.DataFrame({'body_text': texts})
+    count = len(emails)
+    results = {
+        'parser.normalize_body': measure(
+            lambda: [EmailParser.normalize_body(e['body_text'], e['body_html']) for e in emails], count, repeats),
+        'parser.extract_all': measure(lambda: [EmailParser.extract_all(text) for text in texts], count, repeats),
+        'classifier.extract_all_entities': measure(
+            lambda: [classifier.extract_all_entities(text) for text in texts], count, repeats),
+        'classifier.classify_all': measure(lambda: [classifier.classify_all(text) for text in texts], count, repeats),
+        'classifier.classify_batch': measure(lambda: classifier.classify_batch(frame), count, repeats)
+    }
+    rows = pd.DataFrame({
+        'email_id': range(count),
+        'claim_number': [f"CLM{i:08d}" for i in range(count)],
+        'confidence_score': [0.9] * count
+    })
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE tbl_extracted_entities (email_id INTEGER, claim_number TEXT, confidence_score REAL)")
+        conn.commit()
+        conn.close()
+        writer = SQLWriter(db_path, connection_factory=sqlite3.connect)
+        try:
+            results['sql_writer.bulk_insert_dataframe'] = measure(
+                lambda: writer.bulk_insert_dataframe(rows, 'tbl_extracted_entities', chunk_size=500), count, repeats)
+        finally:
+            writer.close()
+    return results
+
+def run_pipeline_benchmark(config: Dict, corpus: SyntheticCorpus, count: int, repeats: int) -> Dict:
+    """End-to-end ingest from a local blob container into SQLite, without checkpoints"""
+    config = {**config, 'ingestion': {**config.get('ingestion', {}), 'checkpoint': None}}
+    container = config['blob_storage']['container_name']
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus.write_container(tmp, container, count)
+        connector = LocalBlobConnector(tmp)
+        def run_once():
+            handle, db_path = tempfile.mkstemp(suffix=".db", dir=tmp)
+            os.close(handle)
+            writer = SQLiteBundleWriter(db_path)
+            try:
+                stats = EmailIngestPipeline(config, writer, _QuietLogger(), connector).run()
+            finally:
+                writer.close()
+            if stats['emails_failed'] or stats['emails_ingested'] != count:
+                raise RuntimeError(
+                    f"Pipeline benchmark wrote {stats['emails_ingested']} of {count} emails "
+                    f"({stats['emails_failed']} failed)"
+                )
+        return measure(run_once, count, repeats)
+
+class _QuietLogger:
+    """Logger stand-in that drops pipeline log lines so they do not skew timings"""
+    def info(self, *args, **kwargs):
+        pass
+    warning = error = debug = info
+
+def compare_results(current: Dict, baseline: Dict, tolerance: float) -> List[Dict]:
+    """Per-benchmark throughput change; regressed when ops/sec drops more than tolerance"""
+    comparison = []
+    for name, result in current['benchmarks'].items():
+        reference = baseline.get('benchmarks', {}).get(name)
+        if not reference or not reference.get('ops_per_sec'):
+            continue
+        change = result['ops_per_sec'] / reference['ops_per_sec'] - 1
+        comparison.append({
+            'name': name,
+            'baseline_ops_per_sec': reference['ops_per_sec'],
+            'current_ops_per_sec': result['ops_per_sec'],
+            'change': round(change, 4),
+            'regressed': change < -tolerance
+        })
+    return comparison
+
+def run_all(emails: int, max_bytes: int, repeats: int, seed: int, pipeline: bool = True,
+            config: Optional[Dict] = None) -> Dict:
+    if config is None:
+        with open(CONFIG_PATH) as f:
+            config = json.load(f)
+    corpus = SyntheticCorpus(seed=seed, max_bytes=max_bytes)
+    sample = list(corpus.iter_emails(emails))
+    benchmarks = run_micro_benchmarks(config, sample, repeats)
+    if pipeline:
+        benchmarks['pipeline.email_ingest'] = run_pipeline_benchmark(config, corpus, emails, repeats)
+    return {
+        'version': RESULTS_VERSION,
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seed': seed,
+            'max_bytes': max_bytes
+        },
+        'corpus': corpus_stats(sample),
+        'benchmarks': benchmarks
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Claims pipeline throughput benchmarks")
+    parser.add_argument("--emails", type=int, default=200)
+    parser.add_argument("--max-bytes", type=int, default=1024 * 1024)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-pipeline", action="store_true")
+    parser.add_argument("--output", help="Write results JSON here (stdout otherwise)")
+    parser.add_argument("--baseline", help="Compare against this results JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed fractional ops/sec drop")
+    args = parser.parse_args(argv)
+    results = run_all(args.emails, args.max_bytes, args.repeats, args.seed, not args.skip_pipeline)
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            results['comparison'] = compare_results(results, json.load(f), args.tolerance)
+        regressions = [entry['name'] for entry in results['comparison'] if entry['regressed']]
+        if regressions:
+            print(f"Throughput regressions: {', '.join(regressions)}", file=sys.stderr)
+            exit_code = 1
+    payload = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(payload + "\n")
+    else:
+        print(payload)
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
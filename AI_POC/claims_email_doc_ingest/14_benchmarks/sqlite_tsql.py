@@ -0,0 +1,49 @@
+import re
+import sqlite3
+from datetime import datetime
+
+# SQLite stand-in for the claims tables SQLWriter writes bundles into
+BUNDLE_SCHEMA = """
+CREATE TABLE tbl_claims_emails (
+    id INTEGER PRIMARY KEY, message_id TEXT, subject TEXT, sender TEXT, recipients TEXT, email_date TEXT,
+    body_text TEXT, body_html TEXT, has_attachments INTEGER, attachment_count INTEGER, blob_path TEXT, created_at TEXT
+);
+CREATE UNIQUE INDEX ux_claims_emails_message_id ON tbl_claims_emails (message_id) WHERE message_id IS NOT NULL;
+CREATE TABLE tbl_extracted_entities (
+    id INTEGER PRIMARY KEY, email_id INTEGER NOT NULL, claim_number TEXT, policy_number TEXT, insured_name TEXT,
+    date_of_loss TEXT, claim_amount TEXT, phone_numbers TEXT, email_addresses TEXT, incident_description TEXT,
+    confidence_score REAL, extraction_method TEXT, claim_amount_value REAL, created_at TEXT
+);
+CREATE TABLE tbl_triage_results (
+    id INTEGER PRIMARY KEY, email_id INTEGER NOT NULL, priority_level TEXT, claim_type TEXT, risk_level TEXT,
+    requires_escalation INTEGER, assigned_to TEXT, triage_notes TEXT, confidence_score REAL, created_at TEXT
+);
+CREATE TABLE tbl_attachments (
+    id INTEGER PRIMARY KEY, email_id INTEGER NOT NULL, filename TEXT, file_type TEXT, file_category TEXT,
+    file_size INTEGER, blob_path TEXT, is_invoice INTEGER, is_medical_record INTEGER, document_type TEXT,
+    classification_confidence REAL, created_at TEXT
+);
+"""
+_OUTPUT_CLAUSE = re.compile(r'OUTPUT\s+(INSERTED\.\w+(?:\s*,\s*INSERTED\.\w+)*)\s+(VALUES\s.*)$', re.S)
+
+class TSQLiteCursor:
+    """sqlite3 cursor for the T-SQL SQLWriter emits: OUTPUT INSERTED becomes RETURNING"""
+    def __init__(self, cursor):
+        self.cursor = cursor
+    def execute(self, query, params=()):
+        match = _OUTPUT_CLAUSE.search(query)
+        if match:
+            returning = match.group(1).replace("INSERTED.", "")
+            query = f"{query[:match.start()]}{match.group(2).rstrip()} RETURNING {returning}"
+        return self.cursor.execute(query, params)
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+class TSQLiteConnection:
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self.connection.create_function("GETDATE", 0, lambda: datetime.now().isoformat(sep=" "))
+    def cursor(self):
+        return TSQLiteCursor(self.connection.cursor())
+    def __getattr__(self, name):
+        return getattr(self.connection, name)